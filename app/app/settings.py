@@ -53,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -82,19 +84,117 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'app.wsgi.application'
 
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Set DB_POOL=pgbouncer when DB_HOST is a transaction-pooling pgbouncer.
+DB_POOL = os.environ.get('DB_POOL', '')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': os.environ.get(
+            'DB_ENGINE',
+            'core.backends.postgresql',
+        ),
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': bool(int(
+            os.environ.get('DB_CONN_HEALTH_CHECKS', 1)
+        )),
+        # pgbouncer may hand each transaction a different server.
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOL == 'pgbouncer',
+    }
+}
+
+# Read replicas as comma-separated host[:port][/name] entries, or
+# database files with SQLite. Safe requests read from them unless the
+# user wrote within DB_REPLICA_PIN_SECONDS; see core/db_router.py.
+DATABASE_REPLICAS = []
+for i, location in enumerate(
+        filter(None, os.environ.get('DB_REPLICAS', '').split(','))):
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if 'sqlite' in replica['ENGINE']:
+        replica['NAME'] = location.strip()
+    else:
+        address, _, name = location.strip().partition('/')
+        host, _, port = address.partition(':')
+        replica.update(
+            HOST=host,
+            PORT=port or replica['PORT'],
+            NAME=name or replica['NAME'],
+        )
+    DATABASES[f'replica{i}'] = replica
+    DATABASE_REPLICAS.append(f'replica{i}')
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = float(
+    os.environ.get('DB_REPLICA_PIN_SECONDS', 5)
+)
+DATABASE_REPLICA_PIN_CACHE_ALIAS = 'default'
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
     }
+
+TIMER_CACHE_ALIAS = 'default'
+TIMER_CACHE_TIMEOUT = int(os.environ.get('TIMER_CACHE_TIMEOUT', 300))
+
+# Set CACHE_ALIAS to share token lookups between workers.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000)),
+    'TTL': int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60)),
+    'CACHE_ALIAS': os.environ.get('TOKEN_AUTH_CACHE_ALIAS') or None,
+}
+
+# Lifetimes in seconds of the pairs from POST /api/user/token/ and
+# /api/user/token/refresh/.
+ACCESS_TOKEN_TTL = int(os.environ.get('ACCESS_TOKEN_TTL', 15 * 60))
+REFRESH_TOKEN_TTL = int(
+    os.environ.get('REFRESH_TOKEN_TTL', 30 * 24 * 3600)
+)
+
+# Token buckets per user and endpoint for timer writes, as "N/period":
+# a burst of N requests, refilled at N per period. Blank disables one.
+TIMER_THROTTLE_RATES = {
+    'timer-write': os.environ.get('TIMER_WRITE_THROTTLE_RATE', '60/min'),
+    'timer-import': os.environ.get('TIMER_IMPORT_THROTTLE_RATE', '20/hour'),
 }
+TIMER_THROTTLE_CACHE_ALIAS = 'default'
+
+
+# Live timer event streams (ASGI only). Without a Redis URL, events only
+# reach streams held by the process that made the write.
+TIMER_EVENTS_REDIS_URL = os.environ.get('REDIS_URL') or None
+TIMER_EVENTS_HEARTBEAT = float(os.environ.get('TIMER_EVENTS_HEARTBEAT', 20))
+# Events buffered per stream before a slow client is told to resync.
+TIMER_EVENTS_QUEUE_SIZE = 100
+# Seconds a stream ticket from /api/timer/events/ticket stays valid.
+TIMER_EVENTS_TICKET_TTL = 30
+
+# Fraction of requests that record DB and serializer timings.
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', 0.1))
+# When set, /metrics requires "Authorization: Bearer <token>". Unless
+# DEBUG is on, /metrics is not served at all without one.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
 
 
 # Password validation
@@ -139,6 +239,44 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Stream anything but tiny uploads to a temporary file on disk.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# Longest edge in pixels of each generated timer image variant.
+TIMER_IMAGE_VARIANTS = {
+    'thumb': 160,
+    'small': 480,
+    'medium': 1080,
+}
+TIMER_MEDIA_JOB_TIMEOUT = 300
+TIMER_MEDIA_MAX_ATTEMPTS = 3
+
+# Serve the timer API from async views when running under ASGI, each
+# process running at most ASYNC_VIEW_THREADS requests (and holding that
+# many DB connections) at once.
+ASYNC_VIEWS = bool(int(os.environ.get('ASYNC_VIEWS', 0)))
+ASYNC_VIEW_THREADS = int(os.environ.get('ASYNC_VIEW_THREADS', 10))
+
+# Most timers /api/user/me/?expand=timers returns.
+USER_TIMERS_EXPAND_LIMIT = 50
+
+# Timer times are stored in seconds; stats report progress toward this.
+TIMER_TARGET_HOURS = 10000
+
+# Most operations accepted by one POST /api/timer/batch request.
+TIMER_BATCH_MAX_OPERATIONS = 500
+
+# Most changed rows one GET /api/timer/changes page returns.
+TIMER_SYNC_PAGE_SIZE = 500
+
+# Rows GET /api/timer/export fetches from its server-side cursor at a time.
+TIMER_EXPORT_CHUNK_SIZE = 2000
+
+# Rows POST /api/timer/import validates and writes at a time, and the
+# most it accepts in one request; import_timers has no row limit.
+TIMER_IMPORT_CHUNK_SIZE = 5000
+TIMER_IMPORT_MAX_ROWS = 100000
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:
+    pass
+else:
+    from core.db import warm_up
+
+    # Each uWSGI worker connects before it takes its first request.
+    postfork(warm_up)
@@ -41,3 +41,4 @@ class UserAdmin(BaseUserAdmin):
 
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Timer)
+admin.site.register(models.TimerSession)
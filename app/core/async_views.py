@@ -0,0 +1,101 @@
+"""
+Serve DRF views from async handlers backed by a bounded thread pool.
+
+Django 3.2 has no async ORM and DRF views are synchronous. Under ASGI,
+Django runs every sync view on one shared thread, so a slow query stalls
+the whole process. These wrappers hand each request to a fixed pool
+instead. The event loop stays free, and the pool size caps the database
+connections a process can open.
+"""
+import asyncio
+import contextvars
+import functools
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from core import metrics
+
+
+# Bytes of a streamed body buffered in memory before spilling to disk.
+SPOOL_MEMORY = 1024 * 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide pool that runs async views."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_VIEW_THREADS,
+                thread_name_prefix='async-view',
+            )
+    return _executor
+
+
+def _spool(response):
+    """Drain a streaming body into a temporary file on this thread.
+
+    Django 3.2 iterates streaming bodies on the event loop, where the ORM
+    refuses to run; the file is then streamed from there instead.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY)
+    for chunk in response.streaming_content:
+        spool.write(chunk)
+    spool.seek(0)
+    response.streaming_content = iter(lambda: spool.read(64 * 1024), b'')
+    response._resource_closers.append(spool.close)
+
+
+def _run(func, args, kwargs):
+    # Pool threads outlive requests, so apply the request_started and
+    # request_finished connection cleanup around every call.
+    close_old_connections()
+    try:
+        with metrics.track_queries():
+            response = func(*args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                # Render here rather than on Django's shared thread.
+                with metrics.span('serialize'):
+                    response.render()
+            if getattr(response, 'streaming', False) and \
+                    not getattr(response, 'file_to_stream', None):
+                with metrics.span('serialize'):
+                    _spool(response)
+            return response
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(func, *args, **kwargs):
+    """Await blocking func on the view pool in the caller's context."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(context.run, _run, func, args, kwargs),
+    )
+
+
+def as_async_view(view_class, **initkwargs):
+    """Return an async view running view_class on the pool."""
+    view = view_class.as_view(**initkwargs)
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await run_in_pool(view, request, *args, **kwargs)
+
+    return async_view
+
+
+def as_view(view_class, **initkwargs):
+    """Return view_class as an async view when ``ASYNC_VIEWS`` is set."""
+    if settings.ASYNC_VIEWS:
+        return as_async_view(view_class, **initkwargs)
+    return view_class.as_view(**initkwargs)
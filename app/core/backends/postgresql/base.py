@@ -0,0 +1,65 @@
+"""
+PostgreSQL backend with health checks for persistent connections.
+
+Backports Django 4.1's ``CONN_HEALTH_CHECKS``: a connection kept from an
+earlier request is pinged before its first query or transaction in a
+request and replaced if the server has dropped it, so ``CONN_MAX_AGE``
+does not turn a database restart into failed requests. Connection setup
+is timed into the metrics registry.
+"""
+import time
+
+from django.db.backends.postgresql import base
+
+from core import metrics
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def connect(self):
+        # A new connection needs no check until the next request; set
+        # first, as connecting calls set_autocommit.
+        self.health_check_done = True
+        start = time.perf_counter()
+        super().connect()
+        metrics.registry.inc('db_connections_opened_total', alias=self.alias)
+        metrics.registry.observe(
+            'db_connect_duration_seconds',
+            time.perf_counter() - start,
+            alias=self.alias,
+        )
+
+    def close_if_unusable_or_obsolete(self):
+        # Runs when every request starts and finishes.
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    def close_if_health_check_failed(self):
+        """Close a reused connection the server no longer answers on."""
+        if (self.connection is None or not self.health_check_enabled or
+                self.health_check_done):
+            return
+        if not self.is_usable():
+            metrics.registry.inc('db_health_check_failures_total',
+                                 alias=self.alias)
+            self.close()
+        self.health_check_done = True
+
+    def set_autocommit(self, autocommit,
+                       force_begin_transaction_with_broken_autocommit=False):
+        # atomic() turns autocommit off before the first query, so check
+        # here too or a transaction would start on a dead connection.
+        self.close_if_health_check_failed()
+        return super().set_autocommit(
+            autocommit,
+            force_begin_transaction_with_broken_autocommit,
+        )
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
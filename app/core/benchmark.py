@@ -0,0 +1,276 @@
+"""
+Helpers for benchmarking the REST API in-process through the WSGI or
+ASGI app.
+"""
+import datetime
+import io
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.client import RequestFactory
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from core.models import (DailyActivity, Timer, TimerSession, TimerType)
+from user import tokens
+
+PASSWORD = 'benchpass123'
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarise(latencies, queries, errors, elapsed):
+    """Build the report entry for one endpoint."""
+    to_ms = 1000
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * to_ms, 3),
+        'p95_ms': round(percentile(latencies, 95) * to_ms, 3),
+        'p99_ms': round(percentile(latencies, 99) * to_ms, 3),
+        'mean_ms': round(sum(latencies) / count * to_ms, 3),
+        'throughput_rps': round(count / elapsed, 1) if elapsed else None,
+        'queries_per_request': round(sum(queries) / count, 2),
+    }
+
+
+@contextmanager
+def count_queries():
+    """Count queries on the default connection with minimal overhead."""
+    counter = [0]
+
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+@contextmanager
+def simulate_db_latency(seconds):
+    """Delay every query on connections opened in the block, any thread.
+
+    Yields a one-item list counting the delayed queries.
+    """
+    counter = [0]
+    lock = threading.Lock()
+
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(seconds)
+        with lock:
+            counter[0] += 1
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        # Fired on every reconnect of a thread's long-lived wrapper.
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(install)
+    try:
+        yield counter
+    finally:
+        connection_created.disconnect(install)
+
+
+class WSGIDriver:
+    """Send requests straight into the project's WSGI application."""
+
+    def __init__(self):
+        self.app = get_wsgi_application()
+        self.factory = RequestFactory()
+
+    def request(self, method, path, data=None, token=None, json_body=True,
+                **extra):
+        """Run one request and return (status code, body bytes)."""
+        if token:
+            extra['HTTP_AUTHORIZATION'] = f'Token {token}'
+        method = method.lower()
+        if data is not None and json_body:
+            request = getattr(self.factory, method)(
+                path,
+                json.dumps(data),
+                content_type='application/json',
+                **extra
+            )
+        elif data is not None:
+            request = getattr(self.factory, method)(path, data, **extra)
+        else:
+            request = getattr(self.factory, method)(path, **extra)
+
+        status = []
+
+        def start_response(status_line, headers, exc_info=None):
+            status.append(int(status_line.split(' ', 1)[0]))
+
+        result = self.app(request.environ, start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return status[0], body
+
+
+class ASGIDriver:
+    """Send requests straight into the project's ASGI application."""
+
+    def __init__(self):
+        self.app = get_asgi_application()
+
+    async def request(self, method, path, data=None, token=None):
+        """Run one JSON request and return (status code, body bytes)."""
+        body = b'' if data is None else json.dumps(data).encode()
+        headers = [(b'host', b'testserver')]
+        if data is not None:
+            headers.append((b'content-type', b'application/json'))
+            headers.append((b'content-length', str(len(body)).encode()))
+        if token:
+            headers.append((b'authorization', f'Token {token}'.encode()))
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method.upper(),
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': headers,
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            return {'type': 'http.disconnect'}
+
+        status, chunks = [], []
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.app(scope, receive, send)
+        return status[0], b''.join(chunks)
+
+
+def make_png():
+    """Return a small in-memory PNG upload."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color=(30, 120, 200)).save(buffer, 'PNG')
+    buffer.name = 'bench.png'
+    buffer.seek(0)
+    return buffer
+
+
+class Dataset:
+    """Seeded users, tokens, timers and types for a benchmark run."""
+
+    def __init__(self, users, timers, types, spare):
+        self.users = []
+        User = get_user_model()
+        password = make_password(PASSWORD)
+        User.objects.bulk_create([
+            User(
+                email=f'bench{i}@example.com',
+                name=f'Bench {i}',
+                password=password,
+            )
+            for i in range(users)
+        ])
+        seeded = list(User.objects.filter(email__startswith='bench'))
+        keys = {user.id: Token.generate_key() for user in seeded}
+        Token.objects.bulk_create([
+            Token(user=user, key=keys[user.id]) for user in seeded
+        ])
+        TimerType.objects.bulk_create([
+            TimerType(user=user, name=f'type {i}')
+            for user in seeded for i in range(types + spare)
+        ])
+        Timer.objects.bulk_create([
+            Timer(user=user, title=f'Timer {i}', current_time=i * 60)
+            for user in seeded for i in range(timers + spare)
+        ])
+
+        Through = Timer.timer_type.through
+        links = []
+        sessions = []
+        days = []
+        today = timezone.localdate()
+        for user in seeded:
+            type_ids = list(
+                TimerType.objects.filter(user=user)
+                .order_by('id').values_list('id', flat=True)
+            )
+            timer_ids = list(
+                Timer.objects.filter(user=user)
+                .order_by('id').values_list('id', flat=True)
+            )
+            for n, timer_id in enumerate(timer_ids):
+                if types:
+                    links.append(Through(
+                        timer_id=timer_id,
+                        timertype_id=type_ids[n % types],
+                    ))
+                sessions.append(TimerSession(
+                    timer_id=timer_id,
+                    user=user,
+                    duration=60,
+                ))
+                days.append(DailyActivity(
+                    timer_id=timer_id,
+                    user=user,
+                    day=today - datetime.timedelta(days=n % 365),
+                    seconds=60,
+                ))
+            self.users.append({
+                'email': user.email,
+                'token': keys[user.id],
+                'spare_refresh': [
+                    tokens.issue(user).refresh for _ in range(spare)
+                ],
+                'timers': timer_ids[:timers],
+                'spare_timers': timer_ids[timers:],
+                'types': type_ids[:types],
+                'spare_types': type_ids[types:],
+            })
+        Through.objects.bulk_create(links)
+        TimerSession.objects.bulk_create(sessions)
+        DailyActivity.objects.bulk_create(days)
+
+    def user(self, i):
+        return self.users[i % len(self.users)]
+
+    def timer(self, i):
+        timers = self.user(i)['timers']
+        return timers[(i // len(self.users)) % len(timers)]
+
+    def spare(self, i, kind):
+        """Return a disposable timer id, type id or refresh token."""
+        return self.user(i)[f'spare_{kind}'][i // len(self.users)]
@@ -0,0 +1,22 @@
+"""
+Database connection helpers for server startup.
+"""
+import logging
+
+from django.db import (DEFAULT_DB_ALIAS, OperationalError, connections)
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up(alias=DEFAULT_DB_ALIAS):
+    """Open a persistent connection before the first request needs it."""
+    conn = connections[alias]
+    if conn.settings_dict['CONN_MAX_AGE'] == 0:
+        # The first request would close it again straight away.
+        return
+    try:
+        conn.ensure_connection()
+    except OperationalError:
+        logger.warning('Could not warm up the %s database connection',
+                       alias, exc_info=True)
@@ -0,0 +1,77 @@
+"""
+Database routing to read replicas.
+
+``ReplicaRoutingMiddleware`` runs safe requests inside ``use_replica()``
+unless their user wrote within ``DATABASE_REPLICA_PIN_SECONDS``, so
+clients read their own writes. ``ReplicaRouter`` then sends the reads of
+such a request to one replica, picked at random per request. Writes,
+reads inside transactions and migrations always use ``default``.
+"""
+import math
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import (DEFAULT_DB_ALIAS, connections)
+
+from core import metrics
+
+
+_replica = ContextVar('db_replica', default=None)
+
+
+class ReplicaRouter:
+    """Route reads to the current request's replica, if it has one."""
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as default.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+@contextmanager
+def use_replica():
+    """Send reads in the block to a random replica."""
+    alias = random.choice(settings.DATABASE_REPLICAS)
+    metrics.registry.inc('db_replica_requests_total', database=alias)
+    token = _replica.set(alias)
+    try:
+        yield alias
+    finally:
+        _replica.reset(token)
+
+
+def _pin_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def _cache():
+    return caches[settings.DATABASE_REPLICA_PIN_CACHE_ALIAS]
+
+
+def pin(user_id):
+    """Keep user_id's reads on default for the pin window."""
+    _cache().set(
+        _pin_key(user_id),
+        True,
+        math.ceil(settings.DATABASE_REPLICA_PIN_SECONDS),
+    )
+
+
+def is_pinned(user_id):
+    return _cache().get(_pin_key(user_id), False)
@@ -0,0 +1,341 @@
+"""
+Django command to benchmark every REST API endpoint.
+"""
+import json
+import math
+import platform
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmark import (
+    PASSWORD,
+    Dataset,
+    WSGIDriver,
+    count_queries,
+    make_png,
+    summarise,
+)
+
+
+def scenarios():
+    """Return (name, request builder) for every endpoint under test.
+
+    Each builder takes the dataset and an iteration number and returns
+    keyword arguments for ``WSGIDriver.request``.
+    """
+    def timer_url(name, ds, i):
+        return reverse(name, args=[ds.timer(i)])
+
+    return [
+        ('user:create', lambda ds, i: {
+            'method': 'post',
+            'path': reverse('user:create'),
+            'data': {
+                'email': f'new{i}@example.com',
+                'password': PASSWORD,
+                'name': f'New {i}',
+            },
+        }),
+        ('user:token', lambda ds, i: {
+            'method': 'post',
+            'path': reverse('user:token'),
+            'data': {'email': ds.user(i)['email'], 'password': PASSWORD},
+        }),
+        ('user:token-refresh', lambda ds, i: {
+            'method': 'post',
+            'path': reverse('user:token-refresh'),
+            'data': {'refresh': ds.spare(i, 'refresh')},
+        }),
+        ('user:me [GET]', lambda ds, i: {
+            'method': 'get',
+            'path': reverse('user:me'),
+            'token': ds.user(i)['token'],
+        }),
+        ('user:me [PATCH]', lambda ds, i: {
+            'method': 'patch',
+            'path': reverse('user:me'),
+            'data': {'name': f'Renamed {i}'},
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-list-create [GET]', lambda ds, i: {
+            'method': 'get',
+            'path': reverse('timer:timer-list-create'),
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-list-create [GET ?timer_type_name]', lambda ds, i: {
+            'method': 'get',
+            'path': reverse('timer:timer-list-create') +
+            '?timer_type_name=type 0,type 1',
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-list-create [GET ?q]', lambda ds, i: {
+            'method': 'get',
+            'path': reverse('timer:timer-list-create') + f'?q=timer {i}',
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-list-create [POST]', lambda ds, i: {
+            'method': 'post',
+            'path': reverse('timer:timer-list-create'),
+            'data': {
+                'title': f'Created {i}',
+                'timer_type': [{'name': 'type 0'}, {'name': f'new {i}'}],
+            },
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-detail [GET]', lambda ds, i: {
+            'method': 'get',
+            'path': timer_url('timer:timer-detail', ds, i),
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-detail [PUT]', lambda ds, i: {
+            'method': 'put',
+            'path': timer_url('timer:timer-detail', ds, i),
+            'data': {
+                'title': 'Updated',
+                'current_time': i,
+                'timer_type': [{'name': 'type 1'}],
+            },
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-detail [PUT repeated]', lambda ds, i: {
+            'method': 'put',
+            'path': timer_url('timer:timer-detail', ds, 0),
+            'data': {
+                'title': 'Repeated',
+                'current_time': 60,
+                'timer_type': [{'name': 'type 1'}],
+            },
+            'token': ds.user(0)['token'],
+        }),
+        ('timer:timer-detail [DELETE]', lambda ds, i: {
+            'method': 'delete',
+            'path': reverse(
+                'timer:timer-detail',
+                args=[ds.spare(i, 'timers')],
+            ),
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-batch', lambda ds, i: {
+            'method': 'post',
+            'path': reverse('timer:timer-batch'),
+            'data': {'operations': [
+                {'op': 'create', 'data': {
+                    'title': f'Batch {i}',
+                    'timer_type': [{'name': 'type 0'}],
+                }},
+                {'op': 'create', 'data': {
+                    'title': f'Batch {i} b',
+                    'timer_type': [{'name': f'batch {i}'}],
+                }},
+                {'op': 'update', 'id': ds.timer(i), 'data': {
+                    'current_time': i,
+                    'timer_type': [{'name': 'type 2'}],
+                }},
+            ]},
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-session-create', lambda ds, i: {
+            'method': 'post',
+            'path': timer_url('timer:timer-session-create', ds, i),
+            'data': [{'duration': 30}, {'duration': 45}],
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-start', lambda ds, i: {
+            'method': 'post',
+            'path': timer_url('timer:timer-start', ds, i),
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-stop', lambda ds, i: {
+            'method': 'post',
+            'path': timer_url('timer:timer-stop', ds, i),
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-media-upload', lambda ds, i: {
+            'method': 'post',
+            'path': timer_url('timer:timer-media-upload', ds, i),
+            'data': {'image': make_png()},
+            'json_body': False,
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-changes', lambda ds, i: {
+            'method': 'get',
+            'path': reverse('timer:timer-changes') + '?since=0',
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-export', lambda ds, i: {
+            'method': 'get',
+            'path': reverse('timer:timer-export') + '?format=csv',
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-import', lambda ds, i: {
+            'method': 'post',
+            'path': reverse('timer:timer-import') + '?format=ndjson',
+            'data': ''.join(
+                json.dumps({
+                    'title': f'Imported {i}.{j}',
+                    'current_time': j,
+                    'timer_types': [f'type {j % 3}'],
+                }) + '\n'
+                for j in range(100)
+            ),
+            'json_body': False,
+            'content_type': 'application/x-ndjson',
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-stats', lambda ds, i: {
+            'method': 'get',
+            'path': reverse('timer:timer-stats') + '?bucket=day',
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-activity', lambda ds, i: {
+            'method': 'get',
+            'path': reverse('timer:timer-activity'),
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-type-list-create [GET]', lambda ds, i: {
+            'method': 'get',
+            'path': reverse('timer:timer-type-list-create'),
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-type-list-create [POST]', lambda ds, i: {
+            'method': 'post',
+            'path': reverse('timer:timer-type-list-create'),
+            'data': {'name': f'posted {i}'},
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-type-update [PUT]', lambda ds, i: {
+            'method': 'put',
+            'path': reverse(
+                'timer:timer-type-update',
+                args=[ds.spare(i, 'types')],
+            ),
+            'data': {'name': f'renamed {i}'},
+            'token': ds.user(i)['token'],
+        }),
+        ('timer:timer-type-update [DELETE]', lambda ds, i: {
+            'method': 'delete',
+            'path': reverse(
+                'timer:timer-type-update',
+                args=[ds.spare(i, 'types')],
+            ),
+            'token': ds.user(i)['token'],
+        }),
+    ]
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the API against a seeded test DB."""
+
+    help = (
+        'Seed a throwaway test database and report latency percentiles, '
+        'throughput and query counts for every API endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--timers', type=int, default=200,
+                            help='Timers per user.')
+        parser.add_argument('--types', type=int, default=8,
+                            help='Timer types per user.')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Untimed requests per endpoint.')
+        parser.add_argument('--endpoint', action='append', default=[],
+                            help='Only run endpoints containing this text.')
+        parser.add_argument('--output', help='Write the JSON report here.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        selected = [
+            (name, build) for name, build in scenarios()
+            if not options['endpoint'] or any(
+                part in name for part in options['endpoint']
+            )
+        ]
+        iterations = options['warmup'] + options['requests']
+        # Delete scenarios, type renames and token refreshes consume one
+        # row per request.
+        spare = math.ceil(iterations / max(options['users'], 1)) + 1
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(ALLOWED_HOSTS=['testserver'],
+                                      MEDIA_ROOT=media_root,
+                                      TIMER_THROTTLE_RATES={}):
+                report = self.run(selected, options, spare)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'Wrote {options["output"]}')
+
+    def run(self, selected, options, spare):
+        self.stdout.write('Seeding benchmark data...')
+        dataset = Dataset(
+            options['users'],
+            options['timers'],
+            options['types'],
+            spare,
+        )
+        driver = WSGIDriver()
+        results = {}
+        for name, build in selected:
+            self.stdout.write(f'Benchmarking {name}...')
+            for i in range(options['warmup']):
+                driver.request(**build(dataset, i))
+
+            latencies, queries, errors = [], [], 0
+            started = time.perf_counter()
+            for i in range(options['warmup'], options['warmup'] +
+                           options['requests']):
+                kwargs = build(dataset, i)
+                with count_queries() as counter:
+                    begin = time.perf_counter()
+                    status, _ = driver.request(**kwargs)
+                    latencies.append(time.perf_counter() - begin)
+                queries.append(counter[0])
+                if status >= 400:
+                    errors += 1
+            elapsed = time.perf_counter() - started
+            results[name] = summarise(latencies, queries, errors, elapsed)
+
+        return {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'debug': settings.DEBUG,
+                'users': options['users'],
+                'timers_per_user': options['timers'],
+                'types_per_user': options['types'],
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+            },
+            'endpoints': results,
+        }
+
+    def print_report(self, report):
+        header = f'{"endpoint":<52}{"p50":>9}{"p95":>9}{"p99":>9}' \
+                 f'{"rps":>9}{"queries":>9}{"errors":>8}'
+        self.stdout.write(header)
+        for name, row in report['endpoints'].items():
+            self.stdout.write(
+                f'{name:<52}{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}'
+                f'{row["p99_ms"]:>9.2f}{row["throughput_rps"]:>9.1f}'
+                f'{row["queries_per_request"]:>9.2f}{row["errors"]:>8}'
+            )
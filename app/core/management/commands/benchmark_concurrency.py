@@ -0,0 +1,190 @@
+"""
+Django command to compare WSGI workers with ASGI async views under load.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core.benchmark import (
+    ASGIDriver,
+    Dataset,
+    WSGIDriver,
+    simulate_db_latency,
+    summarise,
+)
+from core.management.commands.benchmark_api import scenarios
+
+
+SCENARIOS = ('timer:timer-detail [GET]', 'timer:timer-session-create')
+SERVERS = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    """Django command to benchmark concurrent requests per server mode."""
+
+    help = (
+        'Drive concurrent clients at the timer API with simulated DB '
+        'latency, once through uWSGI-style workers and once through the '
+        'ASGI async views, and compare throughput and latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=SERVERS,
+                            help='Run one mode only; default runs both.')
+        parser.add_argument('--concurrency', type=int, default=32,
+                            help='Concurrent clients.')
+        parser.add_argument('--requests', type=int, default=400,
+                            help='Total timed requests.')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='WSGI workers, as in uwsgi --workers.')
+        parser.add_argument('--db-latency', type=float, default=25.0,
+                            help='Milliseconds added to every query.')
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--timers', type=int, default=50,
+                            help='Timers per user.')
+        parser.add_argument('--output', help='Write the JSON report here.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['server']:
+            result = self.bench(options['server'], options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        report = {
+            'meta': {
+                'concurrency': options['concurrency'],
+                'requests': options['requests'],
+                'db_latency_ms': options['db_latency'],
+                'wsgi_workers': options['workers'],
+                'asgi_threads': settings.ASYNC_VIEW_THREADS,
+            },
+            'servers': {server: self.spawn(server, options)
+                        for server in SERVERS},
+        }
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'Wrote {options["output"]}')
+
+    def spawn(self, server, options):
+        """Run one mode in a fresh process, as URLs are built at import."""
+        self.stdout.write(f'Benchmarking {server}...')
+        args = [
+            sys.executable,
+            os.path.join(settings.BASE_DIR, 'manage.py'),
+            'benchmark_concurrency',
+            '--server', server,
+        ]
+        for name in ('concurrency', 'requests', 'workers', 'db_latency',
+                     'users', 'timers'):
+            args += [f'--{name.replace("_", "-")}', str(options[name])]
+        env = dict(os.environ, ASYNC_VIEWS='1' if server == 'asgi' else '0')
+        proc = subprocess.run(args, env=env, capture_output=True, text=True)
+        if proc.returncode:
+            raise CommandError(f'{server} run failed:\n{proc.stderr}')
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def bench(self, server, options):
+        """Seed a test database and run one mode against it."""
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver'],
+                                   TIMER_THROTTLE_RATES={}):
+                dataset = Dataset(options['users'], options['timers'],
+                                  types=3, spare=0)
+                connection.close()
+                builders = [
+                    build for name, build in scenarios() if name in SCENARIOS
+                ]
+                requests = [
+                    builders[i % len(builders)](dataset, i)
+                    for i in range(options['requests'])
+                ]
+                with simulate_db_latency(options['db_latency'] / 1000) \
+                        as queries:
+                    run = self.run_asgi if server == 'asgi' else \
+                        self.run_wsgi
+                    latencies, errors, elapsed = run(requests, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        return summarise(latencies, [queries[0]], errors, elapsed)
+
+    def run_wsgi(self, requests, options):
+        """Clients on threads queue for a fixed number of workers."""
+        driver = WSGIDriver()
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+
+        def client(workers, batch):
+            for kwargs in batch:
+                begin = time.perf_counter()
+                status, _ = workers.submit(
+                    lambda: driver.request(**kwargs)
+                ).result()
+                with lock:
+                    latencies.append(time.perf_counter() - begin)
+                    errors[0] += status >= 400
+
+        n = options['concurrency']
+        started = time.perf_counter()
+        # Like uWSGI's listen queue, requests wait in FIFO order.
+        with ThreadPoolExecutor(options['workers']) as workers:
+            clients = [
+                threading.Thread(target=client,
+                                 args=(workers, requests[c::n]))
+                for c in range(n)
+            ]
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+        return latencies, errors[0], time.perf_counter() - started
+
+    def run_asgi(self, requests, options):
+        """Clients are coroutines on one event loop in one process."""
+        driver = ASGIDriver()
+        latencies, errors = [], [0]
+
+        async def client(batch):
+            for kwargs in batch:
+                begin = time.perf_counter()
+                status, _ = await driver.request(**kwargs)
+                latencies.append(time.perf_counter() - begin)
+                errors[0] += status >= 400
+
+        async def main():
+            n = options['concurrency']
+            await asyncio.gather(*(client(requests[c::n]) for c in range(n)))
+
+        started = time.perf_counter()
+        asyncio.run(main())
+        return latencies, errors[0], time.perf_counter() - started
+
+    def print_report(self, report):
+        meta = report['meta']
+        self.stdout.write(
+            f'{meta["concurrency"]} clients, {meta["db_latency_ms"]} ms per '
+            f'query; {meta["wsgi_workers"]} WSGI workers vs one ASGI '
+            f'process with {meta["asgi_threads"]} view threads'
+        )
+        self.stdout.write(f'{"server":<8}{"p50":>9}{"p95":>9}{"p99":>9}'
+                          f'{"rps":>9}{"errors":>8}')
+        for server, row in report['servers'].items():
+            self.stdout.write(
+                f'{server:<8}{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}'
+                f'{row["p99_ms"]:>9.2f}{row["throughput_rps"]:>9.1f}'
+                f'{row["errors"]:>8}'
+            )
@@ -0,0 +1,72 @@
+"""
+Django command to bulk import a user's timers from CSV or NDJSON.
+"""
+import os
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from timer import importer
+
+
+class Command(BaseCommand):
+    """Django command to import timers for one user."""
+
+    help = (
+        'Import timers for a user from a CSV or NDJSON file in the format '
+        'of GET /api/timer/export. Nothing is written if any row is '
+        'invalid.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the owning user.')
+        parser.add_argument('path', help="File to read, or '-' for stdin.")
+        parser.add_argument('--format', choices=importer.FORMATS,
+                            help='Defaults to the file extension, or csv.')
+        parser.add_argument('--chunk-size', type=int,
+                            help='Rows validated and written at a time.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+
+        path = options['path']
+        fmt = options['format']
+        if fmt is None:
+            ext = os.path.splitext(path)[1].lstrip('.')
+            fmt = ext if ext in importer.FORMATS else 'csv'
+
+        started = time.perf_counter()
+
+        def progress(count):
+            rate = count / (time.perf_counter() - started)
+            self.stdout.write(f'Imported {count} rows ({rate:.0f} rows/s)')
+
+        stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        try:
+            result = importer.run(
+                user,
+                stream,
+                fmt,
+                progress=progress,
+                chunk_size=options['chunk_size'],
+            )
+        except importer.InvalidImport as exc:
+            for error in exc.errors:
+                self.stderr.write(f'Row {error["row"]}: {error["errors"]}')
+            raise CommandError('Import failed; nothing was written.')
+        except UnicodeDecodeError:
+            raise CommandError('The file must be UTF-8.')
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.imported} timers in {result.seconds:.2f} s '
+            f'({result.imported / result.seconds:.0f} rows/s)'
+        ))
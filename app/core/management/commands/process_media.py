@@ -0,0 +1,36 @@
+"""
+Django command to process queued timer image uploads.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from timer import media
+
+
+class Command(BaseCommand):
+    """Django command to run the timer media worker."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue and exit instead of polling.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep when the queue is empty.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.stdout.write('Processing media jobs...')
+        while True:
+            processed = media.process_pending()
+            if processed:
+                self.stdout.write(f'Processed {processed} job(s).')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
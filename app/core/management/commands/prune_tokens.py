@@ -0,0 +1,30 @@
+"""
+Django command to delete expired access and refresh tokens.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from user import tokens
+
+
+class Command(BaseCommand):
+    """Django command to prune expired tokens."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep running, pruning every this many seconds.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        while True:
+            access, refresh = tokens.prune()
+            self.stdout.write(
+                f'Deleted {access} access and {refresh} refresh token(s).'
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -3,13 +3,22 @@ Django command to wait for the database to be available.
 """
 import time
 from psycopg2 import OperationalError as Psycopg2OpError
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, connections)
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     """Django command to wait for database."""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--probe', type=int, default=0, metavar='N',
+            help='Then open N fresh connections through the configured '
+                 'host or pool and report connect and query latency.',
+        )
+
     def handle(self, *args, **options):
         """Entrypoint for command."""
         self.stdout.write('Waiting for database...')
@@ -23,3 +32,41 @@ class Command(BaseCommand):
                 time.sleep(1)
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
+        if options['probe']:
+            self.probe(options['probe'])
+
+    def probe(self, count):
+        """Time fresh connections and queries on new and reused ones."""
+        connect, first, reused = [], [], []
+        for _ in range(count):
+            conn = connections.create_connection(DEFAULT_DB_ALIAS)
+            try:
+                start = time.perf_counter()
+                conn.ensure_connection()
+                connect.append(time.perf_counter() - start)
+                with conn.cursor() as cursor:
+                    for timings in (first, reused):
+                        start = time.perf_counter()
+                        cursor.execute('SELECT 1')
+                        cursor.fetchone()
+                        timings.append(time.perf_counter() - start)
+            except (Psycopg2OpError, OperationalError) as exc:
+                raise CommandError(f'Connection probe failed: {exc}')
+            finally:
+                conn.close()
+
+        db = settings.DATABASES[DEFAULT_DB_ALIAS]
+        pool = settings.DB_POOL or 'none'
+        self.stdout.write(
+            f'Pool: {pool}; persistent connections: '
+            f'CONN_MAX_AGE={db["CONN_MAX_AGE"]}, '
+            f'health checks {"on" if db["CONN_HEALTH_CHECKS"] else "off"}'
+        )
+        for label, timings in (('connect', connect),
+                               ('first query', first),
+                               ('reused query', reused)):
+            ms = [t * 1000 for t in timings]
+            self.stdout.write(
+                f'{label}: avg {sum(ms) / len(ms):.2f} ms, '
+                f'min {min(ms):.2f} ms, max {max(ms):.2f} ms over {len(ms)}'
+            )
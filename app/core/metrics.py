@@ -0,0 +1,205 @@
+"""
+In-process request metrics rendered in the Prometheus text format.
+
+Each worker process keeps its own registry, so every scrape reports the
+worker that served it; the counters are monotonic and safe to sum.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import (ExitStack, contextmanager)
+from contextvars import ContextVar
+
+from django.db import connections
+
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_spans = ContextVar('metrics_spans', default=None)
+
+
+class Registry:
+    """Thread-safe counters and histograms keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._collectors = []
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [
+                    [0] * len(DURATION_BUCKETS), 0.0, 0
+                ]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    hist[0][i] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def register_collector(self, collector):
+        """Add a callable yielding (name, labels, value) at scrape time."""
+        self._collectors.append(collector)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        body = ','.join(
+            '{}="{}"'.format(k, str(v).replace('\\', '\\\\')
+                             .replace('"', '\\"'))
+            for k, v in labels
+        )
+        return '{' + body + '}'
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        samples = defaultdict(list)
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                samples[name].append(f'{name}{self._labels(labels)} {value}')
+            for (name, labels), hist in self._histograms.items():
+                buckets, total, count = hist
+                for bound, n in zip(DURATION_BUCKETS, buckets):
+                    le = labels + (('le', bound),)
+                    samples[name].append(
+                        f'{name}_bucket{self._labels(le)} {n}'
+                    )
+                inf = self._labels(labels + (('le', '+Inf'),))
+                plain = self._labels(labels)
+                samples[name].append(f'{name}_bucket{inf} {count}')
+                samples[name].append(f'{name}_sum{plain} {total}')
+                samples[name].append(f'{name}_count{plain} {count}')
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                labels = tuple(sorted(labels.items()))
+                samples[name].append(f'{name}{self._labels(labels)} {value}')
+
+        lines = []
+        for name in sorted(samples):
+            if name in self._help:
+                kind, text = self._help[name]
+                lines.append(f'# HELP {name} {text}')
+                lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples[name])
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+registry.describe(
+    'http_requests_total', 'counter', 'Requests served.')
+registry.describe(
+    'http_request_duration_seconds', 'histogram', 'Wall time per request.')
+registry.describe(
+    'http_response_size_bytes_total', 'counter', 'Response body bytes.')
+registry.describe(
+    'http_requests_sampled_total', 'counter',
+    'Requests with DB and serializer timings recorded.')
+registry.describe(
+    'http_request_db_queries_total', 'counter',
+    'DB queries run by sampled requests.')
+registry.describe(
+    'http_request_db_duration_seconds_total', 'counter',
+    'DB time spent by sampled requests.')
+registry.describe(
+    'http_request_serialize_duration_seconds_total', 'counter',
+    'Serializer and rendering time spent by sampled requests.')
+registry.describe(
+    'timer_event_streams', 'gauge', 'Open live timer event streams.')
+registry.describe(
+    'db_connections_opened_total', 'counter',
+    'Database connections opened.')
+registry.describe(
+    'db_connect_duration_seconds', 'histogram',
+    'Time to open a database connection.')
+registry.describe(
+    'db_health_check_failures_total', 'counter',
+    'Persistent connections found dead and replaced.')
+registry.describe(
+    'db_replica_requests_total', 'counter',
+    'Requests whose reads were served by a read replica.')
+registry.describe(
+    'http_requests_throttled_total', 'counter',
+    'Requests refused with 429 by a token bucket.')
+registry.describe(
+    'timer_noop_writes_total', 'counter',
+    'Timer updates answered without writing, by reason.')
+
+
+@contextmanager
+def collect_spans():
+    """Collect span timings for the current request."""
+    spans = defaultdict(float)
+    token = _spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _spans.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the current request's span."""
+    spans = _spans.get()
+    if spans is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans[name] += time.perf_counter() - start
+
+
+class _QueryTimer:
+    """Execute wrapper adding query count and time to a span dict."""
+
+    def __init__(self, spans):
+        self.spans = spans
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.spans['db'] += time.perf_counter() - start
+            self.spans['db_queries'] += 1
+
+
+@contextmanager
+def track_queries():
+    """Time queries on this thread's connections into the current spans.
+
+    Connections are per thread, so code running a request on another
+    thread enters this there too.
+    """
+    spans = _spans.get()
+    if spans is None:
+        yield
+        return
+    timer = _QueryTimer(spans)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        yield
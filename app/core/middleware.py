@@ -0,0 +1,171 @@
+"""
+Middleware shared by every app.
+"""
+import asyncio
+import random
+import time
+
+from django.conf import settings
+
+from core import (db_router, metrics)
+from user.authentication import token_cache
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class PerformanceMiddleware:
+    """Record wall, DB and serializer time and size for each request.
+
+    Wall time, status and response size are recorded for every request;
+    DB and serializer timings only for the ``METRICS_SAMPLE_RATE``
+    fraction, which also get a ``Server-Timing`` header. Works under both
+    WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, as Django's
+            # MiddlewareMixin does, so the handler awaits it.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        if not self.sampled():
+            response = self.get_response(request)
+            self.record(request, response, time.perf_counter() - start)
+            return response
+
+        with metrics.collect_spans() as spans, metrics.track_queries():
+            response = self.get_response(request)
+        return self.finish(request, response, spans, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        if not self.sampled():
+            response = await self.get_response(request)
+            self.record(request, response, time.perf_counter() - start)
+            return response
+
+        # Async views track their queries on the threads that run them.
+        with metrics.collect_spans() as spans:
+            response = await self.get_response(request)
+        return self.finish(request, response, spans, start)
+
+    def sampled(self):
+        return random.random() < settings.METRICS_SAMPLE_RATE
+
+    def finish(self, request, response, spans, start):
+        """Record a sampled request's timings and add Server-Timing."""
+        duration = time.perf_counter() - start
+        route = self.record(request, response, duration)
+        queries = int(spans['db_queries'])
+
+        registry = metrics.registry
+        registry.inc('http_requests_sampled_total', route=route)
+        registry.inc('http_request_db_queries_total', queries, route=route)
+        registry.inc('http_request_db_duration_seconds_total', spans['db'],
+                     route=route)
+        registry.inc('http_request_serialize_duration_seconds_total',
+                     spans['serialize'], route=route)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={spans["db"] * 1000:.2f};desc="{queries} queries"',
+            f'serialize;dur={spans["serialize"] * 1000:.2f}',
+            f'total;dur={duration * 1000:.2f}',
+        ])
+        return response
+
+    def process_template_response(self, request, response):
+        """Time DRF's rendering of the serialized data to bytes."""
+        span = metrics.span('serialize')
+        render = response.render
+
+        def timed_render():
+            with span:
+                return render()
+
+        response.render = timed_render
+        return response
+
+    def record(self, request, response, duration):
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else 'unmatched'
+        registry = metrics.registry
+        registry.inc(
+            'http_requests_total',
+            route=route,
+            method=request.method,
+            status=f'{response.status_code // 100}xx',
+        )
+        registry.observe('http_request_duration_seconds', duration,
+                         route=route)
+        if not response.streaming:
+            registry.inc('http_response_size_bytes_total',
+                         len(response.content), route=route)
+        return route
+
+
+class ReplicaRoutingMiddleware:
+    """Serve safe requests from read replicas when any are configured.
+
+    A request goes to the primary if its user wrote recently, or if the
+    token it presents is not cached yet and so its user is unknown.
+    Unsafe requests pin their user to the primary afterwards. Place it
+    after AuthenticationMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            self.pin(request)
+            return response
+        if not self.use_replica(request):
+            return self.get_response(request)
+        with db_router.use_replica():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            response = await self.get_response(request)
+            self.pin(request)
+            return response
+        if not self.use_replica(request):
+            return await self.get_response(request)
+        with db_router.use_replica():
+            return await self.get_response(request)
+
+    @staticmethod
+    def use_replica(request):
+        header = request.META.get('HTTP_AUTHORIZATION', '').split()
+        if len(header) == 2 and header[0] == 'Token':
+            user_id = token_cache.user_id(header[1])
+            return user_id is not None and not db_router.is_pinned(user_id)
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return True
+        return not db_router.is_pinned(user.pk)
+
+    @staticmethod
+    def pin(request):
+        # DRF sets the user it authenticated on the Django request too.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            db_router.pin(user.pk)
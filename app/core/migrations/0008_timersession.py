@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_timer_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimerSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('duration', models.PositiveIntegerField()),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('timer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.timer')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
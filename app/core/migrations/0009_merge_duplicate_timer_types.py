@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:27
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_timer_types(apps, schema_editor):
+    """Fold same-named types of a user into the oldest one."""
+    Timer = apps.get_model('core', 'Timer')
+    TimerType = apps.get_model('core', 'TimerType')
+    Through = Timer.timer_type.through
+
+    duplicates = (TimerType.objects
+                  .values('user_id', 'name')
+                  .annotate(count=Count('id'), keep_id=Min('id'))
+                  .filter(count__gt=1))
+    for dup in duplicates:
+        keep_id = dup['keep_id']
+        drop_ids = list(
+            TimerType.objects
+            .filter(user_id=dup['user_id'], name=dup['name'])
+            .exclude(id=keep_id)
+            .values_list('id', flat=True)
+        )
+        linked = set(
+            Through.objects
+            .filter(timertype_id__in=drop_ids)
+            .values_list('timer_id', flat=True)
+        )
+        linked -= set(
+            Through.objects
+            .filter(timertype_id=keep_id)
+            .values_list('timer_id', flat=True)
+        )
+        Through.objects.bulk_create([
+            Through(timer_id=timer_id, timertype_id=keep_id)
+            for timer_id in linked
+        ])
+        TimerType.objects.filter(id__in=drop_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_timersession'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_timer_types,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Separate from the merge: Postgres can't alter a table with FK
+    # triggers still pending from the deletes in the same transaction.
+    dependencies = [
+        ('core', '0009_merge_duplicate_timer_types'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='timertype',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_timer_type_name_per_user'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def enqueue_existing_images(apps, schema_editor):
+    """Queue variant generation for images uploaded before the queue."""
+    Timer = apps.get_model('core', 'Timer')
+    MediaJob = apps.get_model('core', 'MediaJob')
+    timers = Timer.objects.exclude(image='').exclude(image__isnull=True)
+    MediaJob.objects.bulk_create([
+        MediaJob(timer_id=timer_id, source=image)
+        for timer_id, image in timers.values_list('id', 'image')
+    ])
+    timers.update(image_status='processing')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_timertype_unique_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timer',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], max_length=16),
+        ),
+        migrations.AddField(
+            model_name='timer',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('timer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.timer')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='mediajob',
+            index=models.Index(fields=['status', 'id'], name='core_mediaj_status_d7e2e2_idx'),
+        ),
+        migrations.RunPython(
+            enqueue_existing_images,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_mediajob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.user')),
+                ('timer_count', models.IntegerField(default=0)),
+                ('total_time', models.BigIntegerField(default=0)),
+                ('total_goal', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TimerTypeStats',
+            fields=[
+                ('timer_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.timertype')),
+                ('timer_count', models.IntegerField(default=0)),
+                ('total_time', models.BigIntegerField(default=0)),
+                ('total_goal', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timer',
+            index=models.Index(fields=['user', 'id'], name='timer_user_id_idx'),
+        ),
+        # The auto-created through table only has a (timer_id, timertype_id)
+        # unique index; joins coming from the type side need the reverse.
+        migrations.RunSQL(
+            'CREATE INDEX timer_type_link_type_timer_idx '
+            'ON core_timer_timer_type (timertype_id, timer_id);',
+            'DROP INDEX timer_type_link_type_timer_idx;',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_change_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timer',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:13
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+CREATE_SEARCH = [
+    """
+    CREATE FUNCTION core_timer_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')),
+                      'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    # Covers every write path, including bulk_update and COPY.
+    """
+    CREATE TRIGGER core_timer_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, description, search_vector
+    ON core_timer
+    FOR EACH ROW EXECUTE FUNCTION core_timer_search_vector();
+    """,
+    'UPDATE core_timer SET search_vector = NULL;',
+    'CREATE INDEX timer_search_vector_idx '
+    'ON core_timer USING gin (search_vector);',
+]
+
+# Serves title ILIKE '%...%' for partial words. pg_trgm ships with
+# PostgreSQL's contrib modules, which some builds leave out.
+CREATE_TRIGRAM = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm;',
+    'CREATE INDEX timer_title_trgm_idx '
+    'ON core_timer USING gin (title gin_trgm_ops);',
+]
+
+DROP_SEARCH = [
+    'DROP INDEX IF EXISTS timer_title_trgm_idx;',
+    'DROP INDEX timer_search_vector_idx;',
+    'DROP TRIGGER core_timer_search_vector_update ON core_timer;',
+    'DROP FUNCTION core_timer_search_vector();',
+]
+
+
+def _has_trigram(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        return cursor.fetchone() is not None
+
+
+def create_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        # Other databases search with icontains.
+        return
+    statements = CREATE_SEARCH
+    if _has_trigram(schema_editor.connection):
+        statements = statements + CREATE_TRIGRAM
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in DROP_SEARCH:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_timer_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timer',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search, drop_search),
+    ]
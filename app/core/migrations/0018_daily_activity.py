@@ -0,0 +1,48 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+from django.db.models.functions import (Coalesce, TruncDate)
+
+
+def backfill(apps, schema_editor):
+    # Sessions are the only dated history kept so far; each counts
+    # towards the day it started.
+    TimerSession = apps.get_model('core', 'TimerSession')
+    DailyActivity = apps.get_model('core', 'DailyActivity')
+    rows = (TimerSession.objects
+            .annotate(day=TruncDate(Coalesce('started_at', 'created_at')))
+            .values('user_id', 'timer_id', 'day')
+            .annotate(seconds=Sum('duration'))
+            .order_by())
+    DailyActivity.objects.bulk_create(
+        (DailyActivity(**row) for row in rows.iterator()),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_auth_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('seconds', models.BigIntegerField(default=0)),
+                ('timer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.timer')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyactivity',
+            constraint=models.UniqueConstraint(fields=('user', 'day', 'timer'), name='unique_daily_activity'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:02
+
+from django.db import migrations
+
+
+# On PostgreSQL icontains compiles to UPPER("title"::text) LIKE UPPER(%s),
+# which the trigram index on the bare title from 0016 cannot serve.
+CREATE_UPPER = [
+    'DROP INDEX IF EXISTS timer_title_trgm_idx;',
+    'CREATE INDEX timer_title_upper_trgm_idx '
+    'ON core_timer USING gin (UPPER(title) gin_trgm_ops);',
+]
+
+CREATE_PLAIN = [
+    'DROP INDEX IF EXISTS timer_title_upper_trgm_idx;',
+    'CREATE INDEX timer_title_trgm_idx '
+    'ON core_timer USING gin (title gin_trgm_ops);',
+]
+
+
+def _has_trigram(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        if not _has_trigram(schema_editor.connection):
+            # 0016 skipped the index where pg_trgm is not available.
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_daily_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE_UPPER), _run(CREATE_PLAIN)),
+    ]
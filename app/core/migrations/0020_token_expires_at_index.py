@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_timer_title_upper_trgm'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='accesstoken',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='refreshtoken',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
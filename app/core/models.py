@@ -3,6 +3,8 @@ import os
 
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -47,6 +49,47 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+IMAGE_STATUS_CHOICES = [
+    ('processing', 'Processing'),
+    ('ready', 'Ready'),
+    ('failed', 'Failed'),
+]
+
+
+def elapsed_since(started_at, now=None):
+    """Whole seconds run since started_at, or 0 if it is None."""
+    if started_at is None:
+        return 0
+    seconds = ((now or timezone.now()) - started_at).total_seconds()
+    return max(int(seconds), 0)
+
+
+class TimerQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """Timers owned by user, with their types prefetched by id."""
+        return self.filter(user=user).prefetch_related(models.Prefetch(
+            'timer_type',
+            queryset=TimerType.objects.order_by('id'),
+        ))
+
+    def bulk_create_with_ids(self, timers):
+        """bulk_create new timers of one user and change_seq, with ids.
+
+        Where the backend can't return ids from a bulk insert, they are
+        read back: the caller holds the user's change counter, so the
+        newest rows at that change_seq are these.
+        """
+        timers = self.bulk_create(timers)
+        if timers and timers[0].pk is None:
+            ids = (self.filter(user_id=timers[0].user_id,
+                               change_seq=timers[0].change_seq)
+                   .order_by('-id')
+                   .values_list('id', flat=True)[:len(timers)])
+            for timer, pk in zip(timers, reversed(list(ids))):
+                timer.pk = pk
+        return timers
+
+
 class Timer(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -59,10 +102,36 @@ class Timer(models.Model):
     goal = models.IntegerField(default=0)
     timer_type = models.ManyToManyField('TimerType')
     image = models.ImageField(null=True, upload_to=timer_image_file_path)
+    image_status = models.CharField(
+        max_length=16,
+        choices=IMAGE_STATUS_CHOICES,
+        blank=True,
+    )
+    image_variants = models.JSONField(default=dict, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(default=0)
+    # Maintained from title and description by a database trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TimerQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='timer_user_id_idx'),
+            models.Index(
+                fields=['user', 'change_seq'],
+                name='timer_user_change_seq_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def elapsed(self, now=None):
+        """Whole seconds run since started_at, or 0 when stopped."""
+        return elapsed_since(self.started_at, now)
+
 
 class TimerType(models.Model):
     name = models.CharField(max_length=255)
@@ -70,6 +139,208 @@ class TimerType(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_timer_type_name_per_user',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'change_seq'],
+                name='type_user_change_seq_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class TimerSession(models.Model):
+    """Append-only log of time spent on a timer."""
+    timer = models.ForeignKey(Timer, on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    duration = models.PositiveIntegerField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.timer_id}: {self.duration}'
+
+
+class MediaJob(models.Model):
+    """DB-backed queue entry for processing an uploaded timer image."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    timer = models.ForeignKey(Timer, on_delete=models.CASCADE)
+    source = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.source} ({self.status})'
+
+
+class UserStats(models.Model):
+    """Running totals over all of a user's timers."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    timer_count = models.IntegerField(default=0)
+    total_time = models.BigIntegerField(default=0)
+    total_goal = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.total_time}'
+
+
+class TimerTypeStats(models.Model):
+    """Running totals over the timers linked to one TimerType."""
+    timer_type = models.OneToOneField(
+        TimerType,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    timer_count = models.IntegerField(default=0)
+    total_time = models.BigIntegerField(default=0)
+    total_goal = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.timer_type_id}: {self.total_time}'
+
+
+class DailyActivity(models.Model):
+    """Seconds added to one timer on one day."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    timer = models.ForeignKey(Timer, on_delete=models.CASCADE)
+    day = models.DateField()
+    seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Leading (user, day) also serves the activity range scan.
+            models.UniqueConstraint(
+                fields=['user', 'day', 'timer'],
+                name='unique_daily_activity',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.timer_id} {self.day}: {self.seconds}'
+
+
+class ChangeSequence(models.Model):
+    """Last change number handed out for a user's timers and types."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.value}'
+
+
+class Tombstone(models.Model):
+    """Record of a deleted timer or type, kept for delta sync."""
+    TIMER = 'timer'
+    TIMER_TYPE = 'timer_type'
+    KIND_CHOICES = [
+        (TIMER, 'Timer'),
+        (TIMER_TYPE, 'Timer type'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'change_seq'],
+                name='tombstone_user_change_seq_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class AccessToken(models.Model):
+    """Short-lived API key issued together with a refresh token."""
+    key = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    family = models.UUIDField(db_index=True)
+    # Indexed for prune_tokens.
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.expires_at}'
+
+
+class RefreshToken(models.Model):
+    """Single-use key exchanged for a new access and refresh token.
+
+    Only a SHA-256 digest of the key is stored. Tokens issued from one
+    login share a family, which is revoked as a whole.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    family = models.UUIDField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Indexed for prune_tokens.
+    expires_at = models.DateTimeField(db_index=True)
+    used_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.family}'
@@ -0,0 +1,57 @@
+"""
+Serializer helpers shared by every app.
+"""
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+
+def _split(value):
+    return {part.strip() for part in (value or '').split(',') if part.strip()}
+
+
+class DynamicFieldsMixin:
+    """Sparse fieldsets for the top-level serializer of a request.
+
+    ``?fields=a,b`` limits the response to the named fields and
+    ``?expand=x`` opts into the costly fields listed in
+    ``expandable_fields``, which are left out by default. Fields that a
+    write could still need are kept for validation and only dropped from
+    the response.
+    """
+    expandable_fields = ()
+
+    def _is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def _requested(self):
+        request = self.context.get('request')
+        if request is None or not self._is_top_level():
+            return None, set()
+        params = request.query_params
+        only = _split(params.get('fields')) or None
+        return only, _split(params.get('expand'))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only, expand = self._requested()
+        request = self.context.get('request')
+        safe = request is None or request.method in SAFE_METHODS
+        for name in list(fields):
+            if name in self.expandable_fields and name not in expand:
+                del fields[name]
+            elif only is not None and name not in only | expand and (
+                    safe or fields[name].read_only):
+                del fields[name]
+        return fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        only, expand = self._requested()
+        if only is not None:
+            for name in list(data):
+                if name not in only | expand:
+                    del data[name]
+        return data
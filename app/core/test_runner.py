@@ -0,0 +1,28 @@
+"""
+Test runner that drops test databases still held by pool threads.
+"""
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner that ends other sessions before teardown."""
+
+    def teardown_databases(self, old_config, **kwargs):
+        # View and stream pool threads keep their CONN_MAX_AGE connections
+        # open, and PostgreSQL will not drop a database in use. Replicas
+        # mirror default under test, so only default ends sessions.
+        for conn in connections.all():
+            conn.close()
+        for conn in connections.all():
+            if conn.vendor != 'postgresql' or \
+                    conn.settings_dict['TEST']['MIRROR']:
+                continue
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    'SELECT pg_terminate_backend(pid) '
+                    'FROM pg_stat_activity '
+                    'WHERE datname = current_database() '
+                    'AND pid <> pg_backend_pid()'
+                )
+        super().teardown_databases(old_config, **kwargs)
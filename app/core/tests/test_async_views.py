@@ -0,0 +1,119 @@
+"""
+Tests for serving views asynchronously on the bounded thread pool.
+"""
+import asyncio
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import (TransactionTestCase, override_settings)
+from django.urls import path
+
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import metrics
+from core.async_views import as_async_view
+from core.benchmark import (ASGIDriver, simulate_db_latency)
+from core.models import Timer
+from timer.views import (TimerDetailAPIView, TimerExportAPIView)
+from user.authentication import token_cache
+
+
+class SlowView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        time.sleep(0.2)
+        return Response({'thread': threading.current_thread().name})
+
+
+urlpatterns = [
+    path('timers/<int:pk>', as_async_view(TimerDetailAPIView)),
+    path('slow', as_async_view(SlowView)),
+    path('export', as_async_view(TimerExportAPIView)),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=['testserver'])
+class AsyncViewTests(TransactionTestCase):
+    """Test DRF views served through the ASGI app and view pool."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.token = Token.objects.create(user=self.user).key
+        self.timer = Timer.objects.create(user=self.user, title='Piano')
+        self.driver = ASGIDriver()
+
+    def test_async_view_keeps_view_attributes(self):
+        """Test the wrapper is a coroutine view that schema tools see."""
+        view = as_async_view(TimerDetailAPIView)
+
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertIs(view.cls, TimerDetailAPIView)
+        self.assertTrue(view.csrf_exempt)
+
+    @override_settings(METRICS_SAMPLE_RATE=1.0)
+    def test_timer_detail_through_asgi(self):
+        """Test a timer is served and its pool-thread queries timed."""
+        metrics.registry.clear()
+
+        status, body = asyncio.run(self.driver.request(
+            'get',
+            f'/timers/{self.timer.id}',
+            token=self.token,
+        ))
+
+        self.assertEqual(status, 200)
+        self.assertIn(b'"title":"Piano"', body)
+        queries = [
+            float(line.rsplit(' ', 1)[1])
+            for line in metrics.registry.render().splitlines()
+            if line.startswith('http_request_db_queries_total{')
+        ]
+        self.assertEqual(queries, [3.0])
+
+    def test_requests_run_concurrently_on_pool(self):
+        """Test slow requests overlap instead of queueing."""
+        async def burst():
+            return await asyncio.gather(*(
+                self.driver.request('get', '/slow') for _ in range(5)
+            ))
+
+        start = time.perf_counter()
+        results = asyncio.run(burst())
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([status for status, _ in results], [200] * 5)
+        self.assertTrue(all(b'async-view' in body for _, body in results))
+        self.assertLess(elapsed, 0.5)
+
+    def test_simulated_latency_applies_on_pool_threads(self):
+        """Test the benchmark latency hook reaches pool connections."""
+        with simulate_db_latency(0) as queries:
+            status, _ = asyncio.run(self.driver.request(
+                'get',
+                f'/timers/{self.timer.id}',
+                token=self.token,
+            ))
+
+        self.assertEqual(status, 200)
+        self.assertGreaterEqual(queries[0], 2)
+
+    def test_streaming_response_read_on_pool(self):
+        """Test streamed bodies that query lazily still work under ASGI."""
+        status, body = asyncio.run(self.driver.request(
+            'get',
+            '/export?format=ndjson',
+            token=self.token,
+        ))
+
+        self.assertEqual(status, 200)
+        self.assertIn(b'"title":"Piano"', body)
@@ -0,0 +1,58 @@
+"""
+Tests for the API benchmark helpers.
+"""
+from django.core.signals import (request_finished, request_started)
+from django.db import close_old_connections
+from django.test import (SimpleTestCase, TestCase, override_settings)
+from django.urls import reverse
+
+from core.benchmark import (Dataset, WSGIDriver, percentile, summarise)
+
+
+class PercentileTests(SimpleTestCase):
+    """Test latency summaries."""
+
+    def test_nearest_rank_percentile(self):
+        """Test percentiles use the nearest-rank method."""
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 99), 3)
+
+    def test_summarise(self):
+        """Test a report entry is built from raw samples."""
+        row = summarise([0.001, 0.002, 0.003], [2, 2, 5], 1, 0.5)
+
+        self.assertEqual(row['requests'], 3)
+        self.assertEqual(row['errors'], 1)
+        self.assertEqual(row['p50_ms'], 2.0)
+        self.assertEqual(row['throughput_rps'], 6.0)
+        self.assertEqual(row['queries_per_request'], 3.0)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class WSGIDriverTests(TestCase):
+    """Test requests are driven through the WSGI application."""
+
+    def setUp(self):
+        # As the test client does, keep the handler from closing the
+        # connection that holds the test transaction.
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+    def test_seeded_user_can_list_timers(self):
+        """Test the driver authenticates as a seeded user."""
+        dataset = Dataset(users=2, timers=3, types=2, spare=1)
+        driver = WSGIDriver()
+
+        status, body = driver.request(
+            'get',
+            reverse('timer:timer-detail', args=[dataset.timer(1)]),
+            token=dataset.user(1)['token'],
+        )
+
+        self.assertEqual(status, 200)
+        self.assertIn(b'"title"', body)
@@ -2,13 +2,23 @@
 """
 Test custom Django management commands.
 """
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import (SimpleTestCase, TestCase)
+from django.utils import timezone
+
+from core.models import (AccessToken, RefreshToken, Timer)
+from user import tokens
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -33,3 +43,97 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class WaitForDbProbeTests(TestCase):
+    """Test probing connection latency once the database is up."""
+
+    def test_probe_reports_latency(self):
+        """Test each probe connects, queries and is reported."""
+        out = StringIO()
+
+        call_command('wait_for_db', probe=2, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('Database available!', output)
+        self.assertIn('persistent connections', output)
+        for label in ('connect', 'first query', 'reused query'):
+            self.assertIn(f'{label}: avg', output)
+        self.assertIn('over 2', output)
+
+    @patch('django.db.backends.base.base.BaseDatabaseWrapper'
+           '.ensure_connection')
+    def test_probe_failure_is_an_error(self, patched_connect):
+        """Test a probe that cannot connect fails the command."""
+        patched_connect.side_effect = OperationalError('refused')
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', probe=1, stdout=StringIO())
+
+
+class ImportTimersCommandTests(TestCase):
+    """Test the bulk import command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+
+    def test_import_file(self):
+        """Test importing a file reports progress per chunk."""
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as f:
+            for i in range(5):
+                f.write(json.dumps({'title': f'Timer {i}'}) + '\n')
+            f.flush()
+            out = StringIO()
+
+            call_command('import_timers', self.user.email, f.name,
+                         chunk_size=2, stdout=out)
+
+        self.assertEqual(Timer.objects.filter(user=self.user).count(), 5)
+        output = out.getvalue()
+        self.assertEqual(output.count('Imported 2 rows'), 1)
+        self.assertIn('Imported 4 rows', output)
+        self.assertIn('Imported 5 timers', output)
+
+    def test_invalid_file(self):
+        """Test an invalid file fails without writing."""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as f:
+            f.write('title\nOk\n\n,\n')
+            f.flush()
+
+            with self.assertRaises(CommandError):
+                call_command('import_timers', self.user.email, f.name,
+                             stdout=StringIO(), stderr=StringIO())
+
+        self.assertFalse(Timer.objects.exists())
+
+    def test_unknown_user(self):
+        """Test importing for a missing user fails."""
+        with self.assertRaises(CommandError):
+            call_command('import_timers', 'nobody@example.com', '-')
+
+
+class PruneTokensCommandTests(TestCase):
+    """Test deleting expired tokens."""
+
+    def test_prune_expired_tokens(self):
+        """Test only tokens past their expiry are deleted."""
+        user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        tokens.issue(user, now=timezone.now() - timedelta(days=60))
+        current = tokens.issue(user)
+        out = StringIO()
+
+        call_command('prune_tokens', stdout=out)
+
+        self.assertIn('Deleted 1 access and 1 refresh token(s).',
+                      out.getvalue())
+        self.assertEqual(
+            list(AccessToken.objects.values_list('key', flat=True)),
+            [current.token],
+        )
+        self.assertEqual(RefreshToken.objects.count(), 1)
@@ -0,0 +1,104 @@
+"""
+Tests for persistent connection health checks and warm-up.
+"""
+from unittest import (skipIf, skipUnless)
+from unittest.mock import patch
+
+from django.db import (close_old_connections, connection, transaction)
+from django.test import TransactionTestCase
+
+from core import metrics
+from core.db import warm_up
+
+
+class PersistentConnectionTests(TransactionTestCase):
+    """Test reusing connections across requests."""
+
+    def setUp(self):
+        patcher = patch.dict(connection.settings_dict, {
+            'CONN_MAX_AGE': 60,
+            'CONN_HEALTH_CHECKS': True,
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+
+    def query(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            return cursor.fetchone()[0]
+
+    def drop_connection(self):
+        """Kill the backend from a second connection, as a restart would."""
+        with connection.connection.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            pid = cursor.fetchone()[0]
+        other = connection.copy()
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+        finally:
+            other.close()
+
+    @skipUnless(connection.vendor == 'postgresql', 'PostgreSQL backend only')
+    def test_connection_reused_across_requests(self):
+        """Test the next request keeps the connection, checked once."""
+        self.query()
+        raw = connection.connection
+
+        close_old_connections()
+        with patch.object(connection, 'is_usable',
+                          wraps=connection.is_usable) as is_usable:
+            self.query()
+            self.query()
+
+        self.assertIs(connection.connection, raw)
+        is_usable.assert_called_once()
+
+    @skipUnless(connection.vendor == 'postgresql', 'PostgreSQL backend only')
+    def test_dropped_connection_replaced(self):
+        """Test a connection the server closed is replaced, not used."""
+        metrics.registry.clear()
+        self.query()
+        raw = connection.connection
+        self.drop_connection()
+
+        close_old_connections()
+
+        self.assertEqual(self.query(), 1)
+        self.assertIsNot(connection.connection, raw)
+        self.assertIn('db_health_check_failures_total',
+                      metrics.registry.render())
+
+    @skipUnless(connection.vendor == 'postgresql', 'PostgreSQL backend only')
+    def test_dropped_connection_replaced_before_transaction(self):
+        """Test a request starting with a transaction gets a live one."""
+        self.query()
+        raw = connection.connection
+        self.drop_connection()
+
+        close_old_connections()
+        with transaction.atomic():
+            self.assertEqual(self.query(), 1)
+            # Still in the transaction, not autocommitting on a new one.
+            self.assertFalse(connection.get_autocommit())
+            self.assertIsNot(connection.connection, raw)
+
+    def test_warm_up_opens_connection(self):
+        """Test warm-up connects ahead of the first request."""
+        connection.close()
+
+        warm_up()
+
+        self.assertIsNotNone(connection.connection)
+
+    @skipIf(connection.vendor == 'sqlite',
+            'the in-memory SQLite test database is never closed')
+    def test_warm_up_skipped_without_persistent_connections(self):
+        """Test warm-up does nothing when each request reconnects."""
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+
+        warm_up()
+
+        self.assertIsNone(connection.connection)
@@ -0,0 +1,148 @@
+"""
+Tests for routing reads to replicas.
+"""
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import (connections, router, transaction)
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import db_router
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Timer
+from timer.cache import bump_version
+from user.authentication import token_cache
+
+
+@override_settings(DATABASE_REPLICAS=['replica0'])
+class ReplicaRoutingTests(SimpleTestCase):
+    """Test which database the reads of a request go to."""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.factory = RequestFactory()
+        self.user = get_user_model()(pk=1, email='user@example.com')
+        token_cache.set('cached', self.user)
+
+    def read_database(self, method='get', token=None, user=None):
+        """Run a request and return where the view's reads went."""
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Timer))
+            if user is not None:
+                request.user = user
+            return HttpResponse()
+
+        extra = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        request = getattr(self.factory, method)('/api/timer/', **extra)
+        ReplicaRoutingMiddleware(view)(request)
+        return seen[0]
+
+    def test_safe_requests_read_from_replica(self):
+        """Test known users' and anonymous reads go to a replica."""
+        self.assertEqual(self.read_database(token='cached'), 'replica0')
+        self.assertEqual(self.read_database(), 'replica0')
+        self.assertEqual(router.db_for_read(Timer), 'default')
+
+    def test_writes_use_default(self):
+        """Test unsafe requests read and write on default."""
+        self.assertEqual(
+            self.read_database('post', token='cached'),
+            'default',
+        )
+        self.assertEqual(router.db_for_write(Timer), 'default')
+
+    def test_user_pinned_after_write(self):
+        """Test reads follow a write to default for the pin window."""
+        self.read_database('put', token='cached', user=self.user)
+
+        self.assertEqual(self.read_database(token='cached'), 'default')
+
+        cache.delete(f'db:pin:{self.user.pk}')
+        self.assertEqual(self.read_database(token='cached'), 'replica0')
+
+    def test_user_pinned_after_write_outside_request(self):
+        """Test writes by workers and commands pin their user too."""
+        with patch.object(transaction, 'on_commit', lambda func: func()):
+            bump_version(self.user.pk)
+
+        self.assertEqual(self.read_database(token='cached'), 'default')
+
+    def test_unknown_token_reads_default(self):
+        """Test requests whose user is not known yet read default."""
+        self.assertEqual(self.read_database(token='unknown'), 'default')
+
+    def test_transactions_read_default(self):
+        """Test reads inside a transaction stay with its writes."""
+        with db_router.use_replica(), \
+                patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(router.db_for_read(Timer), 'default')
+
+    def test_replicas_not_migrated(self):
+        """Test migrations only run on default."""
+        self.assertFalse(router.allow_migrate('replica0', 'core'))
+        self.assertTrue(router.allow_migrate('default', 'core'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test everything uses default when no replica is set up."""
+        self.assertEqual(self.read_database(token='cached'), 'default')
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'Set DB_REPLICAS to run.')
+class ReplicaEndToEndTests(TransactionTestCase):
+    """Test requests against a configured replica.
+
+    Under test the replicas mirror the test database, so they see rows
+    committed on default.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.replica = connections[settings.DATABASE_REPLICAS[0]]
+
+    def test_list_reads_replica_until_write(self):
+        """Test the list reads a replica, but not right after a write."""
+        url = reverse('timer:timer-list-create')
+        Timer.objects.create(user=self.user, title='Piano')
+
+        with CaptureQueriesContext(self.replica) as replica_queries:
+            # The token is unknown until this request caches it.
+            self.client.get(url)
+            self.assertEqual(len(replica_queries), 0)
+            cache.clear()
+
+            res = self.client.get(url)
+            self.assertEqual(len(res.json()['results']), 1)
+            self.assertGreater(len(replica_queries), 0)
+
+            self.client.post(url, {'title': 'Guitar'})
+            count = len(replica_queries)
+            res = self.client.get(url)
+            self.assertEqual(len(res.json()['results']), 2)
+            self.assertEqual(len(replica_queries), count)
@@ -0,0 +1,100 @@
+"""
+Tests for the performance middleware and metrics endpoint.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (TestCase, override_settings)
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import Timer
+
+
+TIMERS_URL = reverse('timer:timer-list-create')
+METRICS_URL = reverse('metrics')
+
+
+@override_settings(METRICS_TOKEN='secret')
+class PerformanceMiddlewareTests(TestCase):
+    """Test request instrumentation."""
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Timer.objects.create(user=self.user, title='Piano')
+
+    def get_metrics(self):
+        return self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+
+    @override_settings(METRICS_SAMPLE_RATE=1.0)
+    def test_sampled_request_has_server_timing(self):
+        """Test sampled requests report DB and serializer time."""
+        res = self.client.get(TIMERS_URL)
+
+        timing = res['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="2 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    @override_settings(METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_request_counted_without_timing(self):
+        """Test unsampled requests are still counted."""
+        res = self.client.get(TIMERS_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        body = self.get_metrics().content.decode()
+        self.assertIn(
+            'http_requests_total{method="GET",'
+            'route="timer:timer-list-create",status="2xx"} 1',
+            body,
+        )
+        self.assertNotIn('http_requests_sampled_total', body)
+
+    @override_settings(METRICS_SAMPLE_RATE=1.0)
+    def test_metrics_exposes_prometheus_text(self):
+        """Test the metrics endpoint renders every series."""
+        self.client.get(TIMERS_URL)
+
+        res = self.get_metrics()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        body = res.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{'
+            'route="timer:timer-list-create",le="+Inf"} 1',
+            body,
+        )
+        self.assertIn(
+            'http_request_db_queries_total'
+            '{route="timer:timer-list-create"} 2',
+            body,
+        )
+        self.assertIn('http_response_size_bytes_total', body)
+        self.assertIn('token_auth_cache_hits_total', body)
+
+    def test_metrics_token_required(self):
+        """Test a configured token protects the endpoint."""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 403)
+
+        res = self.get_metrics()
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_hidden_without_token(self):
+        """Test the endpoint is only open without a token in DEBUG."""
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 404)
+
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(METRICS_URL).status_code, 200)
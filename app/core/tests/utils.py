@@ -0,0 +1,63 @@
+"""
+Helpers shared by the test suites.
+"""
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryPlanMixin:
+    """Assert the queries a block runs never sequentially scan big tables.
+
+    Postgres only: each captured SELECT is re-run under ``EXPLAIN`` and
+    any ``Seq Scan`` node over a relation the planner estimates at
+    ``seq_scan_min_rows`` rows or more fails the test. Run ``ANALYZE``
+    after seeding so the estimates reflect the seeded data.
+    """
+    seq_scan_min_rows = 1000
+
+    def _plan_nodes(self, plan):
+        yield plan
+        for child in plan.get('Plans', []):
+            yield from self._plan_nodes(child)
+
+    def _relation_rows(self, cursor, relation):
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE relname = %s',
+            [relation],
+        )
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def seq_scans(self, queries):
+        """Return (relation, sql) for every large sequential scan."""
+        found = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                for node in self._plan_nodes(plan[0]['Plan']):
+                    if node['Node Type'] != 'Seq Scan':
+                        continue
+                    relation = node['Relation Name']
+                    rows = self._relation_rows(cursor, relation)
+                    if rows >= self.seq_scan_min_rows:
+                        found.append((relation, sql))
+        return found
+
+    def assertNoSeqScan(self, func, *args, **kwargs):
+        """Run func and fail on any large sequential scan it caused."""
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args, **kwargs)
+        scans = self.seq_scans(ctx.captured_queries)
+        if scans:
+            self.fail('Sequential scans on large tables:\n' + '\n'.join(
+                f'{relation}: {sql}' for relation, sql in scans
+            ))
+        return result
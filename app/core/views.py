@@ -0,0 +1,27 @@
+"""
+Views for operational endpoints.
+"""
+import hmac
+
+from django.conf import settings
+from django.http import (Http404, HttpResponse, HttpResponseForbidden)
+from django.views.decorators.http import require_GET
+
+from core import metrics
+
+
+@require_GET
+def metrics_view(request):
+    """Expose the worker's metrics in the Prometheus text format."""
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        # Outside development the endpoint is only served with a token.
+        raise Http404
+    if token:
+        auth = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(auth, f'Bearer {token}'):
+            return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
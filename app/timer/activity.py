@@ -0,0 +1,100 @@
+"""
+Per-day rollups of the time added to each timer.
+
+Every write that adds time to a timer hands the span to ``add``, which
+splits it at local midnights and increments one ``DailyActivity`` row per
+timer and day. Reading a range of days is then one scan of the
+``(user, day)`` prefix of the unique index, however many sessions there
+were.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import (F, Sum)
+from django.utils import timezone
+
+from core.models import DailyActivity
+
+MAX_DAYS = 366
+
+
+def spread(started_at, seconds):
+    """Yield (day, seconds) for a span, split at local midnights."""
+    start = timezone.localtime(started_at)
+    while seconds > 0:
+        day = start.date()
+        midnight = timezone.make_aware(datetime.datetime.combine(
+            day + datetime.timedelta(days=1),
+            datetime.time.min,
+        ))
+        part = min(seconds, int((midnight - start).total_seconds()))
+        if part > 0:
+            yield day, part
+            seconds -= part
+        start = midnight
+
+
+def ending(seconds, now=None):
+    """Return (started_at, seconds) for a span that ends now."""
+    now = now or timezone.now()
+    return now - datetime.timedelta(seconds=seconds), seconds
+
+
+@transaction.atomic
+def add(user_id, spans):
+    """Add {timer_id: [(started_at, seconds), ...]} to the rollups."""
+    totals = defaultdict(int)
+    for timer_id, timer_spans in spans.items():
+        for started_at, seconds in timer_spans:
+            for day, part in spread(started_at, seconds):
+                totals[timer_id, day] += part
+    if not totals:
+        return
+
+    DailyActivity.objects.bulk_create(
+        [
+            DailyActivity(user_id=user_id, timer_id=timer_id, day=day)
+            for timer_id, day in totals
+        ],
+        ignore_conflicts=True,
+    )
+    groups = defaultdict(list)
+    for (timer_id, day), seconds in totals.items():
+        groups[day, seconds].append(timer_id)
+    for (day, seconds), timer_ids in groups.items():
+        DailyActivity.objects.filter(
+            user_id=user_id,
+            day=day,
+            timer_id__in=timer_ids,
+        ).update(seconds=F('seconds') + seconds)
+
+
+def days(user_id, since, until):
+    """Return [(day, seconds)] with activity from since to until."""
+    return list(
+        DailyActivity.objects
+        .filter(user_id=user_id, day__gte=since, day__lte=until)
+        .values('day')
+        .annotate(seconds=Sum('seconds'))
+        .filter(seconds__gt=0)
+        .order_by('day')
+        .values_list('day', 'seconds')
+    )
+
+
+def streaks(active, until):
+    """Return the current and longest run of days in active.
+
+    The current streak ends on until, or the day before while until
+    has no activity yet.
+    """
+    one = datetime.timedelta(days=1)
+    longest = run = 0
+    previous = None
+    for day in active:
+        run = run + 1 if previous == day - one else 1
+        longest = max(longest, run)
+        previous = day
+    current = run if previous in (until, until - one) else 0
+    return current, longest
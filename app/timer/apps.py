@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class TimerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'timer'
+
+    def ready(self):
+        from django.conf import settings
+
+        from core.metrics import registry
+        from timer.events import collect_event_metrics
+        from timer.throttling import check_rates
+
+        registry.register_collector(collect_event_metrics)
+        # Fail at startup rather than on the first throttled request.
+        check_rates(settings.TIMER_THROTTLE_RATES)
@@ -0,0 +1,198 @@
+"""
+Apply many timer create/update/delete operations in one transaction.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Timer
+from timer import (activity, events, stats, sync)
+from timer.cache import bump_version
+from timer.serializers import (TimerSerializer, get_or_create_timer_types)
+
+
+EVENTS = {
+    'create': 'timer.created',
+    'update': 'timer.updated',
+    'delete': 'timer.deleted',
+}
+
+
+class BatchError(Exception):
+    """Raised with per-operation errors when any operation is invalid."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _validate(user, operations):
+    """Return validated data per operation, or raise BatchError.
+
+    Locks the timers operated on, so call inside the transaction that
+    writes them.
+    """
+    errors = []
+    seen = set()
+    ids = [op['id'] for op in operations if op['op'] != 'create']
+    timers = {
+        t.id: t for t in Timer.objects.for_user(user)
+        .select_for_update(of=('self',))
+        .filter(id__in=ids)
+    }
+
+    validated = []
+    for index, op in enumerate(operations):
+        if op['op'] != 'create':
+            if op['id'] in seen:
+                errors.append({
+                    'index': index,
+                    'errors': {'id': ['Timer appears more than once.']},
+                })
+                continue
+            seen.add(op['id'])
+            if op['id'] not in timers:
+                errors.append({'index': index, 'errors': {
+                    'detail': 'Not found.'
+                }})
+                continue
+        if op['op'] == 'delete':
+            validated.append(None)
+            continue
+        serializer = TimerSerializer(
+            timers.get(op.get('id')),
+            data=op['data'],
+            partial=op['op'] == 'update',
+        )
+        if serializer.is_valid():
+            validated.append(dict(serializer.validated_data))
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+
+    if errors:
+        raise BatchError(errors)
+    return timers, validated
+
+
+def apply(user, operations):
+    """Validate and apply operations, returning a result per operation.
+
+    All referenced type names are resolved with one lookup, timers are
+    written with bulk_create/bulk_update and links are diffed, all inside
+    a single transaction; nothing is written if any operation is invalid.
+    Updated timers are read under a row lock and written only the fields
+    they change, so time added concurrently by a stop or a session is
+    kept.
+    """
+    Through = Timer.timer_type.through
+
+    with transaction.atomic():
+        seq = sync.next_seq(user.pk)
+        timers, validated = _validate(user, operations)
+        now = timezone.now()
+        types = get_or_create_timer_types(user, {
+            t['name'] for data in validated if data
+            for t in data.get('timer_type', [])
+        }, seq)
+
+        created, updated, deleted = [], [], []
+        updated_by_fields = defaultdict(list)
+        link_adds, link_removes, changes = [], [], []
+        added = {}
+        for op, data in zip(operations, validated):
+            if op['op'] == 'delete':
+                timer = timers[op['id']]
+                changes.append((stats.snapshot(timer), None))
+                deleted.append(timer.id)
+                continue
+
+            type_data = data.pop('timer_type', None)
+            wanted = None if type_data is None else {
+                types[t['name']].id for t in type_data
+            }
+            if op['op'] == 'create':
+                timer = Timer(user=user, change_seq=seq, **data)
+                created.append((timer, wanted or set()))
+                continue
+
+            timer = timers[op['id']]
+            before = stats.snapshot(timer)
+            fields = set(data) | {'change_seq', 'updated_at'}
+            for attr, value in data.items():
+                setattr(timer, attr, value)
+            if 'current_time' in data and timer.started_at:
+                timer.started_at = now
+                fields.add('started_at')
+            timer.change_seq = seq
+            timer.updated_at = now
+            updated.append(timer)
+            updated_by_fields[tuple(sorted(fields))].append(timer)
+            if wanted is not None:
+                link_adds.extend(
+                    Through(timer_id=timer.id, timertype_id=type_id)
+                    for type_id in wanted - before.type_ids
+                )
+                removed = before.type_ids - wanted
+                if removed:
+                    link_removes.append(
+                        Q(timer_id=timer.id, timertype_id__in=removed)
+                    )
+            if timer.current_time > before.current_time:
+                added[timer.id] = [activity.ending(
+                    timer.current_time - before.current_time,
+                    now,
+                )]
+            changes.append((
+                before,
+                stats.snapshot(timer, before.type_ids if wanted is None
+                               else wanted),
+            ))
+
+        Timer.objects.bulk_create_with_ids([timer for timer, _ in created])
+        for timer, wanted in created:
+            link_adds.extend(
+                Through(timer_id=timer.id, timertype_id=type_id)
+                for type_id in wanted
+            )
+            changes.append((None, stats.snapshot(timer, wanted)))
+        for fields, timers_to_update in updated_by_fields.items():
+            Timer.objects.bulk_update(timers_to_update, fields)
+        if link_removes:
+            condition = Q()
+            for q in link_removes:
+                condition |= q
+            Through.objects.filter(condition).delete()
+        Through.objects.bulk_create(link_adds)
+        if deleted:
+            Timer.objects.filter(id__in=deleted).delete()
+            sync.bury(user.pk, seq, timers=deleted)
+
+        stats.record_many(user.pk, changes)
+        activity.add(user.pk, added)
+        bump_version(user.pk)
+
+    written = {
+        t.id: t for t in Timer.objects.for_user(user).filter(
+            id__in=[t.id for t, _ in created] + [t.id for t in updated]
+        )
+    }
+    created_ids = iter(timer.id for timer, _ in created)
+    results = []
+    for op in operations:
+        if op['op'] == 'delete':
+            results.append({'op': 'delete', 'id': op['id'], 'status': 204})
+            continue
+        timer_id = next(created_ids) if op['op'] == 'create' else op['id']
+        results.append({
+            'op': op['op'],
+            'id': timer_id,
+            'status': 201 if op['op'] == 'create' else 200,
+            'data': TimerSerializer(written[timer_id]).data,
+        })
+
+    for result in results:
+        events.publish(user.pk, EVENTS[result['op']], seq,
+                       result.get('data', {'id': result['id']}))
+    return results
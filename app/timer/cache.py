@@ -0,0 +1,145 @@
+"""
+Per-user versioned cache for rendered timer list responses and for
+answering repeated timer updates.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import (DEFAULT_DB_ALIAS, transaction)
+from django.http import (HttpResponse, HttpResponseNotModified)
+from rest_framework.renderers import JSONRenderer
+
+from core import db_router
+from timer import sync
+
+
+def _cache():
+    return caches[settings.TIMER_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f'timer:version:{user_id}'
+
+
+def get_version(user_id):
+    """Return the current cache version for a user."""
+    # Seeding from the clock keeps an evicted counter from ever
+    # coming back at a value an old entry was stored under.
+    return _cache().get_or_set(_version_key(user_id), time.time_ns, None)
+
+
+def _incr_version(user_id):
+    cache = _cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def _committed(user_id):
+    if settings.DATABASE_REPLICAS:
+        # Pin before the bump, so no response cached under the new
+        # version is read from a replica that lacks the write. Covers
+        # writes outside requests, such as the media worker's.
+        db_router.pin(user_id)
+    _incr_version(user_id)
+
+
+def bump_version(user_id):
+    """Invalidate every cached response of a user."""
+    # Bump now so later reads miss, and again on commit so anything
+    # cached from pre-commit data during the transaction is dropped.
+    _incr_version(user_id)
+    transaction.on_commit(lambda: _committed(user_id))
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return header.strip() == '*' or etag in (
+        tag.strip() for tag in header.split(',')
+    )
+
+
+def cached_response(view_method=None, *, vary=None):
+    """Serve a GET handler's rendered JSON from the per-user cache.
+
+    vary, if given, is called with the request and its result added to
+    the key, for responses that depend on more than the path.
+    """
+    if view_method is None:
+        return functools.partial(cached_response, vary=vary)
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return view_method(self, request, *args, **kwargs)
+
+        user_id = request.user.pk
+        path = request.get_full_path()
+        if vary is not None:
+            path += f'#{vary(request)}'
+        path = hashlib.md5(path.encode()).hexdigest()
+        key = f'timer:response:{user_id}:{get_version(user_id)}:{path}'
+        cache = _cache()
+        entry = cache.get(key)
+        if entry is None:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != 200 or \
+                    not getattr(response, 'cacheable', True):
+                return response
+            content = JSONRenderer().render(response.data)
+            etag = f'"{hashlib.md5(content).hexdigest()}"'
+            entry = (content, etag)
+            cache.set(key, entry, settings.TIMER_CACHE_TIMEOUT)
+
+        content, etag = entry
+        if _etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    return wrapper
+
+
+def _write_key(user_id, pk):
+    return f'timer:write:{user_id}:{pk}'
+
+
+def _fingerprint(data, query):
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    return hashlib.md5(
+        json.dumps([data, query], sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def repeated_write(user_id, pk, data, query):
+    """Return the response to the last update of a timer if data repeats it.
+
+    Only matches while that update is still the user's last change, read
+    from the primary so a write from any process or worker counts.
+    """
+    entry = _cache().get(_write_key(user_id, pk))
+    if entry is None:
+        return None
+    seq, fingerprint, response_data = entry
+    if fingerprint != _fingerprint(data, query) or \
+            seq != sync.current_seq(user_id, using=DEFAULT_DB_ALIAS):
+        return None
+    return response_data
+
+
+def remember_write(user_id, pk, data, query, response_data, seq):
+    """Remember an update's response, made with change number seq."""
+    _cache().set(
+        _write_key(user_id, pk),
+        (seq, _fingerprint(data, query), response_data),
+        settings.TIMER_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,228 @@
+"""
+Per-user pub/sub of timer and type changes for live streams.
+
+Writes publish after their transaction commits. Subscribers are asyncio
+queues on the ASGI event loop. With ``TIMER_EVENTS_REDIS_URL`` set, events
+fan out through Redis to every process. Otherwise they stay in process,
+so only streams served by the process that made the write see them.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+RESYNC = {'type': 'resync'}
+
+
+class Subscription:
+    """A bounded queue of events for one stream."""
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        """Queue event from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The stream's loop has shut down.
+            pass
+
+    def _put(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client is not keeping up; replace the backlog with a
+            # single resync so memory per stream stays bounded.
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class LocalBroker:
+    """Deliver events to subscribers in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        """Return a new Subscription; call from the event loop."""
+        subscription = Subscription(
+            user_id,
+            settings.TIMER_EVENTS_QUEUE_SIZE,
+        )
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def announce(self, user_id):
+        """Record that a stream for user_id is about to subscribe."""
+
+    def wants(self, user_id):
+        """Return whether an event for user_id could reach anyone."""
+        return user_id in self._subscriptions
+
+    def publish(self, user_id, event):
+        self._deliver(user_id, event)
+
+    def _deliver(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def stream_count(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscriptions.values())
+
+
+class RedisBroker(LocalBroker):
+    """Fan events out to every process through Redis pub/sub.
+
+    Each process also keeps a sorted set per user with streams, scored by
+    when its entry expires, so writers can skip building events no one
+    is listening for. The listener thread renews the entries.
+    """
+
+    prefix = 'timer-events:'
+    presence_ttl = 30
+
+    def __init__(self, url):
+        import redis
+
+        super().__init__()
+        self.client = redis.Redis.from_url(url)
+        self.process = uuid.uuid4().hex
+        self._listener = None
+
+    def _presence_key(self, user_id):
+        return f'{self.prefix}streams:{user_id}'
+
+    def subscribe(self, user_id):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen,
+                    name='timer-events',
+                    daemon=True,
+                )
+                self._listener.start()
+        return super().subscribe(user_id)
+
+    def announce(self, user_id):
+        """Record that this process is about to stream to user_id."""
+        self._renew([user_id])
+
+    def _renew(self, user_ids):
+        expires = time.time() + self.presence_ttl
+        pipe = self.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            key = self._presence_key(user_id)
+            pipe.zadd(key, {self.process: expires})
+            pipe.zremrangebyscore(key, '-inf', time.time())
+            pipe.expire(key, self.presence_ttl)
+        pipe.execute()
+
+    def wants(self, user_id):
+        try:
+            return self.client.zcount(
+                self._presence_key(user_id),
+                f'({time.time()}',
+                '+inf',
+            ) > 0
+        except Exception:
+            logger.exception('Could not look up streams for user %s',
+                             user_id)
+            return True
+
+    def publish(self, user_id, event):
+        self.client.publish(f'{self.prefix}{user_id}', json.dumps(event))
+
+    def _listen(self):
+        interval = self.presence_ttl / 3
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f'{self.prefix}*')
+                renewed = 0
+                while True:
+                    if time.monotonic() - renewed >= interval:
+                        with self._lock:
+                            user_ids = list(self._subscriptions)
+                        if user_ids:
+                            self._renew(user_ids)
+                        renewed = time.monotonic()
+                    message = pubsub.get_message(timeout=interval)
+                    if message is None:
+                        continue
+                    channel = message['channel'].decode()
+                    user_id = int(channel[len(self.prefix):])
+                    self._deliver(user_id, json.loads(message['data']))
+            except Exception:
+                logger.exception('Timer event listener failed; retrying')
+                time.sleep(1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            url = settings.TIMER_EVENTS_REDIS_URL
+            _broker = RedisBroker(url) if url else LocalBroker()
+    return _broker
+
+
+def publish(user_id, kind, token, data=None):
+    """Publish an event once the current transaction commits.
+
+    data may be a callable, evaluated only if someone may be listening.
+    """
+    def send():
+        broker = get_broker()
+        if not broker.wants(user_id):
+            return
+        payload = data() if callable(data) else data
+        try:
+            broker.publish(user_id, {'type': kind, 'token': token,
+                                     'data': payload})
+        except Exception:
+            # The write has committed; a lost event only delays clients
+            # until their next sync.
+            logger.exception('Could not publish %s for user %s',
+                             kind, user_id)
+
+    transaction.on_commit(send)
+
+
+def collect_event_metrics():
+    """Yield live stream counts for the metrics registry."""
+    yield ('timer_event_streams', {}, get_broker().stream_count())
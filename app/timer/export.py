@@ -0,0 +1,155 @@
+"""
+Streaming CSV and NDJSON exports of a user's timers, types and sessions.
+
+Rows are read through a server-side cursor ``TIMER_EXPORT_CHUNK_SIZE`` at
+a time and written out as they arrive, so memory stays flat however many
+rows a user has. On Postgres the type names are aggregated in the same
+query; elsewhere they are read with one query per chunk.
+"""
+import csv
+import itertools
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.negotiation import BaseContentNegotiation
+
+from core.models import (Timer, TimerSession, TimerType, elapsed_since)
+
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+FIELDS = {
+    'timers': [
+        'id', 'title', 'description', 'current_time', 'last_session',
+        'goal', 'timer_types', 'started_at', 'updated_at',
+    ],
+    'types': ['id', 'name', 'updated_at'],
+    'sessions': ['id', 'timer_id', 'duration', 'started_at', 'created_at'],
+}
+
+# Rows per chunk handed to the server, so a large export is not written
+# to the socket one line at a time.
+ROWS_PER_WRITE = 100
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Always render with the first renderer.
+
+    Leaves ``?format=`` to the export instead of DRF's renderer lookup,
+    so errors are still JSON.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+
+def _type_names(timer_ids):
+    """Return {timer_id: [type name, ...]} for timer_ids in one query."""
+    names = defaultdict(list)
+    links = (Timer.timer_type.through.objects
+             .filter(timer_id__in=timer_ids)
+             .order_by('timertype__name')
+             .values_list('timer_id', 'timertype__name'))
+    for timer_id, name in links:
+        names[timer_id].append(name)
+    return names
+
+
+def _timer_rows(user):
+    size = settings.TIMER_EXPORT_CHUNK_SIZE
+    timers = Timer.objects.filter(user=user).order_by('id')
+    if connections[timers.db].vendor == 'postgresql':
+        yield from (timers
+                    .annotate(timer_types=ArrayAgg(
+                        'timer_type__name',
+                        filter=Q(timer_type__isnull=False),
+                        ordering='timer_type__name',
+                    ))
+                    .values(*FIELDS['timers'])
+                    .iterator(chunk_size=size))
+        return
+    fields = [f for f in FIELDS['timers'] if f != 'timer_types']
+    records = timers.values(*fields).iterator(chunk_size=size)
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        names = _type_names([row['id'] for row in chunk])
+        for row in chunk:
+            row['timer_types'] = names[row['id']]
+            yield {f: row[f] for f in FIELDS['timers']}
+
+
+def _timers(user):
+    now = timezone.now()
+    for row in _timer_rows(user):
+        row['timer_types'] = row['timer_types'] or []
+        if row['started_at'] is not None:
+            # Match the API, which reports running time as of now.
+            row['current_time'] += elapsed_since(row['started_at'], now)
+        yield row
+
+
+def rows(user, kind):
+    """Yield the user's rows of kind as dicts of FIELDS[kind]."""
+    if kind == 'timers':
+        return _timers(user)
+    model = TimerType if kind == 'types' else TimerSession
+    return (model.objects
+            .filter(user=user)
+            .order_by('id')
+            .values(*FIELDS[kind])
+            .iterator(chunk_size=settings.TIMER_EXPORT_CHUNK_SIZE))
+
+
+class _Echo:
+    """File-like object whose write returns what was written."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ';'.join(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _csv_lines(kind, records):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS[kind])
+    for record in records:
+        yield writer.writerow([_csv_value(record[f]) for f in FIELDS[kind]])
+
+
+def _ndjson_lines(kind, records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder,
+                         separators=(',', ':')) + '\n'
+
+
+def stream(user, kind, fmt):
+    """Yield the encoded export in chunks of ROWS_PER_WRITE rows."""
+    encode = _csv_lines if fmt == 'csv' else _ndjson_lines
+    batch = []
+    for line in encode(kind, rows(user, kind)):
+        batch.append(line)
+        if len(batch) >= ROWS_PER_WRITE:
+            yield ''.join(batch).encode()
+            batch = []
+    if batch:
+        yield ''.join(batch).encode()
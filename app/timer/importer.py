@@ -0,0 +1,271 @@
+"""
+Bulk import of timers from a CSV or NDJSON stream.
+
+Files use the columns of ``GET /api/timer/export``, so an export can be
+imported again; unknown columns such as ``id`` are ignored. Rows are
+read and validated ``TIMER_IMPORT_CHUNK_SIZE`` at a time. Each chunk
+resolves its type names with one lookup and is written with PostgreSQL
+``COPY``, or ``bulk_create`` on other databases, all inside a single
+transaction: nothing is imported if any row is invalid.
+"""
+import codecs
+import csv
+import io
+import json
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import (connection, models, transaction)
+from django.utils import timezone
+
+from core.models import Timer
+from timer import (events, stats, sync)
+from timer.cache import bump_version
+from timer.serializers import get_or_create_timer_types
+
+
+FORMATS = ('csv', 'ndjson')
+INT_FIELDS = ('current_time', 'last_session', 'goal')
+INT_MAX = 2 ** 31 - 1
+MAX_LENGTH = 255
+# Invalid rows reported before giving up on the rest of the file.
+MAX_ERRORS = 50
+
+Result = namedtuple('Result', ['imported', 'seconds'])
+
+
+class InvalidImport(Exception):
+    """Raised with per-row errors when any row is invalid."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def read_rows(lines, fmt):
+    """Yield raw dicts from an iterable of encoded lines."""
+    text = codecs.iterdecode(lines, 'utf-8-sig')
+    if fmt == 'csv':
+        for row in csv.DictReader(text):
+            types = row.get('timer_types') or ''
+            row['timer_types'] = types.split(';')
+            yield row
+        return
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {'__invalid__': True}
+
+
+def clean(row):
+    """Return (values, errors) for one raw row."""
+    if '__invalid__' in row:
+        return None, {'detail': 'Expected a JSON object.'}
+    errors = {}
+    values = {}
+
+    title = row.get('title')
+    if not isinstance(title, str) or not title.strip():
+        errors['title'] = ['This field is required.']
+    elif len(title) > MAX_LENGTH:
+        errors['title'] = [
+            f'Ensure this field has no more than {MAX_LENGTH} characters.'
+        ]
+    values['title'] = title
+
+    description = row.get('description') or ''
+    if not isinstance(description, str):
+        errors['description'] = ['Not a valid string.']
+    values['description'] = description
+
+    for name in INT_FIELDS:
+        value = row.get(name)
+        if value in (None, ''):
+            values[name] = 0
+            continue
+        try:
+            values[name] = int(value)
+        except (TypeError, ValueError):
+            errors[name] = ['A valid integer is required.']
+            continue
+        if isinstance(value, float) or abs(values[name]) > INT_MAX:
+            errors[name] = ['A valid integer is required.']
+
+    types = row.get('timer_types') or []
+    names = []
+    if not isinstance(types, list):
+        errors['timer_types'] = ['Expected a list of names.']
+    else:
+        for item in types:
+            name = item.get('name') if isinstance(item, dict) else item
+            if not isinstance(name, str) or len(name) > MAX_LENGTH:
+                errors['timer_types'] = ['Enter valid type names.']
+                break
+            if name.strip():
+                names.append(name.strip())
+    values['timer_types'] = list(dict.fromkeys(names))
+    return values, errors
+
+
+def _column_defaults():
+    """Return (columns, nullable columns, defaults) for Timer."""
+    columns, nulls, defaults = [], [], {}
+    for field in Timer._meta.concrete_fields:
+        columns.append(field.column)
+        if field.null:
+            nulls.append(field.column)
+        default = field.get_default()
+        if isinstance(field, models.JSONField):
+            default = json.dumps(default)
+        defaults[field.attname] = default
+    return columns, nulls, defaults
+
+
+def _copy(cursor, table, columns, rows, nulls=()):
+    """Load rows into table with COPY FROM STDIN."""
+    buffer = io.StringIO()
+    # Every string is quoted, so '' stays a string; None is written as
+    # "" too and only becomes NULL in the columns listed in nulls.
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    options = 'FORMAT csv'
+    if nulls:
+        options += f', FORCE_NULL ({", ".join(map(quote, nulls))})'
+    cursor.copy_expert(
+        f'COPY {quote(table)} ({", ".join(map(quote, columns))}) '
+        f'FROM STDIN WITH ({options})',
+        buffer,
+    )
+
+
+def _insert_copy(user, chunk, types, seq, now):
+    """Write a chunk with COPY, allocating ids from the sequence first."""
+    columns, nulls, defaults = _column_defaults()
+    defaults.update(user_id=user.pk, updated_at=now, change_seq=seq)
+    attnames = [f.attname for f in Timer._meta.concrete_fields]
+    template = [defaults[name] for name in attnames]
+    slots = [
+        (attnames.index(name), name)
+        for name in ('title', 'description') + INT_FIELDS
+    ]
+    id_slot = attnames.index('id')
+
+    def timer_row(timer_id, values):
+        row = template.copy()
+        row[id_slot] = timer_id
+        for slot, name in slots:
+            row[slot] = values[name]
+        return row
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [Timer._meta.db_table, 'id', len(chunk)],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        _copy(cursor, Timer._meta.db_table, columns, (
+            timer_row(timer_id, values)
+            for timer_id, values in zip(ids, chunk)
+        ), nulls)
+        Through = Timer.timer_type.through
+        _copy(cursor, Through._meta.db_table, ['timer_id', 'timertype_id'], (
+            (timer_id, types[name].id)
+            for timer_id, values in zip(ids, chunk)
+            for name in values['timer_types']
+        ))
+    return ids
+
+
+def _insert_orm(user, chunk, types, seq, now):
+    """Write a chunk with bulk_create, reading back ids if need be."""
+    timers = Timer.objects.bulk_create_with_ids([
+        Timer(
+            user=user,
+            change_seq=seq,
+            updated_at=now,
+            **{k: v for k, v in values.items() if k != 'timer_types'},
+        )
+        for values in chunk
+    ])
+    Through = Timer.timer_type.through
+    Through.objects.bulk_create([
+        Through(timer_id=timer.id, timertype_id=types[name].id)
+        for timer, values in zip(timers, chunk)
+        for name in values['timer_types']
+    ])
+    return [timer.id for timer in timers]
+
+
+def _write(user, chunk, seq, now, tally):
+    types = get_or_create_timer_types(user, {
+        name for values in chunk for name in values['timer_types']
+    }, seq)
+    insert = _insert_copy if connection.vendor == 'postgresql' else \
+        _insert_orm
+    insert(user, chunk, types, seq, now)
+    for values in chunk:
+        tally.add(after=stats.Snapshot(
+            values['current_time'],
+            values['goal'],
+            [types[name].id for name in values['timer_types']],
+        ))
+
+
+def run(user, lines, fmt, max_rows=None, progress=None, chunk_size=None):
+    """Import timers for user from encoded lines in fmt.
+
+    progress, if given, is called with the running row count after each
+    chunk. Raises InvalidImport, having written nothing, if any row is
+    invalid or there are more than max_rows.
+    """
+    chunk_size = chunk_size or settings.TIMER_IMPORT_CHUNK_SIZE
+    started = time.perf_counter()
+    errors, chunk, imported = [], [], 0
+    with transaction.atomic():
+        seq = sync.next_seq(user.pk)
+        now = timezone.now()
+        # Totals are applied once, not per chunk.
+        tally = stats.Tally()
+        for number, row in enumerate(read_rows(lines, fmt), 1):
+            if max_rows is not None and number > max_rows:
+                errors.append({'row': number, 'errors': {
+                    'detail': f'Import at most {max_rows} rows at once.'
+                }})
+                break
+            values, row_errors = clean(row)
+            if row_errors:
+                errors.append({'row': number, 'errors': row_errors})
+                if len(errors) >= MAX_ERRORS:
+                    break
+                continue
+            if errors:
+                # Keep validating to report errors, but stop writing.
+                continue
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                _write(user, chunk, seq, now, tally)
+                imported += len(chunk)
+                chunk = []
+                if progress:
+                    progress(imported)
+        if errors:
+            raise InvalidImport(errors)
+        if chunk:
+            _write(user, chunk, seq, now, tally)
+            imported += len(chunk)
+            if progress:
+                progress(imported)
+        if imported:
+            tally.apply(user.pk)
+            bump_version(user.pk)
+            # One event, not one per row: clients catch up by syncing.
+            events.publish(user.pk, 'timers.imported', seq,
+                           {'count': imported})
+    return Result(imported, time.perf_counter() - started)
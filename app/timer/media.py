@@ -0,0 +1,182 @@
+"""
+Background generation of resized timer image variants.
+"""
+import io
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import (Image, ImageOps)
+
+from core.models import (MediaJob, Timer)
+from timer import (events, sync)
+from timer.cache import bump_version
+from timer.serializers import TimerImageSerializer
+
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def _variant_names(variants):
+    return {
+        name for formats in variants.values() for name in formats.values()
+    }
+
+
+def _delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def enqueue(timer):
+    """Mark the timer's current image as processing and queue a job."""
+    stale = _variant_names(timer.image_variants)
+    Timer.objects.filter(pk=timer.pk).update(
+        image_status='processing',
+        image_variants={},
+    )
+    timer.image_status = 'processing'
+    timer.image_variants = {}
+    if stale:
+        transaction.on_commit(lambda: _delete_files(stale))
+    return MediaJob.objects.create(timer=timer, source=timer.image.name)
+
+
+def claim_job():
+    """Lock and return the next runnable job, or None."""
+    stale = timezone.now() - timedelta(
+        seconds=settings.TIMER_MEDIA_JOB_TIMEOUT
+    )
+    with transaction.atomic():
+        job = (MediaJob.objects
+               .select_for_update(skip_locked=True)
+               .filter(
+                   Q(status=MediaJob.PENDING) |
+                   Q(status=MediaJob.RUNNING, updated_at__lt=stale)
+               )
+               .order_by('id')
+               .first())
+        if job is None:
+            return None
+        job.status = MediaJob.RUNNING
+        job.attempts += 1
+        job.save(update_fields=['status', 'attempts', 'updated_at'])
+    return job
+
+
+def _variant_name(source, label, ext):
+    stem = os.path.splitext(os.path.basename(source))[0] or uuid.uuid4().hex
+    filename = f'{stem}-{label}.{ext}'
+    return os.path.join('uploads', 'timer', 'variants', filename)
+
+
+def generate_variants(source):
+    """Decode source once and save every size in every format.
+
+    Returns a mapping of ``{label: {format: storage name}}``. Variants are
+    written without EXIF, ICC or any other metadata.
+    """
+    with default_storage.open(source, 'rb') as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    variants = {}
+    for label, size in settings.TIMER_IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size))
+        resized.info = {}
+        variants[label] = {}
+        for ext, (fmt, options) in FORMATS.items():
+            out = resized
+            if fmt == 'JPEG' and out.mode != 'RGB':
+                out = out.convert('RGB')
+            buffer = io.BytesIO()
+            out.save(buffer, fmt, **options)
+            name = _variant_name(source, label, ext)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            variants[label][ext] = default_storage.save(
+                name,
+                ContentFile(buffer.getvalue()),
+            )
+    return variants
+
+
+def _publish(timer, seq):
+    """Push the timer's new image state to its owner's live streams."""
+    def data():
+        fresh = Timer.objects.get(pk=timer.pk)
+        return {'id': fresh.pk, **TimerImageSerializer(fresh).data}
+
+    events.publish(timer.user_id, 'timer.image', seq, data)
+
+
+def run_job(job):
+    """Process a claimed job and record the outcome on job and timer."""
+    timer = Timer.objects.filter(pk=job.timer_id).first()
+    if timer is None or timer.image.name != job.source:
+        # The image was replaced or the timer deleted; a newer job exists.
+        job.status = MediaJob.DONE
+        job.save(update_fields=['status', 'updated_at'])
+        return job
+
+    try:
+        variants = generate_variants(job.source)
+    except Exception as exc:
+        job.error = repr(exc)
+        if job.attempts >= settings.TIMER_MEDIA_MAX_ATTEMPTS:
+            job.status = MediaJob.FAILED
+            with transaction.atomic():
+                seq = sync.next_seq(timer.user_id)
+                Timer.objects.filter(pk=timer.pk, image=job.source).update(
+                    image_status='failed',
+                    change_seq=seq,
+                    updated_at=timezone.now(),
+                )
+                bump_version(timer.user_id)
+                _publish(timer, seq)
+        else:
+            job.status = MediaJob.PENDING
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        return job
+
+    with transaction.atomic():
+        seq = sync.next_seq(timer.user_id)
+        updated = Timer.objects.filter(pk=timer.pk, image=job.source).update(
+            image_status='ready',
+            image_variants=variants,
+            change_seq=seq,
+            updated_at=timezone.now(),
+        )
+        if updated:
+            bump_version(timer.user_id)
+            _publish(timer, seq)
+    if not updated:
+        _delete_files(_variant_names(variants))
+    job.status = MediaJob.DONE
+    job.save(update_fields=['status', 'updated_at'])
+    return job
+
+
+def process_pending(limit=None):
+    """Run queued jobs until the queue is empty or limit is reached."""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,83 @@
+"""
+Serializer-free rendering of timers and types for the read endpoints.
+
+Builds the dicts ``TimerSerializer``, ``TimerDetailSerializer`` and
+``TimerTypeSerializer`` would, from ``.values()`` rows and one query for
+the type links, without model instances or field objects per row. Only
+for responses without sparse fieldsets or absolute URLs, which need the
+request. ``test_representations`` checks both render byte for byte the
+same; change them together.
+"""
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.models import (Timer, elapsed_since)
+
+
+TIMER_FIELDS = ['id', 'title', 'current_time', 'last_session', 'started_at']
+DETAIL_FIELDS = TIMER_FIELDS + [
+    'description', 'image', 'image_status', 'image_variants',
+]
+TYPE_FIELDS = ['id', 'name']
+
+_datetime = serializers.DateTimeField()
+
+
+def timer_rows(timers, detail=False):
+    """Return timers as a values queryset of the fields to render."""
+    return timers.prefetch_related(None).values(
+        *(DETAIL_FIELDS if detail else TIMER_FIELDS)
+    )
+
+
+def types(timer_types):
+    """Return serialized types for a TimerType queryset."""
+    return list(timer_types.values(*TYPE_FIELDS))
+
+
+def _types_by_timer(timer_ids):
+    types = defaultdict(list)
+    links = (Timer.timer_type.through.objects
+             .filter(timer_id__in=timer_ids)
+             .order_by('timertype_id')
+             .values_list('timer_id', 'timertype_id', 'timertype__name'))
+    for timer_id, type_id, name in links:
+        types[timer_id].append({'id': type_id, 'name': name})
+    return types
+
+
+def _url(name):
+    return default_storage.url(name) if name else None
+
+
+def timers(rows, detail=False, now=None):
+    """Return serialized timers for rows from timer_rows()."""
+    rows = list(rows)
+    links = _types_by_timer([row['id'] for row in rows]) if rows else {}
+    now = now or timezone.now()
+    data = []
+    for row in rows:
+        started_at = row['started_at']
+        timer = {
+            'id': row['id'],
+            'title': row['title'],
+            'current_time': row['current_time'] +
+            elapsed_since(started_at, now),
+            'last_session': row['last_session'],
+            'started_at': _datetime.to_representation(started_at)
+            if started_at is not None else None,
+            'timer_type': links.get(row['id'], []),
+        }
+        if detail:
+            timer['description'] = row['description']
+            timer['image'] = _url(row['image'])
+            timer['image_status'] = row['image_status']
+            timer['image_variants'] = {
+                label: {fmt: _url(name) for fmt, name in formats.items()}
+                for label, formats in row['image_variants'].items()
+            }
+        data.append(timer)
+    return data
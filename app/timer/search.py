@@ -0,0 +1,34 @@
+"""
+Search over timer titles and descriptions.
+
+On PostgreSQL this matches web search syntax against the
+trigger-maintained ``search_vector`` (GIN indexed). A single plain word
+also matches part of a title with ``icontains``, which compares
+``UPPER(title)`` (trigram indexed); with quotes, ``or`` or exclusions
+the raw text would not mean the same as a substring. Other databases
+fall back to ``icontains`` on both fields.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery
+from django.db import connections
+from django.db.models import Q
+
+
+CONFIG = 'simple'
+
+# One word, with none of the web search operators.
+WORD = re.compile(r'[^\s"-][^\s"]*')
+
+
+def search(timers, text):
+    """Filter the timers queryset to those matching text."""
+    if connections[timers.db].vendor != 'postgresql':
+        return timers.filter(
+            Q(title__icontains=text) | Q(description__icontains=text)
+        )
+    query = SearchQuery(text, config=CONFIG, search_type='websearch')
+    match = Q(search_vector=query)
+    if WORD.fullmatch(text) and text.lower() != 'or':
+        match |= Q(title__icontains=text)
+    return timers.filter(match)
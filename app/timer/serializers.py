@@ -1,9 +1,83 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+
+from core import metrics
+from core.models import (Timer, TimerType, TimerSession)
+from core.serializers import DynamicFieldsMixin
+from timer import (activity, events, stats, sync)
+from timer.cache import bump_version
+
+
+def get_or_create_timer_types(user, names, change_seq):
+    """Map each name to the user's TimerType, bulk-creating missing ones.
+
+    Created types are stamped with change_seq.
+    """
+    names = set(names)
+    if not names:
+        return {}
+    types = {
+        t.name: t for t in TimerType.objects.filter(user=user, name__in=names)
+    }
+    missing = names - set(types)
+    if missing:
+        TimerType.objects.bulk_create(
+            [
+                TimerType(user=user, name=name, change_seq=change_seq)
+                for name in missing
+            ],
+            ignore_conflicts=True,
+        )
+        created = TimerType.objects.filter(user=user, name__in=missing)
+        for timer_type in created:
+            types[timer_type.name] = timer_type
+            publish_timer_type(timer_type, 'type.created')
+    return types
+
+
+def publish_timer(timer, kind):
+    """Push timer to the owner's live streams once committed."""
+    events.publish(
+        timer.user_id,
+        kind,
+        timer.change_seq,
+        lambda: TimerSerializer(timer).data,
+    )
 
-from core.models import (Timer, TimerType)
 
+def publish_timer_type(timer_type, kind):
+    """Push timer_type to the owner's live streams once committed."""
+    events.publish(
+        timer_type.user_id,
+        kind,
+        timer_type.change_seq,
+        lambda: TimerTypeSerializer(timer_type).data,
+    )
 
-class TimerTypeSerializer(serializers.ModelSerializer):
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Render stored variant names as URLs."""
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for label, formats in value.items():
+            urls[label] = {}
+            for fmt, name in formats.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[label][fmt] = url
+        return urls
+
+
+class TimerTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = TimerType
@@ -11,48 +85,144 @@ class TimerTypeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class TimerSerializer(serializers.ModelSerializer):
+class TimerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     timer_type = TimerTypeSerializer(many=True, required=False)
 
     class Meta:
         model = Timer
-        fields = ['id', 'title', 'current_time', 'last_session', 'timer_type']
-        read_only_fields = ['id']
+        fields = [
+            'id',
+            'title',
+            'current_time',
+            'last_session',
+            'started_at',
+            'timer_type',
+        ]
+        read_only_fields = ['id', 'started_at']
 
-    def _get_or_create_timer_type(self, timer_type, timer):
-        auth_user = self.context['request'].user
-        for type in timer_type:
-            type_obj, created = TimerType.objects.get_or_create(
-                user=auth_user,
-                **type
-            )
-            timer.timer_type.add(type_obj)
+    def to_representation(self, instance):
+        """Report a running timer's time as of now."""
+        data = super().to_representation(instance)
+        if 'current_time' in data and instance.started_at is not None:
+            data['current_time'] += instance.elapsed()
+        return data
+
+    def _get_or_create_timer_types(self, timer_type, user, change_seq):
+        """Resolve type payloads to TimerTypes, creating missing ones."""
+        names = list(dict.fromkeys(t['name'] for t in timer_type))
+        types = get_or_create_timer_types(user, names, change_seq)
+        return [types[name] for name in names]
 
+    def _set_timer_types(self, timer, types, created=False):
+        """Diff the timer's type links, touching only the changed rows."""
+        wanted = {t.id for t in types}
+        current = set() if created else {
+            t.id for t in timer.timer_type.all()
+        }
+        if current - wanted:
+            timer.timer_type.remove(*(current - wanted))
+        if wanted - current:
+            timer.timer_type.add(*(wanted - current))
+
+    @transaction.atomic
     def create(self, validated_data):
         timer_type = validated_data.pop('timer_type', [])
-        timer = Timer.objects.create(**validated_data)
+        seq = sync.next_seq(validated_data['user'].pk)
+        timer = Timer.objects.create(change_seq=seq, **validated_data)
 
-        self._get_or_create_timer_type(timer_type, timer)
+        types = self._get_or_create_timer_types(timer_type, timer.user, seq)
+        self._set_timer_types(timer, types, created=True)
+        stats.record(
+            timer.user_id,
+            after=stats.snapshot(timer, [t.id for t in types]),
+        )
+        bump_version(timer.user_id)
+        publish_timer(timer, 'timer.created')
 
         return timer
 
+    def _unchanged(self, instance, validated_data):
+        """Return whether saving validated_data would change nothing."""
+        if 'current_time' in validated_data and instance.started_at:
+            return False
+        for attr, value in validated_data.items():
+            if attr == 'timer_type':
+                names = {t['name'] for t in value}
+                if names != {t.name for t in instance.timer_type.all()}:
+                    return False
+            elif attr == 'user':
+                if value.pk != instance.user_id:
+                    return False
+            elif getattr(instance, attr) != value:
+                return False
+        return True
+
+    @transaction.atomic
     def update(self, instance, validated_data):
+        if self._unchanged(instance, validated_data):
+            metrics.registry.inc('timer_noop_writes_total',
+                                 reason='unchanged')
+            return instance
+        seq = sync.next_seq(instance.user_id)
+        # Re-read the row under lock: it was loaded before the change
+        # counter was taken, and a stop may have committed since.
+        instance = (Timer.objects.for_user(instance.user_id)
+                    .select_for_update(of=('self',))
+                    .filter(pk=instance.pk)
+                    .first())
+        if instance is None:
+            raise NotFound()
+        before = stats.snapshot(instance)
+        type_ids = before.type_ids
         timer_type = validated_data.pop('timer_type', None)
         if timer_type is not None:
-            instance.timer_type.clear()
-            self._get_or_create_timer_type(timer_type, instance)
+            types = self._get_or_create_timer_types(
+                timer_type,
+                instance.user,
+                seq,
+            )
+            self._set_timer_types(instance, types)
+            type_ids = [t.id for t in types]
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
+        if 'current_time' in validated_data and instance.started_at:
+            # The client sent the running total as of now.
+            instance.started_at = timezone.now()
 
-        instance.save()
+        instance.change_seq = seq
+        instance.save(update_fields=[
+            *validated_data, 'started_at', 'change_seq', 'updated_at',
+        ])
+        stats.record(
+            instance.user_id,
+            before,
+            stats.snapshot(instance, type_ids),
+        )
+        added = instance.current_time - before.current_time
+        if added > 0:
+            activity.add(
+                instance.user_id,
+                {instance.id: [activity.ending(added)]},
+            )
+        bump_version(instance.user_id)
+        publish_timer(instance, 'timer.updated')
         return instance
 
 
 class TimerDetailSerializer(TimerSerializer):
+    image_variants = ImageVariantsField()
 
     class Meta(TimerSerializer.Meta):
-        fields = TimerSerializer.Meta.fields + ['description', 'image']
+        fields = TimerSerializer.Meta.fields + [
+            'description',
+            'image',
+            'image_status',
+            'image_variants',
+        ]
+        read_only_fields = TimerSerializer.Meta.read_only_fields + [
+            'image_status',
+        ]
 
 
 class TimerTypeDetailsSerializer(TimerTypeSerializer):
@@ -62,12 +232,142 @@ class TimerTypeDetailsSerializer(TimerTypeSerializer):
 
 
 class TimerImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Timer
-        fields = ['image']
+        fields = ['image', 'image_status', 'image_variants']
+        read_only_fields = ['image_status']
+        extra_kwargs = {'image': {'required': True, 'allow_null': False}}
 
+    @transaction.atomic
     def update(self, instance, validation_data):
-        instance.image = validation_data.get('image', instance.image)
-        instance.save()
+        seq = sync.next_seq(instance.user_id)
+        # Re-read the row under lock, so a clock change or session that
+        # committed since the view loaded it is not written back.
+        instance = (Timer.objects.for_user(instance.user_id)
+                    .select_for_update(of=('self',))
+                    .filter(pk=instance.pk)
+                    .first())
+        if instance is None:
+            raise NotFound()
+        instance.image = validation_data['image']
+        instance.change_seq = seq
+        instance.save(update_fields=['image', 'change_seq', 'updated_at'])
+        bump_version(instance.user_id)
+        publish_timer(instance, 'timer.updated')
         return instance
+
+
+class TimerSessionSerializer(serializers.ModelSerializer):
+    # Not left to the backend's integer range, which SQLite doesn't set.
+    duration = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = TimerSession
+        fields = ['id', 'duration', 'started_at', 'created_at']
+        read_only_fields = ['id', 'created_at']
+
+
+class TimerTypeStatsSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='timer_type_id')
+    name = serializers.CharField(source='timer_type__name')
+    timer_count = serializers.IntegerField()
+    total_time = serializers.IntegerField()
+    total_goal = serializers.IntegerField()
+    progress = serializers.SerializerMethodField()
+
+    def get_progress(self, obj) -> Optional[float]:
+        if not obj['total_goal']:
+            return None
+        return obj['total_time'] / obj['total_goal']
+
+
+class StatsBucketSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    total_time = serializers.IntegerField()
+
+
+class TimerStatsSerializer(serializers.Serializer):
+    timer_count = serializers.IntegerField()
+    total_time = serializers.IntegerField()
+    total_goal = serializers.IntegerField()
+    total_hours = serializers.FloatField()
+    target_hours = serializers.IntegerField()
+    types = TimerTypeStatsSerializer(many=True)
+    buckets = StatsBucketSerializer(many=True, required=False)
+
+
+class ActivityDaySerializer(serializers.Serializer):
+    day = serializers.DateField()
+    total_time = serializers.IntegerField()
+
+
+class TimerActivitySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    total_time = serializers.IntegerField()
+    active_days = serializers.IntegerField()
+    current_streak = serializers.IntegerField()
+    longest_streak = serializers.IntegerField()
+    days = ActivityDaySerializer(many=True)
+
+
+class TimerBatchOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError(
+                {'id': ['This field is required.']}
+            )
+        if attrs['op'] != 'delete' and 'data' not in attrs:
+            raise serializers.ValidationError(
+                {'data': ['This field is required.']}
+            )
+        return attrs
+
+
+class TimerBatchSerializer(serializers.Serializer):
+    operations = TimerBatchOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, value):
+        limit = settings.TIMER_BATCH_MAX_OPERATIONS
+        if len(value) > limit:
+            raise serializers.ValidationError(
+                f'Ensure there are no more than {limit} operations.'
+            )
+        return value
+
+
+class TimerBatchResultSerializer(serializers.Serializer):
+    op = serializers.CharField()
+    id = serializers.IntegerField()
+    status = serializers.IntegerField()
+    data = TimerSerializer(required=False)
+
+
+class DeletedIdsSerializer(serializers.Serializer):
+    timers = serializers.ListField(child=serializers.IntegerField())
+    timer_types = serializers.ListField(child=serializers.IntegerField())
+
+
+class TimerChangesSerializer(serializers.Serializer):
+    token = serializers.CharField()
+    has_more = serializers.BooleanField()
+    timers = TimerSerializer(many=True)
+    timer_types = TimerTypeSerializer(many=True)
+    deleted = DeletedIdsSerializer()
+
+
+class EventTicketSerializer(serializers.Serializer):
+    ticket = serializers.CharField()
+    expires_in = serializers.IntegerField()
+
+
+class TimerImportResultSerializer(serializers.Serializer):
+    imported = serializers.IntegerField()
+    seconds = serializers.FloatField()
+    rows_per_second = serializers.FloatField()
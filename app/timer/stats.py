@@ -0,0 +1,214 @@
+"""
+Incrementally maintained per-user and per-type timer totals.
+
+A timer contributes ``(1, current_time, goal)`` to its user's totals and
+to every type it is linked to. Writers take a snapshot of the timer
+before and after a change and hand both to ``record``; the difference is
+applied with F() updates so the summary stays O(types) to read.
+"""
+from collections import (defaultdict, namedtuple)
+
+from django.db import (connection, transaction)
+from django.db.models import (Count, F, Sum)
+from django.db.models.functions import (Coalesce, Trunc)
+
+from core.models import (
+    Timer,
+    TimerSession,
+    TimerType,
+    TimerTypeStats,
+    UserStats,
+)
+
+BUCKETS = ('day', 'week', 'month')
+
+
+Snapshot = namedtuple('Snapshot', ['current_time', 'goal', 'type_ids'])
+
+
+def snapshot(timer, type_ids=None):
+    """Return the contribution of timer to the summaries."""
+    if type_ids is None:
+        type_ids = [t.id for t in timer.timer_type.all()]
+    return Snapshot(timer.current_time, timer.goal, frozenset(type_ids))
+
+
+def record(user_id, before=None, after=None):
+    """Apply the change from snapshot before to snapshot after."""
+    record_many(user_id, [(before, after)])
+
+
+class Tally:
+    """Snapshot changes summed up to be applied in one update."""
+
+    def __init__(self):
+        self.totals = [0, 0, 0]
+        self.per_type = defaultdict(lambda: [0, 0, 0])
+
+    def add(self, before=None, after=None):
+        for snap, sign in ((before, -1), (after, 1)):
+            if snap is None:
+                continue
+            contribution = (sign, sign * snap.current_time, sign * snap.goal)
+            for i, value in enumerate(contribution):
+                self.totals[i] += value
+                for type_id in snap.type_ids:
+                    self.per_type[type_id][i] += value
+
+    def apply(self, user_id):
+        _apply(user_id, tuple(self.totals), {
+            type_id: tuple(delta) for type_id, delta in self.per_type.items()
+            if any(delta)
+        })
+
+
+def record_many(user_id, changes):
+    """Apply several (before, after) snapshot pairs as one update."""
+    tally = Tally()
+    for before, after in changes:
+        tally.add(before, after)
+    tally.apply(user_id)
+
+
+def add_time(user_id, type_ids, seconds):
+    """Add seconds to a timer's totals without touching counts."""
+    _apply(user_id, (0, seconds, 0), {
+        type_id: (0, seconds, 0) for type_id in type_ids
+    })
+
+
+def _increments(delta):
+    count, time, goal = delta
+    return {
+        'timer_count': F('timer_count') + count,
+        'total_time': F('total_time') + time,
+        'total_goal': F('total_goal') + goal,
+    }
+
+
+def _create_empty(user_id):
+    """Insert a zeroed UserStats row and return whether this call did.
+
+    Waits for a transaction inserting the same row to finish first.
+    """
+    table = UserStats._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} '
+            f'(user_id, timer_count, total_time, total_goal) '
+            f'VALUES (%s, 0, 0, 0) '
+            f'ON CONFLICT (user_id) DO NOTHING RETURNING user_id',
+            [user_id],
+        )
+        return cursor.fetchone() is not None
+
+
+@transaction.atomic
+def _apply(user_id, totals, per_type):
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **_increments(totals)
+    )
+    if not updated:
+        if _create_empty(user_id):
+            # Never summarised yet: build from the rows written so far,
+            # this change included.
+            rebuild(user_id)
+            return
+        # Another transaction summarised first; its totals leave out
+        # this one's rows, so add them as usual.
+        UserStats.objects.filter(user_id=user_id).update(
+            **_increments(totals)
+        )
+
+    if per_type:
+        TimerTypeStats.objects.bulk_create(
+            [
+                TimerTypeStats(timer_type_id=type_id, user_id=user_id)
+                for type_id in per_type
+            ],
+            ignore_conflicts=True,
+        )
+    groups = defaultdict(list)
+    for type_id, delta in per_type.items():
+        groups[delta].append(type_id)
+    for delta, type_ids in groups.items():
+        TimerTypeStats.objects.filter(timer_type_id__in=type_ids).update(
+            **_increments(delta)
+        )
+
+
+@transaction.atomic
+def rebuild(user_id):
+    """Recompute a user's summaries from the Timer and TimerType tables.
+
+    Counts while holding the user's UserStats row, so a concurrent
+    change is either committed and counted, or applied afterwards.
+    """
+    _create_empty(user_id)
+    UserStats.objects.select_for_update().filter(user_id=user_id).get()
+    totals = Timer.objects.filter(user_id=user_id).aggregate(
+        timer_count=Count('id'),
+        total_time=Sum('current_time'),
+        total_goal=Sum('goal'),
+    )
+    per_type = (TimerType.objects
+                .filter(user_id=user_id)
+                .annotate(
+                    timer_count=Count('timer'),
+                    total_time=Sum('timer__current_time'),
+                    total_goal=Sum('timer__goal'),
+                )
+                .values_list('id', 'timer_count', 'total_time', 'total_goal'))
+    UserStats.objects.filter(user_id=user_id).update(
+        timer_count=totals['timer_count'],
+        total_time=totals['total_time'] or 0,
+        total_goal=totals['total_goal'] or 0,
+    )
+    TimerTypeStats.objects.filter(user_id=user_id).delete()
+    TimerTypeStats.objects.bulk_create([
+        TimerTypeStats(
+            timer_type_id=type_id,
+            user_id=user_id,
+            timer_count=count,
+            total_time=time or 0,
+            total_goal=goal or 0,
+        )
+        for type_id, count, time, goal in per_type
+    ])
+
+
+def summary(user_id):
+    """Return the user's totals and per-type rows, building if needed."""
+    user_stats = UserStats.objects.filter(user_id=user_id).first()
+    if user_stats is None:
+        rebuild(user_id)
+        user_stats = UserStats.objects.get(user_id=user_id)
+    types = (TimerTypeStats.objects
+             .filter(user_id=user_id)
+             .order_by('-total_time', 'timer_type__name')
+             .values(
+                 'timer_type_id',
+                 'timer_type__name',
+                 'timer_count',
+                 'total_time',
+                 'total_goal',
+             ))
+    return user_stats, list(types)
+
+
+def buckets(user_id, kind, since=None, until=None):
+    """Sum logged session time per day, week or month."""
+    sessions = (TimerSession.objects
+                .filter(user_id=user_id)
+                .annotate(at=Coalesce('started_at', 'created_at')))
+    if since is not None:
+        sessions = sessions.filter(at__gte=since)
+    if until is not None:
+        sessions = sessions.filter(at__lt=until)
+    return list(
+        sessions
+        .annotate(start=Trunc('at', kind))
+        .values('start')
+        .annotate(total_time=Sum('duration'))
+        .order_by('start')
+    )
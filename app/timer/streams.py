@@ -0,0 +1,180 @@
+"""
+ASGI app streaming a user's timer events as server-sent events.
+
+Served at ``/api/timer/events`` when running under ASGI. Each stream is
+one coroutine and one bounded queue with no thread, and sends a comment
+every ``TIMER_EVENTS_HEARTBEAT`` seconds so proxies keep it open.
+"""
+import asyncio
+import json
+import secrets
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from rest_framework import exceptions
+
+from core.async_views import run_in_pool
+from timer import (events, sync)
+from user.authentication import CachedTokenAuthentication
+
+
+PATH = '/api/timer/events'
+HEARTBEAT = b': ping\n\n'
+TICKET_SALT = 'timer.streams.ticket'
+
+
+def format_event(event):
+    """Encode an event as an SSE frame whose id is its sync token."""
+    lines = []
+    if event.get('token') is not None:
+        lines.append(f'id: {event["token"]}')
+    lines.append(f'event: {event["type"]}')
+    lines.append('data: ' + json.dumps(event, separators=(',', ':')))
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def issue_ticket(user):
+    """Return a ticket that opens one stream for user.
+
+    Browsers' EventSource cannot set headers, so it passes the ticket in
+    the query string instead of the token: a ticket that ends up in an
+    access log has expired after ``TIMER_EVENTS_TICKET_TTL`` seconds.
+    """
+    return signing.dumps([user.pk, secrets.token_hex(8)], salt=TICKET_SALT)
+
+
+def _redeem_ticket(ticket):
+    """Return the id of the user a ticket was issued to, or None."""
+    ttl = settings.TIMER_EVENTS_TICKET_TTL
+    try:
+        user_id, _ = signing.loads(ticket, salt=TICKET_SALT, max_age=ttl)
+    except signing.BadSignature:
+        return None
+    used = caches[settings.TIMER_CACHE_ALIAS].add(
+        f'timer:events:ticket:{ticket}', True, ttl,
+    )
+    return user_id if used else None
+
+
+def _credentials_from_scope(scope):
+    """Return (token key, ticket) from the request, either may be None."""
+    for name, value in scope['headers']:
+        if name == b'authorization':
+            keyword, _, key = value.decode().partition(' ')
+            if keyword == 'Token' and key:
+                return key, None
+    query = parse_qs(scope.get('query_string', b'').decode())
+    return None, query.get('ticket', [None])[0]
+
+
+def _authenticate(key, ticket):
+    """Return (user, head token) for key or ticket, or None if invalid."""
+    if key:
+        try:
+            user, _ = CachedTokenAuthentication().authenticate_credentials(
+                key,
+            )
+        except exceptions.AuthenticationFailed:
+            return None
+    else:
+        user_id = _redeem_ticket(ticket)
+        user = user_id and get_user_model().objects.filter(
+            pk=user_id,
+            is_active=True,
+        ).first()
+        if not user:
+            return None
+    # Before reading the head, so no event after it goes unpublished.
+    events.get_broker().announce(user.pk)
+    return user, sync.current_seq(user.pk)
+
+
+async def _send_error(send, status, detail):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps({'detail': detail}).encode(),
+    })
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def application(scope, receive, send):
+    """Stream events for the authenticated user until they disconnect.
+
+    The first event is ``ready`` carrying the current sync token; clients
+    catch up with ``/api/timer/changes`` from their stored token and then
+    apply pushed events. A ``resync`` event means events were dropped
+    because the client fell behind, and the stream ends.
+    """
+    if scope['method'] != 'GET':
+        await _send_error(send, 405, 'Method not allowed.')
+        return
+    key, ticket = _credentials_from_scope(scope)
+    auth = (key or ticket) and await run_in_pool(_authenticate, key, ticket)
+    if not auth:
+        await _send_error(send, 401, 'Invalid token.')
+        return
+    user, head = auth
+
+    broker = events.get_broker()
+    subscription = broker.subscribe(user.pk)
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        event = {'type': 'ready', 'token': head}
+        while event is not events.RESYNC:
+            body = HEARTBEAT if event is None else format_event(event)
+            # Awaiting send applies the server's flow control, so a slow
+            # client fills its own queue rather than server memory.
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': True,
+            })
+            get = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {get, disconnect},
+                timeout=settings.TIMER_EVENTS_HEARTBEAT,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if get not in done:
+                get.cancel()
+            if disconnect in done:
+                return
+            event = get.result() if get in done else None
+        await send({
+            'type': 'http.response.body',
+            'body': format_event(events.RESYNC),
+        })
+    finally:
+        broker.unsubscribe(subscription)
+        disconnect.cancel()
+
+
+def route(django_app):
+    """Wrap the Django ASGI app, serving the event stream at PATH."""
+    async def app(scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == PATH:
+            await application(scope, receive, send)
+        else:
+            await django_app(scope, receive, send)
+    return app
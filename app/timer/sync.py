@@ -0,0 +1,178 @@
+"""
+Per-user change sequence backing delta sync of timers and types.
+
+Every write allocates the next number from the user's counter and stamps
+it on the rows it touches, or on a Tombstone for deletes. A sync token is
+the highest number a client has seen, so a sync reads only the rows
+stamped after it. A page cut short inside one number also records the
+row it stopped at.
+"""
+from collections import namedtuple
+from itertools import chain
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import (ChangeSequence, Timer, TimerType, Tombstone)
+
+
+Changes = namedtuple(
+    'Changes',
+    ['token', 'has_more', 'timers', 'timer_types', 'deleted'],
+)
+
+# How far a client has synced: every change number below seq, and the
+# rows of seq up to id in the rank-th of types, timers and tombstones.
+# A rank of END covers all of seq.
+Position = namedtuple('Position', ['seq', 'rank', 'id'])
+TYPES, TIMERS, TOMBSTONES, END = range(4)
+
+
+class InvalidToken(Exception):
+    """Raised for a sync token this server did not issue."""
+
+
+def parse_token(value):
+    """Return the Position encoded in a sync token.
+
+    A token is the last change number seen, or, for a page that ends
+    part way through one change number, ``seq.rank.id``.
+    """
+    parts = value.split('.')
+    if len(parts) not in (1, 3) or \
+            not all(p.isascii() and p.isdigit() for p in parts):
+        raise InvalidToken(value)
+    if len(parts) == 1:
+        return Position(int(value), END, 0)
+    position = Position(*map(int, parts))
+    if position.rank >= END:
+        raise InvalidToken(value)
+    return position
+
+
+def format_token(position):
+    """Return the sync token for a Position."""
+    if position.rank == END:
+        return str(position.seq)
+    return '.'.join(map(str, position))
+
+
+def next_seq(user_id):
+    """Allocate and return the user's next change number.
+
+    Must run inside a transaction. The counter row stays locked until
+    commit, so a user's changes become visible in sequence order and a
+    client never skips a number that commits late.
+    """
+    table = ChangeSequence._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (user_id, value) VALUES (%s, 1) '
+            f'ON CONFLICT (user_id) DO UPDATE '
+            f'SET value = {table}.value + 1 RETURNING value',
+            [user_id],
+        )
+        return cursor.fetchone()[0]
+
+
+def current_seq(user_id, using=None):
+    """Return the last committed change number for a user."""
+    return (ChangeSequence.objects
+            .db_manager(using)
+            .filter(pk=user_id)
+            .values_list('value', flat=True)
+            .first()) or 0
+
+
+def touch(queryset, seq):
+    """Stamp rows changed without save() with seq."""
+    return queryset.update(change_seq=seq, updated_at=timezone.now())
+
+
+def bury(user_id, seq, timers=(), timer_types=()):
+    """Record tombstones for deleted timer and type ids."""
+    Tombstone.objects.bulk_create(chain(
+        (Tombstone(user_id=user_id, kind=Tombstone.TIMER,
+                   object_id=pk, change_seq=seq) for pk in timers),
+        (Tombstone(user_id=user_id, kind=Tombstone.TIMER_TYPE,
+                   object_id=pk, change_seq=seq) for pk in timer_types),
+    ))
+
+
+def _after(position, rank):
+    """Match the rows of source rank past position."""
+    if rank < position.rank:
+        return Q(change_seq__gt=position.seq)
+    if rank > position.rank:
+        return Q(change_seq__gte=position.seq)
+    return Q(change_seq__gt=position.seq) | \
+        Q(change_seq=position.seq, id__gt=position.id)
+
+
+def _upto(position, rank):
+    """Match the rows of source rank up to and including position."""
+    if rank < position.rank:
+        return Q(change_seq__lte=position.seq)
+    if rank > position.rank:
+        return Q(change_seq__lt=position.seq)
+    return Q(change_seq__lt=position.seq) | \
+        Q(change_seq=position.seq, id__lte=position.id)
+
+
+def changes(user, since=None, limit=500):
+    """Return what changed for user after Position since.
+
+    At most limit rows are returned. A page ends on a complete change
+    number when it can, and otherwise part way through one, so a single
+    write touching many rows is still paged. ``since=None`` returns
+    everything. Raises InvalidToken for a token ahead of the user's
+    counter.
+    """
+    head = current_seq(user.pk)
+    if since is not None and since.seq > head:
+        raise InvalidToken(since)
+    if since == Position(head, END, 0):
+        return Changes(format_token(since), False, Timer.objects.none(),
+                       TimerType.objects.none(),
+                       {'timers': [], 'timer_types': []})
+
+    start = since or Position(-1, END, 0)
+    sources = {
+        TYPES: TimerType.objects.filter(user=user),
+        TIMERS: Timer.objects.filter(user=user),
+        TOMBSTONES: Tombstone.objects.filter(user=user),
+    }
+    keys = sorted(chain.from_iterable(
+        (Position(seq, rank, pk) for seq, pk in (
+            qs.filter(_after(start, rank), change_seq__lte=head)
+            .order_by('change_seq', 'id')
+            .values_list('change_seq', 'id')[:limit + 1]
+        ))
+        for rank, qs in sources.items()
+    ))
+    end = Position(head, END, 0)
+    if len(keys) > limit:
+        end = keys[limit - 1]
+        if keys[limit].seq > end.seq:
+            end = Position(end.seq, END, 0)
+
+    def window(rank):
+        return _after(start, rank) & _upto(end, rank)
+
+    deleted = {'timers': [], 'timer_types': []}
+    for kind, object_id in (sources[TOMBSTONES]
+                            .filter(window(TOMBSTONES))
+                            .order_by('change_seq', 'id')
+                            .values_list('kind', 'object_id')):
+        key = 'timers' if kind == Tombstone.TIMER else 'timer_types'
+        deleted[key].append(object_id)
+    return Changes(
+        format_token(end),
+        end != Position(head, END, 0),
+        Timer.objects.for_user(user).filter(window(TIMERS))
+        .order_by('change_seq', 'id'),
+        sources[TYPES].filter(window(TYPES))
+        .order_by('change_seq', 'id'),
+        deleted,
+    )
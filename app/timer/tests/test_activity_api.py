@@ -0,0 +1,200 @@
+"""
+Tests for the daily activity rollups and the activity API.
+"""
+import datetime
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (SimpleTestCase, TestCase)
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (DailyActivity, Timer)
+from timer import activity
+
+
+ACTIVITY_URL = reverse('timer:timer-activity')
+
+
+def rollup(user):
+    """Return {(timer_id, day): seconds} of a user's rollup rows."""
+    return {
+        (row.timer_id, row.day): row.seconds
+        for row in DailyActivity.objects.filter(user=user)
+    }
+
+
+class ActivityTests(SimpleTestCase):
+    """Test splitting spans into days and counting streaks."""
+
+    def test_spread_splits_at_midnight(self):
+        """Test a span over midnight counts towards both days."""
+        started_at = datetime.datetime(
+            2026, 3, 1, 23, 30, tzinfo=datetime.timezone.utc,
+        )
+
+        self.assertEqual(list(activity.spread(started_at, 7200)), [
+            (datetime.date(2026, 3, 1), 1800),
+            (datetime.date(2026, 3, 2), 5400),
+        ])
+
+    def test_streaks(self):
+        """Test current and longest runs of consecutive days."""
+        day = datetime.date(2026, 3, 10)
+        active = [
+            day - datetime.timedelta(days=n) for n in (9, 8, 7, 6, 2, 1)
+        ]
+
+        self.assertEqual(activity.streaks(active, day), (2, 4))
+        self.assertEqual(
+            activity.streaks(active, day + datetime.timedelta(days=1)),
+            (0, 4),
+        )
+        self.assertEqual(activity.streaks([], day), (0, 0))
+
+
+class ActivityApiTests(TestCase):
+    """Test time added to timers shows up as daily activity."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.timer = Timer.objects.create(user=self.user, title='Piano')
+        self.today = timezone.localdate()
+
+    def days_ago(self, n):
+        return self.today - datetime.timedelta(days=n)
+
+    def test_stop_adds_activity(self):
+        """Test stopping a timer records its run."""
+        self.timer.started_at = timezone.now() - datetime.timedelta(
+            seconds=90,
+        )
+        self.timer.save()
+
+        self.client.post(reverse('timer:timer-stop', args=[self.timer.id]))
+        res = self.client.get(ACTIVITY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = res.json()
+        self.assertEqual(data['total_time'], 90)
+        self.assertEqual(data['end'], self.today.isoformat())
+        self.assertEqual(data['start'], self.days_ago(365).isoformat())
+        self.assertEqual(data['current_streak'], 1)
+
+    def test_default_range_moves_at_midnight(self):
+        """Test a cached default range is not served the next day."""
+        self.client.get(ACTIVITY_URL)
+        tomorrow = self.today + datetime.timedelta(days=1)
+
+        with patch.object(timezone, 'localdate', return_value=tomorrow):
+            res = self.client.get(ACTIVITY_URL)
+
+        self.assertEqual(res.json()['end'], tomorrow.isoformat())
+
+    def test_sessions_add_to_their_days(self):
+        """Test sessions count towards the days they ran on."""
+        url = reverse('timer:timer-session-create', args=[self.timer.id])
+        started_at = datetime.datetime.combine(
+            self.days_ago(3),
+            datetime.time(23, 0),
+            tzinfo=datetime.timezone.utc,
+        )
+        self.client.post(url, [
+            {'duration': 7200, 'started_at': started_at.isoformat()},
+            {'duration': 60, 'started_at': started_at.isoformat()},
+        ], format='json')
+
+        self.assertEqual(rollup(self.user), {
+            (self.timer.id, self.days_ago(3)): 3660,
+            (self.timer.id, self.days_ago(2)): 3600,
+        })
+
+    def test_updates_add_only_increases(self):
+        """Test raising current_time adds activity and lowering does not."""
+        url = reverse('timer:timer-detail', args=[self.timer.id])
+        self.client.put(url, {'title': 'Piano', 'current_time': 100})
+        self.client.put(url, {'title': 'Piano', 'current_time': 40})
+        self.client.post(reverse('timer:timer-batch'), {'operations': [
+            {'op': 'update', 'id': self.timer.id,
+             'data': {'current_time': 70}},
+        ]}, format='json')
+
+        self.assertEqual(sum(rollup(self.user).values()), 130)
+        self.assertEqual(DailyActivity.objects.count(), 1)
+
+    def test_range_and_streaks(self):
+        """Test days are summed over timers within the range."""
+        other = Timer.objects.create(user=self.user, title='Guitar')
+        activity.add(self.user.pk, {
+            self.timer.id: [
+                (timezone.now() - datetime.timedelta(days=n), 60)
+                for n in (1, 2, 5, 6, 7, 40)
+            ],
+            other.id: [(timezone.now() - datetime.timedelta(days=1), 30)],
+        })
+        stranger = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        activity.add(stranger.pk, {
+            Timer.objects.create(user=stranger, title='Chess').id: [
+                (timezone.now(), 60),
+            ],
+        })
+
+        res = self.client.get(ACTIVITY_URL, {
+            'from': self.days_ago(30).isoformat(),
+            'to': self.today.isoformat(),
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = res.json()
+        self.assertEqual(data['days'][-1], {
+            'day': self.days_ago(1).isoformat(),
+            'total_time': 90,
+        })
+        self.assertEqual(data['active_days'], 5)
+        self.assertEqual(data['total_time'], 330)
+        self.assertEqual(data['current_streak'], 2)
+        self.assertEqual(data['longest_streak'], 3)
+
+    def test_deleted_timer_activity_removed(self):
+        """Test deleting a timer drops its activity."""
+        activity.add(self.user.pk, {self.timer.id: [(timezone.now(), 60)]})
+
+        self.client.delete(reverse('timer:timer-detail', args=[self.timer.id]))
+
+        self.assertFalse(DailyActivity.objects.exists())
+
+    def test_invalid_range_rejected(self):
+        """Test bad dates and ranges return 400."""
+        for params in (
+            {'from': 'yesterday'},
+            {'to': '2026-02-30'},
+            {'from': '2026-03-02', 'to': '2026-03-01'},
+            {'from': '2024-01-01', 'to': '2026-01-01'},
+        ):
+            res = self.client.get(ACTIVITY_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_activity_is_one_query(self):
+        """Test a year of activity is read with one query."""
+        activity.add(self.user.pk, {self.timer.id: [
+            (timezone.now() - datetime.timedelta(days=n), 60)
+            for n in range(365)
+        ]})
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ACTIVITY_URL)
+
+        self.assertEqual(res.json()['longest_streak'], 365)
@@ -0,0 +1,228 @@
+"""
+Tests for the batch timer API.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Timer, TimerType, UserStats)
+from timer import sync
+
+BATCH_URL = reverse('timer:timer-batch')
+TIMERS_URL = reverse('timer:timer-list-create')
+
+
+class TimerBatchApiTests(TestCase):
+    """Test applying several timer operations in one request."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_timer(self, title, *type_names):
+        timer = Timer.objects.create(user=self.user, title=title)
+        for name in type_names:
+            timer_type, _ = TimerType.objects.get_or_create(
+                user=self.user,
+                name=name,
+            )
+            timer.timer_type.add(timer_type)
+        return timer
+
+    def test_batch_create_update_delete(self):
+        """Test mixed operations apply and report results in order."""
+        keep = self.create_timer('Keep', 'Music')
+        drop = self.create_timer('Drop', 'Music')
+        payload = {'operations': [
+            {'op': 'create', 'data': {
+                'title': 'Piano',
+                'timer_type': [{'name': 'Music'}, {'name': 'Daily'}],
+            }},
+            {'op': 'update', 'id': keep.id, 'data': {
+                'current_time': 90,
+                'timer_type': [{'name': 'Daily'}],
+            }},
+            {'op': 'delete', 'id': drop.id},
+        ]}
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r['op'], r['status']) for r in res.data],
+            [('create', 201), ('update', 200), ('delete', 204)],
+        )
+        created = Timer.objects.get(title='Piano')
+        self.assertEqual(res.data[0]['id'], created.id)
+        self.assertEqual(
+            sorted(t['name'] for t in res.data[0]['data']['timer_type']),
+            ['Daily', 'Music'],
+        )
+        keep.refresh_from_db()
+        self.assertEqual(keep.title, 'Keep')
+        self.assertEqual(keep.current_time, 90)
+        self.assertEqual(
+            [t.name for t in keep.timer_type.all()], ['Daily'],
+        )
+        self.assertFalse(Timer.objects.filter(id=drop.id).exists())
+        self.assertEqual(
+            TimerType.objects.filter(user=self.user, name='Daily').count(),
+            1,
+        )
+
+    def test_batch_invalid_operation_applies_nothing(self):
+        """Test one invalid operation rejects the whole batch."""
+        timer = self.create_timer('Keep')
+        payload = {'operations': [
+            {'op': 'create', 'data': {'title': 'Piano'}},
+            {'op': 'update', 'id': timer.id, 'data': {'current_time': 'x'}},
+        ]}
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['operations'][0]['index'], 1)
+        self.assertIn('current_time', res.data['operations'][0]['errors'])
+        self.assertFalse(Timer.objects.filter(title='Piano').exists())
+
+    def test_batch_other_users_timer_not_found(self):
+        """Test operations cannot touch another user's timer."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        timer = Timer.objects.create(user=other, title='Theirs')
+
+        res = self.client.post(BATCH_URL, {'operations': [
+            {'op': 'delete', 'id': timer.id},
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Timer.objects.filter(id=timer.id).exists())
+
+    def test_batch_duplicate_id_rejected(self):
+        """Test the same timer cannot appear in two operations."""
+        timer = self.create_timer('Keep')
+
+        res = self.client.post(BATCH_URL, {'operations': [
+            {'op': 'update', 'id': timer.id, 'data': {'title': 'A'}},
+            {'op': 'delete', 'id': timer.id},
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Timer.objects.filter(id=timer.id).exists())
+
+    def test_batch_missing_id_and_data(self):
+        """Test the operation envelope is validated."""
+        res = self.client.post(BATCH_URL, {'operations': [
+            {'op': 'update', 'data': {'title': 'A'}},
+            {'op': 'create'},
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data['operations'][0])
+        self.assertIn('data', res.data['operations'][1])
+
+    @override_settings(TIMER_BATCH_MAX_OPERATIONS=2)
+    def test_batch_operation_limit(self):
+        """Test batches above the configured size are rejected."""
+        ops = [{'op': 'create', 'data': {'title': str(i)}} for i in range(3)]
+
+        res = self.client.post(BATCH_URL, {'operations': ops}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Timer.objects.count(), 0)
+
+    def test_batch_query_count_independent_of_size(self):
+        """Test larger batches do not run more queries."""
+        def run(n):
+            timers = [self.create_timer(f'T{i}') for i in range(n)]
+            ops = [
+                {'op': 'create', 'data': {
+                    'title': f'New {i}',
+                    'timer_type': [{'name': f'type {i}'}],
+                }}
+                for i in range(n)
+            ] + [
+                {'op': 'update', 'id': t.id, 'data': {
+                    'current_time': 5,
+                    'timer_type': [{'name': 'shared'}],
+                }}
+                for t in timers
+            ]
+            return {'operations': ops}
+
+        self.client.post(BATCH_URL, run(1), format='json')
+        small, large = run(2), run(20)
+        with CaptureQueriesContext(connection) as small_ctx:
+            res = self.client.post(BATCH_URL, small, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as large_ctx:
+            res = self.client.post(BATCH_URL, large, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(small_ctx), len(large_ctx))
+
+    def test_batch_updates_stats_and_cache(self):
+        """Test stats reflect the batch and cached lists are invalidated."""
+        timer = self.create_timer('Keep')
+        self.client.get(TIMERS_URL)
+
+        res = self.client.post(BATCH_URL, {'operations': [
+            {'op': 'create', 'data': {'title': 'New', 'current_time': 10}},
+            {'op': 'update', 'id': timer.id, 'data': {'current_time': 20}},
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual(stats.timer_count, 2)
+        self.assertEqual(stats.total_time, 30)
+        listed = self.client.get(TIMERS_URL).json()['results']
+        self.assertEqual(len(listed), 2)
+
+    def test_batch_keeps_concurrent_stop(self):
+        """Test a batch does not write back a stale clock or total."""
+        running = self.create_timer('Running')
+        running.started_at = timezone.now() - timedelta(seconds=60)
+        running.save()
+        other = self.create_timer('Other')
+        next_seq = sync.next_seq
+
+        def stop_first(user_id):
+            # A stop that commits while the batch waits for the lock.
+            Timer.objects.filter(pk=running.pk).update(
+                current_time=F('current_time') + 60,
+                started_at=None,
+            )
+            return next_seq(user_id)
+
+        with patch.object(sync, 'next_seq', stop_first):
+            res = self.client.post(BATCH_URL, {'operations': [
+                {'op': 'update', 'id': running.id,
+                 'data': {'title': 'Renamed'}},
+                {'op': 'update', 'id': other.id,
+                 'data': {'current_time': 5}},
+            ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        running.refresh_from_db()
+        self.assertEqual(running.title, 'Renamed')
+        self.assertEqual(running.current_time, 60)
+        self.assertIsNone(running.started_at)
+        other.refresh_from_db()
+        self.assertEqual(other.current_time, 5)
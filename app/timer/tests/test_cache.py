@@ -0,0 +1,91 @@
+"""
+Tests for the cached timer list responses.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Timer, TimerType)
+
+
+TIMERS_URL = reverse('timer:timer-list-create')
+TYPES_URL = reverse('timer:timer-type-list-create')
+
+
+class CachedListTests(TestCase):
+    """Test list responses are cached per user and version."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Timer.objects.create(user=self.user, title='Piano')
+
+    def test_repeat_request_served_from_cache(self):
+        """Test an unchanged list is served without hitting the DB."""
+        first = self.client.get(TIMERS_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(TIMERS_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        """Test a matching ETag returns 304 Not Modified."""
+        res = self.client.get(TIMERS_URL)
+
+        res = self.client.get(TIMERS_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_write_invalidates_lists(self):
+        """Test creating a timer invalidates both cached lists."""
+        timers = self.client.get(TIMERS_URL)
+        self.client.get(TYPES_URL)
+
+        self.client.post(
+            TIMERS_URL,
+            {'title': 'Guitar', 'timer_type': [{'name': 'music'}]},
+            format='json',
+        )
+
+        res = self.client.get(TIMERS_URL, HTTP_IF_NONE_MATCH=timers['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()['results']), 2)
+        res = self.client.get(TYPES_URL)
+        self.assertEqual([t['name'] for t in res.json()], ['music'])
+
+    def test_type_delete_invalidates_lists(self):
+        """Test deleting a type invalidates the cached type list."""
+        timer_type = TimerType.objects.create(user=self.user, name='music')
+        self.assertEqual(len(self.client.get(TYPES_URL).json()), 1)
+
+        self.client.delete(
+            reverse('timer:timer-type-update', args=[timer_type.id])
+        )
+
+        self.assertEqual(self.client.get(TYPES_URL).json(), [])
+
+    def test_cache_is_per_user(self):
+        """Test users never see each other's cached lists."""
+        self.client.get(TIMERS_URL)
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(TIMERS_URL)
+
+        self.assertEqual(res.json()['results'], [])
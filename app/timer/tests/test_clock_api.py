@@ -0,0 +1,163 @@
+"""
+Tests for starting and stopping timers on the server.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Timer, TimerSession, TimerType, UserStats)
+from timer import stats
+
+TIMERS_URL = reverse('timer:timer-list-create')
+
+
+def start_url(timer_id):
+    """Create and return a timer start URL."""
+    return reverse('timer:timer-start', args=[timer_id])
+
+
+def stop_url(timer_id):
+    """Create and return a timer stop URL."""
+    return reverse('timer:timer-stop', args=[timer_id])
+
+
+def detail_url(timer_id):
+    """Create and return a timer detail URL."""
+    return reverse('timer:timer-detail', args=[timer_id])
+
+
+class TimerClockApiTests(TestCase):
+    """Test the server-side timer clock."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.timer = Timer.objects.create(
+            user=self.user,
+            title='Piano',
+            current_time=100,
+        )
+        self.timer.timer_type.add(
+            TimerType.objects.create(user=self.user, name='Music')
+        )
+        stats.rebuild(self.user.pk)
+
+    def run_for(self, seconds):
+        """Mark the timer as started seconds ago."""
+        Timer.objects.filter(pk=self.timer.pk).update(
+            started_at=timezone.now() - timedelta(seconds=seconds),
+        )
+
+    def test_start_timer(self):
+        """Test starting stores the start time and nothing else."""
+        res = self.client.post(start_url(self.timer.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(res.data['started_at'])
+        self.assertEqual(res.data['current_time'], 100)
+        self.timer.refresh_from_db()
+        self.assertIsNotNone(self.timer.started_at)
+        self.assertEqual(self.timer.current_time, 100)
+
+    def test_start_running_timer_is_noop(self):
+        """Test a second start keeps the original start time."""
+        self.client.post(start_url(self.timer.id))
+        self.timer.refresh_from_db()
+
+        res = self.client.post(start_url(self.timer.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        started, seq = self.timer.started_at, self.timer.change_seq
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.started_at, started)
+        self.assertEqual(self.timer.change_seq, seq)
+
+    def test_running_time_computed_on_read(self):
+        """Test reads add the elapsed time without writing it."""
+        self.run_for(90)
+
+        res = self.client.get(detail_url(self.timer.id))
+
+        self.assertIn(res.data['current_time'], (190, 191))
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.current_time, 100)
+
+    def test_stop_folds_elapsed_time(self):
+        """Test stopping adds the run to the timer, log and totals."""
+        self.run_for(90)
+
+        res = self.client.post(stop_url(self.timer.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data['started_at'])
+        self.timer.refresh_from_db()
+        self.assertIsNone(self.timer.started_at)
+        self.assertIn(self.timer.current_time, (190, 191))
+        self.assertEqual(res.data['current_time'], self.timer.current_time)
+        self.assertEqual(self.timer.last_session,
+                         self.timer.current_time - 100)
+        session = TimerSession.objects.get(timer=self.timer)
+        self.assertEqual(session.duration, self.timer.last_session)
+        self.assertIsNotNone(session.started_at)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).total_time,
+            self.timer.current_time,
+        )
+
+    def test_stop_stopped_timer_is_noop(self):
+        """Test stopping a stopped timer writes nothing."""
+        res = self.client.post(stop_url(self.timer.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['current_time'], 100)
+        self.assertFalse(TimerSession.objects.exists())
+
+    def test_other_users_timer_not_found(self):
+        """Test users cannot start or stop others' timers."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        timer = Timer.objects.create(user=other, title='Theirs')
+
+        for url in (start_url(timer.id), stop_url(timer.id)):
+            res = self.client.post(url)
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        timer.refresh_from_db()
+        self.assertIsNone(timer.started_at)
+
+    def test_put_current_time_restarts_clock(self):
+        """Test a client-set total on a running timer is not counted twice."""
+        self.run_for(90)
+
+        res = self.client.put(detail_url(self.timer.id), {
+            'title': 'Piano',
+            'current_time': 500,
+        }, format='json')
+
+        self.assertEqual(res.data['current_time'], 500)
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.current_time, 500)
+        self.assertLess(self.timer.elapsed(), 5)
+
+    def test_list_with_running_timer_not_cached(self):
+        """Test cached lists cannot serve a stale running time."""
+        self.client.post(start_url(self.timer.id))
+        self.client.get(TIMERS_URL)
+        self.run_for(60)
+
+        res = self.client.get(TIMERS_URL)
+
+        self.assertIn(res.json()['results'][0]['current_time'], (160, 161))
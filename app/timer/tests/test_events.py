@@ -0,0 +1,293 @@
+"""
+Tests for live timer event publishing and the SSE stream.
+"""
+import asyncio
+import json
+import threading
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.async_views import run_in_pool
+from timer import (events, streams)
+from user.authentication import token_cache
+
+TIMERS_URL = reverse('timer:timer-list-create')
+
+
+class LoopThread:
+    """An event loop on a background thread, as under an ASGI server."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+
+    def run(self, coro, timeout=2):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(
+            timeout
+        )
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class BrokerTests(SimpleTestCase):
+    """Test the in-process broker."""
+
+    def setUp(self):
+        self.loop = LoopThread()
+        self.addCleanup(self.loop.close)
+        self.broker = events.LocalBroker()
+
+    def subscribe(self, user_id):
+        async def subscribe():
+            return self.broker.subscribe(user_id)
+        return self.loop.run(subscribe())
+
+    def drain(self, subscription):
+        async def drain():
+            await asyncio.sleep(0)
+            items = []
+            while not subscription.queue.empty():
+                items.append(subscription.queue.get_nowait())
+            return items
+        return self.loop.run(drain())
+
+    def test_publish_reaches_only_that_users_streams(self):
+        """Test events are delivered per user."""
+        mine, theirs = self.subscribe(1), self.subscribe(2)
+
+        self.broker.publish(1, {'type': 'timer.updated'})
+
+        self.assertEqual(self.drain(mine), [{'type': 'timer.updated'}])
+        self.assertEqual(self.drain(theirs), [])
+        self.assertEqual(self.broker.stream_count(), 2)
+
+    @override_settings(TIMER_EVENTS_QUEUE_SIZE=2)
+    def test_slow_stream_gets_single_resync(self):
+        """Test a full queue is replaced by one resync event."""
+        subscription = self.subscribe(1)
+
+        for i in range(5):
+            self.broker.publish(1, {'type': 'timer.tick', 'token': i})
+
+        self.assertEqual(self.drain(subscription), [events.RESYNC])
+
+    def test_unsubscribe(self):
+        """Test closed streams stop counting and receiving."""
+        subscription = self.subscribe(1)
+
+        self.broker.unsubscribe(subscription)
+
+        self.assertFalse(self.broker.wants(1))
+        self.assertEqual(self.broker.stream_count(), 0)
+
+
+class PublishTests(TestCase):
+    """Test writes publish once their transaction commits."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.loop = LoopThread()
+        self.addCleanup(self.loop.close)
+        broker = events.get_broker()
+
+        async def subscribe():
+            return broker.subscribe(self.user.pk)
+        self.subscription = self.loop.run(subscribe())
+        self.addCleanup(broker.unsubscribe, self.subscription)
+
+    def next_event(self):
+        return self.loop.run(
+            asyncio.wait_for(self.subscription.queue.get(), 1)
+        )
+
+    def test_create_publishes_type_and_timer(self):
+        """Test creating a timer pushes its new type and itself."""
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(TIMERS_URL, {
+                'title': 'Piano',
+                'timer_type': [{'name': 'Music'}],
+            }, format='json')
+
+        first, second = self.next_event(), self.next_event()
+        self.assertEqual(first['type'], 'type.created')
+        self.assertEqual(second['type'], 'timer.created')
+        self.assertEqual(second['data']['id'], res.data['id'])
+        self.assertEqual(second['data']['timer_type'][0]['name'], 'Music')
+
+    def test_nothing_published_without_commit(self):
+        """Test rolled back or uncommitted writes publish nothing."""
+        self.client.post(TIMERS_URL, {'title': 'Piano'}, format='json')
+
+        self.assertTrue(self.subscription.queue.empty())
+
+    def test_logged_session_publishes_tick(self):
+        """Test logging time pushes the timer's new total."""
+        timer = self.client.post(
+            TIMERS_URL, {'title': 'Piano'}, format='json',
+        ).data
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('timer:timer-session-create', args=[timer['id']]),
+                {'duration': 30},
+                format='json',
+            )
+
+        event = self.next_event()
+        self.assertEqual(event['type'], 'timer.tick')
+        self.assertEqual(event['data']['current_time'], 30)
+
+
+@override_settings(TIMER_EVENTS_HEARTBEAT=0.05)
+class StreamTests(TransactionTestCase):
+    """Test the SSE ASGI app end to end."""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.token = Token.objects.create(user=self.user).key
+
+    def scope(self, token=None, query=''):
+        headers = []
+        if token is not None:
+            headers.append((b'authorization', f'Token {token}'.encode()))
+        return {
+            'type': 'http',
+            'method': 'GET',
+            'path': streams.PATH,
+            'query_string': query.encode(),
+            'headers': headers,
+        }
+
+    async def stream(self, until, **scope):
+        """Collect frames until until(frames) holds, then disconnect."""
+        disconnected = asyncio.Event()
+        messages = []
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+            frames = b''.join(m.get('body', b'') for m in messages)
+            if until(frames.decode()):
+                disconnected.set()
+
+        await asyncio.wait_for(
+            streams.application(self.scope(**scope), receive, send),
+            timeout=3,
+        )
+        return messages
+
+    def test_invalid_token_rejected(self):
+        """Test streams require a valid token."""
+        for scope in ({'token': 'bad'}, {'query': f'token={self.token}'}):
+            messages = asyncio.run(self.stream(lambda frames: False, **scope))
+
+            self.assertEqual(messages[0]['status'], 401)
+
+    def test_ticket_opens_one_stream(self):
+        """Test a ticket from the API opens a stream only once."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        res = client.post(reverse('timer:timer-event-ticket'))
+        self.assertEqual(res.status_code, 201)
+        query = f'ticket={res.data["ticket"]}'
+
+        def ready(frames):
+            return 'event: ready' in frames
+
+        messages = asyncio.run(self.stream(ready, query=query))
+        self.assertEqual(messages[0]['status'], 200)
+        messages = asyncio.run(self.stream(ready, query=query))
+        self.assertEqual(messages[0]['status'], 401)
+
+    def test_expired_ticket_rejected(self):
+        """Test tickets stop working after TIMER_EVENTS_TICKET_TTL."""
+        ticket = streams.issue_ticket(self.user)
+
+        with override_settings(TIMER_EVENTS_TICKET_TTL=-1):
+            messages = asyncio.run(self.stream(
+                lambda frames: False,
+                query=f'ticket={ticket}',
+            ))
+
+        self.assertEqual(messages[0]['status'], 401)
+
+    def test_stream_sends_ready_heartbeat_and_events(self):
+        """Test a stream announces itself, keeps alive and pushes writes."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        async def run():
+            task = asyncio.ensure_future(self.stream(
+                lambda frames: 'event: timer.created' in frames,
+                token=self.token,
+            ))
+            while not events.get_broker().wants(self.user.pk):
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.1)
+            await run_in_pool(
+                client.post, TIMERS_URL, {'title': 'Piano'}, format='json',
+            )
+            return await task
+
+        messages = asyncio.run(run())
+
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/event-stream'), messages[0]['headers'],
+        )
+        frames = b''.join(m.get('body', b'') for m in messages).decode()
+        self.assertTrue(frames.startswith('id: 0\nevent: ready\n'))
+        self.assertIn(': ping\n\n', frames)
+        created = frames.split('event: timer.created\ndata: ')[1]
+        payload = json.loads(created.split('\n')[0])
+        self.assertEqual(payload['data']['title'], 'Piano')
+        self.assertFalse(events.get_broker().wants(self.user.pk))
+
+
+@skipUnless(settings.TIMER_EVENTS_REDIS_URL, 'Set REDIS_URL to run.')
+class RedisBrokerTests(SimpleTestCase):
+    """Test the Redis broker against a real server."""
+
+    def test_wants_only_users_with_streams(self):
+        """Test writers see streams announced by another process."""
+        url = settings.TIMER_EVENTS_REDIS_URL
+        streaming, writing = events.RedisBroker(url), events.RedisBroker(url)
+        user_id = threading.get_ident()
+        self.addCleanup(
+            streaming.client.delete,
+            streaming._presence_key(user_id),
+        )
+
+        self.assertFalse(writing.wants(user_id))
+        streaming.announce(user_id)
+        self.assertTrue(writing.wants(user_id))
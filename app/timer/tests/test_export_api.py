@@ -0,0 +1,131 @@
+"""
+Tests for the streaming timer export API.
+"""
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import (TestCase, override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Timer, TimerSession, TimerType)
+
+EXPORT_URL = reverse('timer:timer-export')
+
+
+def content(res):
+    """Return a streamed response body as text."""
+    return b''.join(res.streaming_content).decode()
+
+
+class TimerExportApiTests(TestCase):
+    """Test exporting a user's data."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        music = TimerType.objects.create(user=self.user, name='Music')
+        daily = TimerType.objects.create(user=self.user, name='Daily')
+        self.piano = Timer.objects.create(
+            user=self.user,
+            title='Piano, grand',
+            current_time=100,
+        )
+        self.piano.timer_type.add(music, daily)
+        self.reading = Timer.objects.create(user=self.user, title='Reading')
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        Timer.objects.create(user=other, title='Theirs')
+
+    def test_export_csv_by_default(self):
+        """Test timers stream as CSV with their type names."""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        self.assertIn('timers.csv', res['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content(res))))
+        self.assertEqual([r['title'] for r in rows],
+                         ['Piano, grand', 'Reading'])
+        self.assertEqual(rows[0]['current_time'], '100')
+        self.assertEqual(rows[0]['timer_types'], 'Daily;Music')
+        self.assertEqual(rows[1]['timer_types'], '')
+
+    def test_export_ndjson(self):
+        """Test NDJSON has one JSON object per line."""
+        res = self.client.get(EXPORT_URL, {'format': 'ndjson'})
+
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content(res).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['id'], self.piano.id)
+        self.assertEqual(rows[0]['timer_types'], ['Daily', 'Music'])
+        self.assertEqual(rows[1]['timer_types'], [])
+
+    def test_export_running_time(self):
+        """Test running timers export their time as of now."""
+        Timer.objects.filter(pk=self.piano.pk).update(
+            started_at=timezone.now() - timedelta(seconds=30),
+        )
+
+        res = self.client.get(EXPORT_URL, {'format': 'ndjson'})
+
+        first = json.loads(content(res).splitlines()[0])
+        self.assertIn(first['current_time'], (130, 131))
+
+    def test_export_sessions_and_types(self):
+        """Test the session log and types export too."""
+        TimerSession.objects.create(
+            timer=self.piano, user=self.user, duration=30,
+        )
+
+        sessions = self.client.get(EXPORT_URL, {'kind': 'sessions'})
+        types = self.client.get(
+            EXPORT_URL, {'kind': 'types', 'format': 'ndjson'},
+        )
+
+        rows = list(csv.DictReader(io.StringIO(content(sessions))))
+        self.assertEqual(rows[0]['duration'], '30')
+        self.assertEqual(rows[0]['timer_id'], str(self.piano.id))
+        names = [json.loads(line)['name']
+                 for line in content(types).splitlines()]
+        self.assertEqual(names, ['Music', 'Daily'])
+
+    @override_settings(TIMER_EXPORT_CHUNK_SIZE=1)
+    def test_export_streams_in_chunks(self):
+        """Test rows are written out as they are read."""
+        for i in range(250):
+            Timer.objects.create(user=self.user, title=f'Timer {i}')
+
+        res = self.client.get(EXPORT_URL, {'format': 'ndjson'})
+        chunks = list(res.streaming_content)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b''.join(chunks).count(b'\n'), 252)
+
+    def test_invalid_parameters(self):
+        """Test unknown formats and kinds are rejected as JSON."""
+        for params in ({'format': 'xml'}, {'kind': 'users'}):
+            res = self.client.get(EXPORT_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(res['Content-Type'], 'application/json')
+
+    def test_auth_required(self):
+        """Test exports require authentication."""
+        res = APIClient().get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,179 @@
+"""
+Tests for the bulk timer import API.
+"""
+import json
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import (TestCase, override_settings)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Timer, TimerType, UserStats)
+from timer import (importer, stats)
+
+IMPORT_URL = reverse('timer:timer-import')
+EXPORT_URL = reverse('timer:timer-export')
+
+CSV = (
+    'title,description,current_time,goal,timer_types\n'
+    'Piano,"Scales, arpeggios",100,3600,Music;Daily\n'
+    'Reading,,0,,\n'
+)
+
+
+class TimerImportApiTests(TestCase):
+    """Test importing timers in bulk."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        stats.rebuild(self.user.pk)
+
+    def post(self, body, fmt='csv'):
+        return self.client.post(
+            f'{IMPORT_URL}?format={fmt}',
+            body,
+            content_type='text/csv' if fmt == 'csv' else
+            'application/x-ndjson',
+        )
+
+    def test_import_csv(self):
+        """Test CSV rows become timers with their types."""
+        TimerType.objects.create(user=self.user, name='Music')
+
+        res = self.post(CSV)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['imported'], 2)
+        piano = Timer.objects.get(user=self.user, title='Piano')
+        self.assertEqual(piano.description, 'Scales, arpeggios')
+        self.assertEqual(piano.current_time, 100)
+        self.assertEqual(piano.goal, 3600)
+        self.assertEqual(piano.image_variants, {})
+        self.assertIsNone(piano.started_at)
+        self.assertEqual(
+            sorted(t.name for t in piano.timer_type.all()),
+            ['Daily', 'Music'],
+        )
+        self.assertEqual(
+            TimerType.objects.filter(user=self.user).count(), 2,
+        )
+        reading = Timer.objects.get(user=self.user, title='Reading')
+        self.assertEqual(reading.goal, 0)
+        self.assertFalse(reading.timer_type.exists())
+
+    def test_import_ndjson(self):
+        """Test NDJSON accepts type names or type objects."""
+        body = '\n'.join(json.dumps(row) for row in [
+            {'title': 'Piano', 'timer_types': ['Music']},
+            {'title': 'Guitar', 'timer_types': [{'name': 'Music'}]},
+        ])
+
+        res = self.post(body, fmt='ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        music = TimerType.objects.get(user=self.user, name='Music')
+        self.assertEqual(music.timer_set.count(), 2)
+
+    def test_import_keeps_stats_and_sync_current(self):
+        """Test totals and the change feed include imported timers."""
+        self.post(CSV)
+
+        user_stats = UserStats.objects.get(user=self.user)
+        self.assertEqual(user_stats.timer_count, 2)
+        self.assertEqual(user_stats.total_time, 100)
+        self.assertEqual(user_stats.total_goal, 3600)
+        res = self.client.get(reverse('timer:timer-changes'), {'since': 0})
+        self.assertEqual(len(res.data['timers']), 2)
+        self.assertEqual(len(res.data['timer_types']), 2)
+
+    def test_export_round_trip(self):
+        """Test an export imports back into the same timers."""
+        self.post(CSV)
+        exported = b''.join(
+            self.client.get(EXPORT_URL).streaming_content
+        ).decode()
+        Timer.objects.filter(user=self.user).delete()
+
+        res = self.post(exported)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(Timer.objects.values_list('title', 'current_time')),
+            [('Piano', 100), ('Reading', 0)],
+        )
+
+    def test_invalid_rows_import_nothing(self):
+        """Test any invalid row rejects the whole import."""
+        body = CSV + ',,x,,\nOk,,1,,\n' + ('y' * 256) + ',,,,\n'
+
+        res = self.post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = {e['row']: e['errors'] for e in res.data['rows']}
+        self.assertEqual(sorted(errors), [3, 5])
+        self.assertIn('title', errors[3])
+        self.assertIn('current_time', errors[3])
+        self.assertFalse(Timer.objects.exists())
+        self.assertFalse(TimerType.objects.exists())
+
+    @override_settings(TIMER_IMPORT_CHUNK_SIZE=1)
+    def test_invalid_row_after_written_chunks_rolls_back(self):
+        """Test chunks already written are rolled back on a later error."""
+        res = self.post(CSV + ',,,,\n')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Timer.objects.exists())
+
+    @override_settings(TIMER_IMPORT_MAX_ROWS=1)
+    def test_row_limit(self):
+        """Test requests over the row limit are rejected."""
+        res = self.post(CSV)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Timer.objects.exists())
+
+    def test_invalid_format_and_encoding(self):
+        """Test unknown formats and non-UTF-8 bodies are rejected."""
+        res = self.post(CSV, fmt='xml')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.post('title\nCaf\xe9\n'.encode('latin-1'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_without_copy(self):
+        """Test the bulk_create path used on other databases."""
+        with patch.object(connection, 'vendor', 'sqlite'), \
+                patch.object(importer, '_insert_copy') as copy:
+            res = self.post(CSV)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        copy.assert_not_called()
+        piano = Timer.objects.get(user=self.user, title='Piano')
+        self.assertEqual(piano.timer_type.count(), 2)
+
+    @skipIf(connection.vendor == 'postgresql', 'Postgres imports with COPY')
+    @override_settings(TIMER_IMPORT_CHUNK_SIZE=1)
+    def test_import_links_types_without_returned_ids(self):
+        """Test chunks link their own timers where inserts return no ids."""
+        res = self.post(CSV + 'Guitar,,0,,Music\n')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        names = {
+            timer.title: sorted(t.name for t in timer.timer_type.all())
+            for timer in Timer.objects.filter(user=self.user)
+        }
+        self.assertEqual(names, {
+            'Piano': ['Daily', 'Music'],
+            'Reading': [],
+            'Guitar': ['Music'],
+        })
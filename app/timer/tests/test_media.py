@@ -0,0 +1,202 @@
+"""
+Tests for timer image uploads and variant processing.
+"""
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.test import (TestCase, override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (MediaJob, Timer)
+from timer import (media, sync)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def upload_url(timer_id):
+    """Create and return an image upload URL."""
+    return reverse('timer:timer-media-upload', args=[timer_id])
+
+
+def make_image(size=(1600, 1200), exif=True):
+    """Return an in-memory JPEG upload with EXIF data."""
+    image = Image.new('RGB', size, color=(200, 40, 40))
+    buffer = io.BytesIO()
+    extra = {}
+    if exif:
+        data = Image.Exif()
+        data[0x010F] = 'Test camera'
+        extra['exif'] = data.tobytes()
+    image.save(buffer, 'JPEG', **extra)
+    buffer.name = 'upload.jpg'
+    buffer.seek(0)
+    return buffer
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TimerMediaTests(TestCase):
+    """Test the image upload pipeline."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.timer = Timer.objects.create(user=self.user, title='Piano')
+
+    def test_upload_returns_processing(self):
+        """Test the upload is accepted and queued without processing."""
+        res = self.client.post(
+            upload_url(self.timer.id),
+            {'image': make_image()},
+            format='multipart',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['image_status'], 'processing')
+        self.assertEqual(res.data['image_variants'], {})
+        job = MediaJob.objects.get(timer=self.timer)
+        self.assertEqual(job.status, MediaJob.PENDING)
+        self.timer.refresh_from_db()
+        self.assertEqual(job.source, self.timer.image.name)
+
+    def test_upload_keeps_concurrent_stop(self):
+        """Test an upload does not write back a stale clock or total."""
+        Timer.objects.filter(pk=self.timer.pk).update(
+            started_at=timezone.now() - timedelta(seconds=60),
+        )
+        next_seq = sync.next_seq
+
+        def stop_first(user_id):
+            # A stop that commits while the upload waits for the lock.
+            Timer.objects.filter(pk=self.timer.pk).update(
+                current_time=F('current_time') + 60,
+                started_at=None,
+            )
+            return next_seq(user_id)
+
+        with patch.object(sync, 'next_seq', stop_first):
+            res = self.client.post(
+                upload_url(self.timer.id),
+                {'image': make_image()},
+                format='multipart',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.timer.refresh_from_db()
+        self.assertTrue(self.timer.image)
+        self.assertEqual(self.timer.current_time, 60)
+        self.assertIsNone(self.timer.started_at)
+
+    def test_upload_without_image_rejected(self):
+        """Test a post without an image leaves the timer alone."""
+        for data in ({}, {'image': ''}):
+            res = self.client.post(
+                upload_url(self.timer.id),
+                data,
+                format='multipart',
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(MediaJob.objects.exists())
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.image_status, '')
+
+    def test_upload_missing_timer(self):
+        """Test uploading to an unknown timer returns 404."""
+        res = self.client.post(
+            upload_url(0),
+            {'image': make_image()},
+            format='multipart',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_worker_generates_stripped_variants(self):
+        """Test the worker writes resized WebP/JPEG without metadata."""
+        self.client.post(
+            upload_url(self.timer.id),
+            {'image': make_image()},
+            format='multipart',
+        )
+
+        self.assertEqual(media.process_pending(), 1)
+
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.image_status, 'ready')
+        thumb = self.timer.image_variants['thumb']
+        self.assertEqual(set(thumb), {'webp', 'jpeg'})
+        with default_storage.open(thumb['jpeg']) as f:
+            image = Image.open(f)
+            self.assertEqual(max(image.size), 160)
+            self.assertEqual(len(image.getexif()), 0)
+        with default_storage.open(thumb['webp']) as f:
+            self.assertEqual(Image.open(f).format, 'WEBP')
+        self.assertEqual(
+            MediaJob.objects.get(timer=self.timer).status,
+            MediaJob.DONE,
+        )
+
+        res = self.client.get(
+            reverse('timer:timer-list-create')
+        ).json()['results'][0]
+        self.assertTrue(
+            res['image_variants']['medium']['webp'].endswith('.webp')
+        )
+
+    def test_replaced_image_job_skipped(self):
+        """Test a job for a superseded upload does not touch the timer."""
+        self.client.post(
+            upload_url(self.timer.id),
+            {'image': make_image()},
+            format='multipart',
+        )
+        first = MediaJob.objects.get(timer=self.timer)
+        self.client.post(
+            upload_url(self.timer.id),
+            {'image': make_image(size=(300, 200))},
+            format='multipart',
+        )
+
+        media.run_job(media.claim_job())
+
+        first.refresh_from_db()
+        self.assertEqual(first.status, MediaJob.DONE)
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.image_status, 'processing')
+
+    def test_undecodable_image_fails_after_retries(self):
+        """Test a broken source is retried and then marked failed."""
+        name = default_storage.save('uploads/timer/broken.jpg',
+                                    io.BytesIO(b'not an image'))
+        Timer.objects.filter(pk=self.timer.pk).update(image=name)
+        self.timer.refresh_from_db()
+        media.enqueue(self.timer)
+
+        with self.settings(TIMER_MEDIA_MAX_ATTEMPTS=2):
+            media.process_pending()
+
+        job = MediaJob.objects.get(timer=self.timer)
+        self.assertEqual(job.status, MediaJob.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.image_status, 'failed')
@@ -0,0 +1,153 @@
+"""
+Tests that the timer endpoints stay on indexes for large datasets.
+"""
+import datetime
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import (DailyActivity, Timer, TimerSession, TimerType)
+from core.tests.utils import QueryPlanMixin
+
+
+USERS = 30
+TIMERS_PER_USER = 300
+TYPES_PER_USER = 6
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN checks need Postgres')
+class TimerQueryPlanTests(QueryPlanMixin, TestCase):
+    """Test each view's queries use indexes on a seeded dataset."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        User.objects.bulk_create([
+            User(email=f'user{i}@example.com', name=f'User {i}')
+            for i in range(USERS)
+        ])
+        users = list(User.objects.order_by('id'))
+        TimerType.objects.bulk_create([
+            TimerType(user=user, name=f'type {i}')
+            for user in users for i in range(TYPES_PER_USER)
+        ])
+        Timer.objects.bulk_create([
+            Timer(user=user, title=f'Timer {i}', current_time=i)
+            for user in users for i in range(TIMERS_PER_USER)
+        ])
+        types = {}
+        for timer_type in TimerType.objects.all():
+            types.setdefault(timer_type.user_id, []).append(timer_type.id)
+        Through = Timer.timer_type.through
+        links = []
+        sessions = []
+        days = []
+        today = datetime.date.today()
+        for timer_id, user_id in Timer.objects.values_list('id', 'user_id'):
+            user_types = types[user_id]
+            links.append(Through(
+                timer_id=timer_id,
+                timertype_id=user_types[timer_id % len(user_types)],
+            ))
+            sessions.append(TimerSession(
+                timer_id=timer_id,
+                user_id=user_id,
+                duration=60,
+            ))
+            days.extend(
+                DailyActivity(
+                    timer_id=timer_id,
+                    user_id=user_id,
+                    day=today - datetime.timedelta(days=timer_id % 400 + i),
+                    seconds=60,
+                )
+                for i in range(3)
+            )
+        Through.objects.bulk_create(links)
+        TimerSession.objects.bulk_create(sessions)
+        DailyActivity.objects.bulk_create(days)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.user = users[USERS // 2]
+        cls.timer = Timer.objects.filter(user=cls.user).first()
+        cls.timer_type = TimerType.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_timer_list(self):
+        """Test the timer list and its next page use indexes."""
+        url = reverse('timer:timer-list-create')
+        page = self.assertNoSeqScan(self.client.get, url).json()
+        self.assertNoSeqScan(self.client.get, page['next'])
+
+    def test_timer_search(self):
+        """Test searching stays on indexes."""
+        url = reverse('timer:timer-list-create')
+        self.assertNoSeqScan(self.client.get, url, {'q': 'timer 12'})
+
+    def test_timer_list_filtered_by_type(self):
+        """Test filtering by type name uses indexes."""
+        self.assertNoSeqScan(
+            self.client.get,
+            reverse('timer:timer-list-create'),
+            {'timer_type_name': self.timer_type.name},
+        )
+
+    def test_type_list(self):
+        """Test the type list uses indexes."""
+        self.assertNoSeqScan(
+            self.client.get,
+            reverse('timer:timer-type-list-create'),
+        )
+
+    def test_timer_detail(self):
+        """Test reading and updating a timer use indexes."""
+        url = reverse('timer:timer-detail', args=[self.timer.id])
+        self.assertNoSeqScan(self.client.get, url)
+        self.assertNoSeqScan(
+            self.client.put,
+            url,
+            {'title': 'Renamed', 'timer_type': [{'name': 'type 1'}]},
+            format='json',
+        )
+
+    def test_sessions_and_stats(self):
+        """Test logging sessions and reading stats use indexes."""
+        self.assertNoSeqScan(
+            self.client.post,
+            reverse('timer:timer-session-create', args=[self.timer.id]),
+            {'duration': 30},
+            format='json',
+        )
+        self.assertNoSeqScan(
+            self.client.get,
+            reverse('timer:timer-stats'),
+            {'bucket': 'day'},
+        )
+
+    def test_activity(self):
+        """Test the activity heatmap is an index range scan."""
+        self.assertNoSeqScan(
+            self.client.get,
+            reverse('timer:timer-activity'),
+        )
+
+    def test_changes(self):
+        """Test a delta sync after an edit uses indexes."""
+        url = reverse('timer:timer-changes')
+        token = self.client.get(url).json()['token']
+        self.client.put(
+            reverse('timer:timer-detail', args=[self.timer.id]),
+            {'title': 'Renamed'},
+            format='json',
+        )
+        self.assertNoSeqScan(self.client.get, url, {'since': token})
@@ -0,0 +1,141 @@
+"""
+Tests that the fast read path renders exactly as the serializers do.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import (Timer, TimerType)
+from timer import (representations, serializers, sync)
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class RepresentationContractTests(TestCase):
+    """Test representations match the DRF serializers byte for byte."""
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        music, piano, theory = [
+            TimerType.objects.create(user=self.user, name=name)
+            for name in ('Music', 'Piano – keys', 'Theory')
+        ]
+        plain = Timer.objects.create(user=self.user, title='Plain')
+        running = Timer.objects.create(
+            user=self.user,
+            title='Running ♪',
+            description='Scales\nand "arpeggios"',
+            current_time=3600,
+            last_session=1800,
+            goal=36000,
+            started_at=self.now - timedelta(seconds=90, microseconds=5),
+        )
+        # Linked out of id order.
+        running.timer_type.add(theory)
+        running.timer_type.add(music)
+        running.timer_type.add(piano)
+        imaged = Timer.objects.create(
+            user=self.user,
+            title='With image',
+            image='uploads/timer/a.png',
+            image_status='ready',
+            image_variants={
+                'thumb': {'webp': 'uploads/timer/a-thumb.webp'},
+                'full': {'avif': 'uploads/timer/a.avif',
+                         'webp': 'uploads/timer/a.webp'},
+            },
+        )
+        imaged.timer_type.add(music)
+        self.ids = [plain.id, running.id, imaged.id]
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        Timer.objects.create(user=other, title='Not mine')
+
+    def assertSameBytes(self, serializer_class, detail):
+        timers = Timer.objects.filter(id__in=self.ids).order_by('-id')
+        with patch('django.utils.timezone.now', return_value=self.now):
+            expected = serializer_class(
+                Timer.objects.for_user(self.user).order_by('-id'),
+                many=True,
+            ).data
+            actual = representations.timers(
+                representations.timer_rows(timers, detail=detail),
+                detail=detail,
+            )
+        self.assertEqual(render(actual), render(expected))
+
+    def test_timer_detail(self):
+        """Test detail rows match TimerDetailSerializer."""
+        self.assertSameBytes(serializers.TimerDetailSerializer, detail=True)
+
+    def test_timer(self):
+        """Test plain rows match TimerSerializer."""
+        self.assertSameBytes(serializers.TimerSerializer, detail=False)
+
+    def test_types(self):
+        """Test types match TimerTypeSerializer."""
+        timer_types = (TimerType.objects
+                       .filter(user=self.user)
+                       .order_by('-name'))
+
+        self.assertEqual(
+            render(representations.types(timer_types)),
+            render(serializers.TimerTypeSerializer(timer_types,
+                                                   many=True).data),
+        )
+
+    def test_empty(self):
+        """Test no rows render as an empty list without a link query."""
+        with self.assertNumQueries(1):
+            data = representations.timers(
+                representations.timer_rows(Timer.objects.filter(id=0)),
+            )
+
+        self.assertEqual(data, [])
+
+    def test_list_endpoint(self):
+        """Test the timer list renders what the serializer would."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with patch('django.utils.timezone.now', return_value=self.now):
+            res = client.get(reverse('timer:timer-list-create'))
+            results = serializers.TimerDetailSerializer(
+                Timer.objects.for_user(self.user).order_by('-id'),
+                many=True,
+            ).data
+
+        self.assertEqual(render(res.json()['results']), render(results))
+
+    def test_changes_endpoint(self):
+        """Test a sync page renders as TimerChangesSerializer."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with patch('django.utils.timezone.now', return_value=self.now):
+            res = client.get(reverse('timer:timer-changes'))
+            changes = sync.changes(self.user)
+            expected = serializers.TimerChangesSerializer({
+                'token': str(changes.token),
+                'has_more': changes.has_more,
+                'timers': changes.timers,
+                'timer_types': changes.timer_types,
+                'deleted': changes.deleted,
+            }).data
+
+        self.assertEqual(res.content, render(expected))
@@ -0,0 +1,118 @@
+"""
+Tests for searching timers.
+"""
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import (Timer, TimerType)
+
+TIMERS_URL = reverse('timer:timer-list-create')
+
+
+def detail_url(timer_id):
+    """Create and return a timer detail URL."""
+    return reverse('timer:timer-detail', args=[timer_id])
+
+
+class TimerSearchApiTests(TestCase):
+    """Test the q parameter of the timer list."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.piano = Timer.objects.create(
+            user=self.user,
+            title='Piano practice',
+            description='Scales and Chopin etudes',
+        )
+        self.guitar = Timer.objects.create(
+            user=self.user,
+            title='Guitar',
+            description='Chords, then practice songs',
+        )
+        self.spanish = Timer.objects.create(user=self.user, title='Spanish')
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        Timer.objects.create(user=other, title='Piano')
+
+    def titles(self, **params):
+        res = self.client.get(TIMERS_URL, params)
+        self.assertEqual(res.status_code, 200)
+        return sorted(t['title'] for t in res.json()['results'])
+
+    def test_search_words_in_title_and_description(self):
+        """Test whole words match in either field, case-insensitively."""
+        self.assertEqual(self.titles(q='chopin'), ['Piano practice'])
+        self.assertEqual(self.titles(q='PRACTICE'),
+                         ['Guitar', 'Piano practice'])
+
+    def test_search_partial_title(self):
+        """Test part of a title word still matches."""
+        self.assertEqual(self.titles(q='span'), ['Spanish'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'web search syntax')
+    def test_search_syntax(self):
+        """Test web search syntax: or and exclusion."""
+        self.assertEqual(self.titles(q='chopin or chords'),
+                         ['Guitar', 'Piano practice'])
+        self.assertEqual(self.titles(q='practice -chopin'), ['Guitar'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'web search syntax')
+    def test_operators_not_matched_as_text(self):
+        """Test exclusions hold for titles containing the query text."""
+        Timer.objects.create(user=self.user, title='Practice -chopin')
+
+        self.assertEqual(self.titles(q='practice -chopin'), ['Guitar'])
+
+    def test_search_with_type_filter(self):
+        """Test search combines with timer_type_name."""
+        music = TimerType.objects.create(user=self.user, name='Music')
+        self.guitar.timer_type.add(music)
+
+        self.assertEqual(
+            self.titles(q='practice', timer_type_name='Music'),
+            ['Guitar'],
+        )
+
+    def test_search_follows_updates(self):
+        """Test edits through the API are searchable straight away."""
+        self.client.put(detail_url(self.spanish.id), {
+            'title': 'Italian',
+        }, format='json')
+
+        self.assertEqual(self.titles(q='italian'), ['Italian'])
+        self.assertEqual(self.titles(q='spanish'), [])
+
+    def test_search_follows_bulk_writes(self):
+        """Test rows written without save() are indexed too."""
+        Timer.objects.filter(pk=self.spanish.pk).update(
+            description='Duolingo streak',
+        )
+        Timer.objects.bulk_create([Timer(user=self.user, title='Chess')])
+
+        self.assertEqual(self.titles(q='duolingo'), ['Spanish'])
+        self.assertEqual(self.titles(q='chess'), ['Chess'])
+
+    def test_blank_search_lists_everything(self):
+        """Test an empty q is ignored."""
+        self.assertEqual(len(self.titles(q=' ')), 3)
+
+    def test_search_without_postgres(self):
+        """Test other databases fall back to icontains."""
+        with patch.object(connection, 'vendor', 'sqlite'):
+            self.assertEqual(self.titles(q='etude'), ['Piano practice'])
@@ -0,0 +1,152 @@
+"""
+Tests for the timer session API.
+"""
+import threading
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import (TestCase, TransactionTestCase)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Timer, TimerSession)
+
+
+def sessions_url(timer_id):
+    """Create and return a timer sessions URL."""
+    return reverse('timer:timer-session-create', args=[timer_id])
+
+
+class TimerSessionApiTests(TestCase):
+    """Test posting sessions to a timer."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.timer = Timer.objects.create(
+            user=self.user,
+            title='Piano',
+            current_time=100,
+        )
+
+    def test_post_single_session(self):
+        """Test posting one session appends it and bumps the timer."""
+        res = self.client.post(
+            sessions_url(self.timer.id),
+            {'duration': 30},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['duration'], 30)
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.current_time, 130)
+        self.assertEqual(self.timer.last_session, 30)
+        self.assertEqual(TimerSession.objects.count(), 1)
+
+    def test_post_session_batch(self):
+        """Test posting a batch of sessions in one request."""
+        payload = [
+            {'duration': 10, 'started_at': '2026-01-01T10:00:00Z'},
+            {'duration': 20, 'started_at': '2026-01-01T11:00:00Z'},
+            {'duration': 5},
+        ]
+
+        res = self.client.post(
+            sessions_url(self.timer.id),
+            payload,
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.current_time, 135)
+        self.assertEqual(self.timer.last_session, 5)
+
+    def test_post_adds_to_stored_value(self):
+        """Test the update is applied relative to the stored value."""
+        Timer.objects.filter(pk=self.timer.pk).update(current_time=1000)
+
+        self.client.post(
+            sessions_url(self.timer.id),
+            {'duration': 30},
+            format='json',
+        )
+
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.current_time, 1030)
+
+    def test_invalid_session_rejected(self):
+        """Test an empty or negative duration is rejected, writing nothing."""
+        for duration in (0, -1):
+            res = self.client.post(
+                sessions_url(self.timer.id),
+                [{'duration': 10}, {'duration': duration}],
+                format='json',
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(TimerSession.objects.exists())
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.current_time, 100)
+
+    def test_other_users_timer_not_found(self):
+        """Test posting to another user's timer returns 404."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        timer = Timer.objects.create(user=other, title='Other')
+
+        res = self.client.post(
+            sessions_url(timer.id),
+            {'duration': 10},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'needs concurrent writers')
+class ConcurrentSessionTests(TransactionTestCase):
+    """Test sessions posted at the same time all count."""
+
+    def test_concurrent_posts_do_not_lose_updates(self):
+        """Test simultaneous posts each add their duration."""
+        user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        timer = Timer.objects.create(user=user, title='Piano')
+        start = threading.Barrier(8)
+        statuses = []
+
+        def post():
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                start.wait()
+                res = client.post(sessions_url(timer.id), {'duration': 30},
+                                  format='json')
+                statuses.append(res.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=post) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses, [status.HTTP_201_CREATED] * 8)
+        timer.refresh_from_db()
+        self.assertEqual(timer.current_time, 240)
+        self.assertEqual(TimerSession.objects.filter(timer=timer).count(), 8)
@@ -0,0 +1,196 @@
+"""
+Tests for the timer statistics endpoint.
+"""
+import threading
+import time
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import (connection, transaction)
+from django.test import (TestCase, TransactionTestCase)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Timer, TimerType, UserStats)
+from timer import stats
+
+
+TIMERS_URL = reverse('timer:timer-list-create')
+STATS_URL = reverse('timer:timer-stats')
+
+
+def detail_url(timer_id):
+    """Create and return a timer detail URL."""
+    return reverse('timer:timer-detail', args=[timer_id])
+
+
+class TimerStatsApiTests(TestCase):
+    """Test the aggregated statistics endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_timer(self, title, current_time, types, goal=0):
+        res = self.client.post(TIMERS_URL, {
+            'title': title,
+            'current_time': current_time,
+            'timer_type': [{'name': name} for name in types],
+        }, format='json')
+        timer = Timer.objects.get(id=res.json()['id'])
+        Timer.objects.filter(id=timer.id).update(goal=goal)
+        return timer
+
+    def get_types(self, data):
+        return {t['name']: t for t in data['types']}
+
+    def test_stats_track_creates_updates_and_deletes(self):
+        """Test totals follow every timer write."""
+        piano = self.create_timer('Piano', 3600, ['music', 'practice'])
+        self.create_timer('Guitar', 7200, ['music'])
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = res.json()
+        self.assertEqual(data['timer_count'], 2)
+        self.assertEqual(data['total_time'], 10800)
+        self.assertEqual(data['total_hours'], 3)
+        self.assertEqual(data['target_hours'], 10000)
+        types = self.get_types(data)
+        self.assertEqual(types['music']['total_time'], 10800)
+        self.assertEqual(types['music']['timer_count'], 2)
+        self.assertEqual(types['practice']['total_time'], 3600)
+
+        self.client.put(detail_url(piano.id), {
+            'title': 'Piano',
+            'current_time': 5400,
+            'timer_type': [{'name': 'practice'}, {'name': 'keys'}],
+        }, format='json')
+        types = self.get_types(self.client.get(STATS_URL).json())
+        self.assertEqual(types['music']['total_time'], 7200)
+        self.assertEqual(types['music']['timer_count'], 1)
+        self.assertEqual(types['practice']['total_time'], 5400)
+        self.assertEqual(types['keys']['total_time'], 5400)
+
+        self.client.delete(detail_url(piano.id))
+        data = self.client.get(STATS_URL).json()
+        self.assertEqual(data['timer_count'], 1)
+        self.assertEqual(data['total_time'], 7200)
+        self.assertEqual(self.get_types(data)['practice']['timer_count'], 0)
+
+    def test_sessions_add_time_and_buckets(self):
+        """Test sessions add time and appear in the daily breakdown."""
+        timer = self.create_timer('Piano', 0, ['music'])
+        self.client.post(
+            reverse('timer:timer-session-create', args=[timer.id]),
+            [
+                {'duration': 60, 'started_at': '2026-03-01T10:00:00Z'},
+                {'duration': 30, 'started_at': '2026-03-01T18:00:00Z'},
+                {'duration': 45, 'started_at': '2026-03-02T09:00:00Z'},
+            ],
+            format='json',
+        )
+
+        res = self.client.get(STATS_URL, {
+            'bucket': 'day',
+            'from': '2026-03-01T00:00:00',
+        })
+
+        data = res.json()
+        self.assertEqual(data['total_time'], 135)
+        self.assertEqual(self.get_types(data)['music']['total_time'], 135)
+        self.assertEqual(
+            [(b['start'][:10], b['total_time']) for b in data['buckets']],
+            [('2026-03-01', 90), ('2026-03-02', 45)],
+        )
+
+    def test_invalid_bucket_rejected(self):
+        """Test an unknown bucket returns 400."""
+        res = self.client.get(STATS_URL, {'bucket': 'year'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_existing_timers_summarised_on_first_read(self):
+        """Test timers written before the summary existed are counted."""
+        timer_type = TimerType.objects.create(user=self.user, name='work')
+        for i in range(3):
+            timer = Timer.objects.create(
+                user=self.user,
+                title=f'Timer {i}',
+                current_time=100,
+                goal=1000,
+            )
+            timer.timer_type.add(timer_type)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.json()['total_time'], 300)
+        work = self.get_types(res.json())['work']
+        self.assertEqual(work['total_goal'], 3000)
+        self.assertEqual(work['progress'], 0.1)
+
+    def test_stats_cost_independent_of_timer_count(self):
+        """Test reading stats does not scale with the number of timers."""
+        self.create_timer('Warm up', 10, ['work'])
+        self.client.get(STATS_URL)
+        cache.clear()
+
+        with self.assertNumQueries(2):
+            self.client.get(STATS_URL)
+
+        for i in range(20):
+            self.create_timer(f'Timer {i}', 10, ['work', 'music'])
+        cache.clear()
+
+        with self.assertNumQueries(2):
+            res = self.client.get(STATS_URL)
+        self.assertEqual(res.json()['timer_count'], 21)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'needs concurrent writers')
+class FirstWriteRaceTests(TransactionTestCase):
+    """Test a user's first writes, made at once, are all counted."""
+
+    def test_concurrent_first_writes_counted(self):
+        """Test a write racing the first summary still adds its timer."""
+        user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        summarised = threading.Event()
+
+        def write(current_time, hold=0):
+            try:
+                with transaction.atomic():
+                    timer = Timer.objects.create(
+                        user=user,
+                        title='Timer',
+                        current_time=current_time,
+                    )
+                    stats.record(user.pk, after=stats.snapshot(timer, []))
+                    summarised.set()
+                    # Keep the first summary uncommitted for a while.
+                    time.sleep(hold)
+            finally:
+                connection.close()
+
+        first = threading.Thread(target=write, args=(100, 0.3))
+        first.start()
+        summarised.wait()
+        second = threading.Thread(target=write, args=(50,))
+        second.start()
+        first.join()
+        second.join()
+
+        user_stats = UserStats.objects.get(user=user)
+        self.assertEqual(user_stats.timer_count, 2)
+        self.assertEqual(user_stats.total_time, 150)
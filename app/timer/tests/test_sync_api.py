@@ -0,0 +1,206 @@
+"""
+Tests for the timer delta sync API.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Timer
+
+CHANGES_URL = reverse('timer:timer-changes')
+TIMERS_URL = reverse('timer:timer-list-create')
+TYPES_URL = reverse('timer:timer-type-list-create')
+
+
+def detail_url(timer_id):
+    return reverse('timer:timer-detail', args=[timer_id])
+
+
+def type_url(type_id):
+    return reverse('timer:timer-type-update', args=[type_id])
+
+
+class TimerChangesApiTests(TestCase):
+    """Test syncing only what changed since a token."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_timer(self, title, *type_names):
+        res = self.client.post(TIMERS_URL, {
+            'title': title,
+            'timer_type': [{'name': name} for name in type_names],
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data
+
+    def sync_to_end(self):
+        """Sync every page and return the final token."""
+        changes = {'token': None, 'has_more': True}
+        while changes['has_more']:
+            changes = self.sync(changes['token'])
+        return changes['token']
+
+    def sync(self, since=None):
+        params = {} if since is None else {'since': since}
+        res = self.client.get(CHANGES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_full_sync_then_nothing_changed(self):
+        """Test a full sync returns everything and a token to resume."""
+        self.create_timer('Piano', 'Music')
+        self.create_timer('Chess')
+
+        full = self.sync()
+        again = self.sync(full['token'])
+
+        self.assertEqual(
+            sorted(t['title'] for t in full['timers']), ['Chess', 'Piano'],
+        )
+        self.assertEqual([t['name'] for t in full['timer_types']], ['Music'])
+        self.assertFalse(full['has_more'])
+        self.assertEqual(again['timers'], [])
+        self.assertEqual(again['timer_types'], [])
+        self.assertEqual(again['token'], full['token'])
+
+    def test_sync_returns_only_updated_timer(self):
+        """Test an edit is the only timer in the next sync."""
+        piano = self.create_timer('Piano')
+        self.create_timer('Chess')
+        token = self.sync()['token']
+
+        self.client.put(detail_url(piano['id']), {
+            'title': 'Grand piano',
+        }, format='json')
+        changes = self.sync(token)
+
+        self.assertEqual(
+            [t['title'] for t in changes['timers']], ['Grand piano'],
+        )
+        self.assertGreater(int(changes['token']), int(token))
+
+    def test_sync_reports_deleted_timer(self):
+        """Test deleting a timer leaves a tombstone."""
+        piano = self.create_timer('Piano')
+        token = self.sync()['token']
+
+        self.client.delete(detail_url(piano['id']))
+        changes = self.sync(token)
+
+        self.assertEqual(changes['deleted']['timers'], [piano['id']])
+        self.assertEqual(changes['timers'], [])
+
+    def test_sync_reports_deleted_type_and_relinked_timer(self):
+        """Test deleting a type reports it and the timers it left."""
+        piano = self.create_timer('Piano', 'Music')
+        type_id = piano['timer_type'][0]['id']
+        token = self.sync()['token']
+
+        self.client.delete(type_url(type_id))
+        changes = self.sync(token)
+
+        self.assertEqual(changes['deleted']['timer_types'], [type_id])
+        self.assertEqual(changes['timers'][0]['timer_type'], [])
+
+    def test_sync_rename_type_includes_timers(self):
+        """Test renaming a type resends the timers embedding it."""
+        piano = self.create_timer('Piano', 'Music')
+        self.create_timer('Chess')
+        token = self.sync()['token']
+
+        self.client.put(type_url(piano['timer_type'][0]['id']), {
+            'name': 'Instruments',
+        }, format='json')
+        changes = self.sync(token)
+
+        self.assertEqual([t['title'] for t in changes['timers']], ['Piano'])
+        self.assertEqual(
+            [t['name'] for t in changes['timer_types']], ['Instruments'],
+        )
+
+    def test_sync_includes_logged_sessions(self):
+        """Test logging a session marks the timer changed."""
+        piano = self.create_timer('Piano')
+        token = self.sync()['token']
+
+        self.client.post(
+            reverse('timer:timer-session-create', args=[piano['id']]),
+            {'duration': 30},
+            format='json',
+        )
+        changes = self.sync(token)
+
+        self.assertEqual(changes['timers'][0]['current_time'], 30)
+
+    @override_settings(TIMER_SYNC_PAGE_SIZE=2)
+    def test_sync_pages_through_changes(self):
+        """Test large change sets are split into pages."""
+        for title in ('A', 'B', 'C'):
+            self.create_timer(title)
+
+        first = self.sync()
+        second = self.sync(first['token'])
+
+        self.assertTrue(first['has_more'])
+        self.assertEqual([t['title'] for t in first['timers']], ['A', 'B'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual([t['title'] for t in second['timers']], ['C'])
+
+    @override_settings(TIMER_SYNC_PAGE_SIZE=2)
+    def test_sync_pages_within_one_change(self):
+        """Test one write touching more rows than a page is split."""
+        for title in ('A', 'B', 'C', 'D'):
+            type_id = self.create_timer(title, 'Music')['timer_type'][0]['id']
+        token = self.sync_to_end()
+        self.client.put(type_url(type_id), {'name': 'Piano'})
+
+        first = self.sync(token)
+        second = self.sync(first['token'])
+        third = self.sync(second['token'])
+
+        self.assertEqual(first['timer_types'][0]['name'], 'Piano')
+        self.assertIn('.', first['token'])
+        self.assertTrue(first['has_more'])
+        self.assertTrue(second['has_more'])
+        self.assertFalse(third['has_more'])
+        titles = [
+            t['title'] for page in (first, second, third)
+            for t in page['timers']
+        ]
+        self.assertEqual(titles, ['A', 'B', 'C', 'D'])
+        self.assertEqual(self.sync(third['token'])['timers'], [])
+
+    def test_sync_ignores_other_users(self):
+        """Test changes by other users are not returned."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        Timer.objects.create(user=other, title='Theirs')
+
+        self.assertEqual(self.sync()['timers'], [])
+
+    def test_sync_invalid_token(self):
+        """Test malformed and future tokens are rejected."""
+        for token in ('abc', '-1', '999', '1.2', '1.4.0', '1..2'):
+            res = self.client.get(CHANGES_URL, {'since': token})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_steady_state_sync_queries_independent_of_size(self):
+        """Test an up-to-date sync does not scale with stored timers."""
+        for i in range(20):
+            self.create_timer(f'Timer {i}', f'type {i}')
+        token = self.sync()['token']
+
+        with self.assertNumQueries(1):
+            self.client.get(CHANGES_URL, {'since': token})
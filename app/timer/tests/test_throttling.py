@@ -0,0 +1,170 @@
+"""
+Tests for throttling timer writes.
+"""
+import os
+import threading
+import time
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import (cache, caches)
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import (SimpleTestCase, TestCase, override_settings)
+from django_redis.cache import RedisCache
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import Timer
+from timer import throttling
+
+
+TIMERS_URL = reverse('timer:timer-list-create')
+
+
+def detail_url(timer_id):
+    """Create and return a timer detail URL."""
+    return reverse('timer:timer-detail', args=[timer_id])
+
+
+@override_settings(TIMER_THROTTLE_RATES={'timer-write': '3/min'})
+class TokenBucketThrottleTests(TestCase):
+    """Test write endpoints are throttled per user and endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.timer = Timer.objects.create(user=self.user, title='Piano')
+        self.url = detail_url(self.timer.id)
+
+    def put(self, current_time):
+        return self.client.put(self.url, {
+            'title': 'Piano',
+            'current_time': current_time,
+        }, format='json')
+
+    def test_burst_then_throttled(self):
+        """Test a full bucket allows a burst, then answers 429."""
+        for i in range(3):
+            self.assertEqual(self.put(i).status_code, status.HTTP_200_OK)
+
+        res = self.put(3)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '20')
+        self.assertIn(
+            'http_requests_throttled_total{scope="timer-write"} 1',
+            metrics.registry.render(),
+        )
+
+    def test_bucket_refills(self):
+        """Test tokens come back at the configured rate."""
+        with patch('timer.throttling.time.time', return_value=1000.0):
+            for i in range(3):
+                self.put(i)
+        with patch('timer.throttling.time.time', return_value=1019.0):
+            self.assertEqual(self.put(3).status_code, 429)
+        with patch('timer.throttling.time.time', return_value=1020.0):
+            self.assertEqual(self.put(4).status_code, status.HTTP_200_OK)
+
+    def test_buckets_per_user_and_endpoint(self):
+        """Test other endpoints and other users keep their own buckets."""
+        for i in range(4):
+            self.put(i)
+
+        res = self.client.post(TIMERS_URL, {'title': 'Guitar'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        timer = Timer.objects.create(user=other, title='Chess')
+        self.client.force_authenticate(other)
+        res = self.client.put(detail_url(timer.id), {'title': 'Go'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_reads_not_throttled(self):
+        """Test safe methods never use tokens."""
+        for _ in range(5):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.put(1).status_code, status.HTTP_200_OK)
+
+    @override_settings(TIMER_THROTTLE_RATES={'timer-write': ''})
+    def test_blank_rate_disables(self):
+        """Test a blank rate turns throttling off."""
+        for i in range(5):
+            self.assertEqual(self.put(i).status_code, status.HTTP_200_OK)
+
+
+class TokenBucketTests(SimpleTestCase):
+    """Test parsing rates and taking tokens from a bucket."""
+
+    def setUp(self):
+        cache.clear()
+
+    def take_concurrently(self, bucket_cache, key, requests):
+        taken = []
+
+        def take():
+            tokens = throttling.take(bucket_cache, key, 3, 60, 1000.0)
+            taken.append(tokens >= 1)
+
+        threads = [threading.Thread(target=take) for _ in range(requests)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return taken.count(True)
+
+    def test_parse_rate(self):
+        """Test rates parse to a capacity and a period in seconds."""
+        self.assertEqual(throttling.parse_rate('60/min'), (60, 60))
+        self.assertEqual(throttling.parse_rate('20/hour'), (20, 3600))
+        for rate in ('60', '0/min', 'x/min', '60/', '60/week'):
+            with self.assertRaises(ValueError):
+                throttling.parse_rate(rate)
+
+    def test_invalid_rates_rejected_at_startup(self):
+        """Test a bad rate is reported by scope, and blanks are allowed."""
+        throttling.check_rates({'timer-write': '60/min', 'timer-import': ''})
+        with self.assertRaisesMessage(ImproperlyConfigured, "'timer-write'"):
+            throttling.check_rates({'timer-write': '60 per minute'})
+
+    def test_concurrent_takes_share_tokens(self):
+        """Test simultaneous requests cannot spend the same token."""
+        get = LocMemCache.get
+
+        def slow_get(self, *args, **kwargs):
+            value = get(self, *args, **kwargs)
+            # Widen the gap between reading and writing the bucket.
+            time.sleep(0.01)
+            return value
+
+        with patch.object(LocMemCache, 'get', slow_get):
+            taken = self.take_concurrently(caches['default'], 'bucket', 10)
+
+        self.assertEqual(taken, 3)
+
+    @skipUnless(os.environ.get('REDIS_URL'), 'Set REDIS_URL to run.')
+    def test_redis_bucket(self):
+        """Test buckets in Redis are refilled and taken atomically."""
+        redis_cache = RedisCache(os.environ['REDIS_URL'], {})
+        key = f'test-bucket-{threading.get_ident()}'
+        self.addCleanup(redis_cache.delete, key)
+
+        self.assertEqual(self.take_concurrently(redis_cache, key, 10), 3)
+        tokens = throttling.take(redis_cache, key, 3, 60, 1010.0)
+        self.assertAlmostEqual(tokens, 0.5)
+        tokens = throttling.take(redis_cache, key, 3, 60, 1020.0)
+        self.assertAlmostEqual(tokens, 1.0)
@@ -0,0 +1,342 @@
+"""
+Tests for the timer API.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import (Timer, TimerType)
+from timer import sync
+
+
+TIMERS_URL = reverse('timer:timer-list-create')
+
+TYPES_URL = reverse('timer:timer-type-list-create')
+
+
+def detail_url(timer_id):
+    """Create and return a timer detail URL."""
+    return reverse('timer:timer-detail', args=[timer_id])
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_timer(user, types=(), **params):
+    """Create and return a timer with the given type names."""
+    defaults = {'title': 'Sample timer', 'current_time': 0}
+    defaults.update(params)
+    timer = Timer.objects.create(user=user, **defaults)
+    for name in types:
+        timer_type, _ = TimerType.objects.get_or_create(user=user, name=name)
+        timer.timer_type.add(timer_type)
+
+    return timer
+
+
+class PrivateTimerApiTests(TestCase):
+    """Test authenticated timer API requests."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_timers_paginated(self):
+        """Test listing timers returns a cursor-paginated page."""
+        for i in range(5):
+            create_timer(self.user, title=f'Timer {i}')
+
+        res = self.client.get(TIMERS_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        page = res.json()
+        self.assertEqual(len(page['results']), 2)
+        self.assertIsNotNone(page['next'])
+        ids = [t['id'] for t in page['results']]
+
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            ids.extend(t['id'] for t in page['results'])
+
+        expected = list(
+            Timer.objects.filter(user=self.user)
+            .order_by('-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_list_schema_is_paginated(self):
+        """Test the schema describes the list as a cursor page."""
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        response = schema['paths']['/api/timer/']['get']['responses']['200']
+        ref = response['content']['application/json']['schema']['$ref']
+        page = schema['components']['schemas'][ref.split('/')[-1]]
+        self.assertEqual(
+            sorted(page['properties']),
+            ['next', 'previous', 'results'],
+        )
+
+    def test_list_limited_to_user(self):
+        """Test list of timers is limited to the authenticated user."""
+        other_user = create_user(email='other@example.com')
+        create_timer(other_user)
+        timer = create_timer(self.user)
+
+        res = self.client.get(TIMERS_URL)
+
+        self.assertEqual(
+            [t['id'] for t in res.json()['results']],
+            [timer.id],
+        )
+
+    def test_list_query_count_is_constant(self):
+        """Test the list costs the same number of queries for any size."""
+        for i in range(3):
+            create_timer(self.user, types=['work', 'music'])
+
+        with self.assertNumQueries(2):
+            self.client.get(TIMERS_URL)
+
+        for i in range(30):
+            create_timer(self.user, types=['work', 'music', f'type {i}'])
+        cache.clear()
+
+        with self.assertNumQueries(2):
+            res = self.client.get(TIMERS_URL)
+
+        self.assertEqual(len(res.json()['results']), 33)
+
+    def test_filter_by_type_name(self):
+        """Test filtering by several type names returns each timer once."""
+        t1 = create_timer(self.user, types=['work', 'music'])
+        t2 = create_timer(self.user, types=['sport'])
+        create_timer(self.user, types=['reading'])
+
+        res = self.client.get(TIMERS_URL, {'timer_type_name': 'work,music'})
+        self.assertEqual([t['id'] for t in res.json()['results']], [t1.id])
+
+        res = self.client.get(TIMERS_URL, {'timer_type_name': 'music,sport'})
+        self.assertEqual(
+            [t['id'] for t in res.json()['results']],
+            [t2.id, t1.id],
+        )
+
+    def test_create_timer_query_count_independent_of_types(self):
+        """Test creating a timer costs the same for 1 or 10 new types."""
+        self.client.post(TIMERS_URL, {'title': 'Warm up'}, format='json')
+        counts = []
+        for n in (1, 10):
+            payload = {
+                'title': f'Timer with {n} types',
+                'timer_type': [{'name': f'{n} type {i}'} for i in range(n)],
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(TIMERS_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(res.data['timer_type']), n)
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_create_timer_reuses_existing_types(self):
+        """Test existing types are linked instead of duplicated."""
+        existing = TimerType.objects.create(user=self.user, name='work')
+        payload = {
+            'title': 'Timer',
+            'timer_type': [{'name': 'work'}, {'name': 'music'}],
+        }
+
+        res = self.client.post(TIMERS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(TimerType.objects.filter(user=self.user).count(), 2)
+        timer = Timer.objects.get(id=res.data['id'])
+        self.assertIn(existing, timer.timer_type.all())
+
+    def test_update_timer_diffs_type_links(self):
+        """Test update only inserts and deletes the links that changed."""
+        timer = create_timer(self.user, types=['work', 'music'])
+        Through = Timer.timer_type.through
+        kept_link = Through.objects.get(
+            timer=timer,
+            timertype__name='work',
+        )
+        payload = {
+            'title': timer.title,
+            'timer_type': [{'name': 'work'}, {'name': 'sport'}],
+        }
+
+        res = self.client.put(detail_url(timer.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(t['name'] for t in res.data['timer_type']),
+            ['sport', 'work'],
+        )
+        self.assertTrue(Through.objects.filter(id=kept_link.id).exists())
+        self.assertFalse(
+            Through.objects.filter(timer=timer, timertype__name='music')
+            .exists()
+        )
+
+    def test_update_keeps_concurrent_stop(self):
+        """Test an update does not write back a stale clock or total."""
+        timer = create_timer(
+            self.user,
+            started_at=timezone.now() - timedelta(seconds=60),
+        )
+        next_seq = sync.next_seq
+
+        def stop_first(user_id):
+            # A stop that commits while the update waits for the lock.
+            Timer.objects.filter(pk=timer.pk).update(
+                current_time=F('current_time') + 60,
+                started_at=None,
+            )
+            return next_seq(user_id)
+
+        with patch.object(sync, 'next_seq', stop_first):
+            res = self.client.put(detail_url(timer.id),
+                                  {'title': 'Renamed'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['current_time'], 60)
+        timer.refresh_from_db()
+        self.assertEqual(timer.title, 'Renamed')
+        self.assertEqual(timer.current_time, 60)
+        self.assertIsNone(timer.started_at)
+
+    def test_create_duplicate_type_rejected(self):
+        """Test creating a type with a name the user already has fails."""
+        TimerType.objects.create(user=self.user, name='work')
+
+        res = self.client.post(TYPES_URL, {'name': 'work'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(TimerType.objects.filter(user=self.user).count(), 1)
+
+
+class TimerUpdateCoalescingTests(TestCase):
+    """Test repeated and no-op timer updates skip the database writes."""
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.timer = create_timer(self.user, types=['Music'], title='Piano')
+        self.payload = {
+            'title': 'Piano',
+            'current_time': 60,
+            'timer_type': [{'name': 'Music'}],
+        }
+
+    def noop_count(self, reason):
+        return metrics.registry._counters[
+            ('timer_noop_writes_total', (('reason', reason),))
+        ]
+
+    def test_repeated_update_is_answered_from_cache(self):
+        """Test resending the last update only reads the change number."""
+        url = detail_url(self.timer.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.put(url, self.payload, format='json')
+
+        with self.assertNumQueries(1):
+            res = self.client.put(url, self.payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), first.json())
+        self.assertEqual(self.noop_count('repeat'), 1)
+
+    def test_repeat_after_other_change_is_applied(self):
+        """Test a repeat is written again once anything else changed."""
+        url = detail_url(self.timer.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(url, self.payload, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(url, dict(self.payload, current_time=120),
+                            format='json')
+
+        res = self.client.put(url, self.payload, format='json')
+
+        self.assertEqual(res.json()['current_time'], 60)
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.current_time, 60)
+
+    def test_repeat_after_change_elsewhere_is_applied(self):
+        """Test a write the cache did not see still ends the repeat."""
+        url = detail_url(self.timer.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(url, self.payload, format='json')
+        sync.touch(Timer.objects.filter(pk=self.timer.pk),
+                   sync.next_seq(self.user.pk))
+        Timer.objects.filter(pk=self.timer.pk).update(current_time=120)
+
+        res = self.client.put(url, self.payload, format='json')
+
+        self.assertEqual(res.json()['current_time'], 60)
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.current_time, 60)
+
+    def test_repeat_with_other_query_is_not_matched(self):
+        """Test the query string is part of what makes a repeat."""
+        url = detail_url(self.timer.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(url, self.payload, format='json')
+
+        self.client.put(f'{url}?x=1', self.payload, format='json')
+
+        self.assertNotIn(
+            ('timer_noop_writes_total', (('reason', 'repeat'),)),
+            metrics.registry._counters,
+        )
+
+    def test_unchanged_update_is_not_saved(self):
+        """Test an update matching the stored timer writes nothing."""
+        seq = self.timer.change_seq
+        payload = dict(self.payload, current_time=0)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.put(detail_url(self.timer.id), payload,
+                                  format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(
+            q['sql'].startswith(('UPDATE', 'INSERT')) for q in ctx
+        ))
+        self.timer.refresh_from_db()
+        self.assertEqual(self.timer.change_seq, seq)
+        self.assertEqual(self.noop_count('unchanged'), 1)
+
+    def test_running_timer_updates_are_not_coalesced(self):
+        """Test setting a running timer's time always restarts its clock."""
+        url = detail_url(self.timer.id)
+        self.client.post(reverse('timer:timer-start', args=[self.timer.id]))
+        self.client.put(url, self.payload, format='json')
+        self.timer.refresh_from_db()
+        started_at = self.timer.started_at
+
+        self.client.put(url, self.payload, format='json')
+
+        self.timer.refresh_from_db()
+        self.assertGreater(self.timer.started_at, started_at)
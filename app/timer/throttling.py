@@ -0,0 +1,122 @@
+"""
+Token bucket throttling for timer writes.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django_redis.cache import RedisCache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from core import metrics
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Refills and takes a token in one step on the Redis server. Returns the
+# tokens there were, as a string since Redis truncates Lua numbers.
+BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(bucket[1]) or capacity
+local stamp = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - stamp, 0) * refill)
+if tokens >= 1 then
+    redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'stamp', now)
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+end
+return tostring(tokens)
+"""
+
+# Serialises buckets kept in a per-process cache such as LocMemCache.
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """Return (capacity, seconds) for a rate such as '60/min'.
+
+    Raises ValueError for anything else.
+    """
+    count, _, period = rate.partition('/')
+    if not count.isdigit() or int(count) < 1 or period[:1] not in PERIODS:
+        raise ValueError(
+            f"Invalid throttle rate {rate!r}: expected 'N/period' with "
+            f"N >= 1 and a period of s, min, hour or day."
+        )
+    return int(count), PERIODS[period[0]]
+
+
+def check_rates(rates):
+    """Raise ImproperlyConfigured if a non-blank rate is invalid."""
+    for scope, rate in rates.items():
+        if rate:
+            try:
+                parse_rate(rate)
+            except ValueError as exc:
+                raise ImproperlyConfigured(
+                    f'TIMER_THROTTLE_RATES[{scope!r}]: {exc}'
+                ) from None
+
+
+def take(cache, key, capacity, period, now):
+    """Refill the bucket at key and take a token if there is one.
+
+    Returns the tokens the bucket held before taking; less than 1 means
+    none was taken. An untouched bucket is full again after one period,
+    so it expires then.
+    """
+    refill = capacity / period
+    if isinstance(cache, RedisCache):
+        client = cache.client.get_client(write=True)
+        script = client.register_script(BUCKET_SCRIPT)
+        return float(script(
+            keys=[cache.make_key(key)],
+            args=[capacity, refill, now, period],
+        ))
+    with _lock:
+        tokens, stamp = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + max(now - stamp, 0) * refill)
+        if tokens >= 1:
+            cache.set(key, (tokens - 1, now), period)
+        return tokens
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle unsafe requests per user and view with a token bucket.
+
+    The view's ``throttle_scope`` names its rate in
+    ``TIMER_THROTTLE_RATES``. Each user gets a bucket per view holding up
+    to N tokens, refilled continuously at N per period, so a client may
+    burst N writes and then keep to the rate. Buckets live in
+    ``TIMER_THROTTLE_CACHE_ALIAS``: shared between processes and updated
+    by a script on a Redis cache, and per process under a lock
+    otherwise.
+    """
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        scope = getattr(view, 'throttle_scope', None)
+        rate = settings.TIMER_THROTTLE_RATES.get(scope)
+        if not rate:
+            return True
+        capacity, period = parse_rate(rate)
+
+        ident = request.user.pk if request.user.is_authenticated else \
+            self.get_ident(request)
+        key = f'throttle:{scope}:{type(view).__name__}:{ident}'
+        cache = caches[settings.TIMER_THROTTLE_CACHE_ALIAS]
+        tokens = take(cache, key, capacity, period, time.time())
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) * period / capacity
+            metrics.registry.inc('http_requests_throttled_total', scope=scope)
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
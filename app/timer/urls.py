@@ -1,4 +1,6 @@
 from django.urls import path
+
+from core.async_views import as_view
 from timer import views
 
 app_name = 'timer'
@@ -6,27 +8,77 @@ app_name = 'timer'
 urlpatterns = [
     path(
         '',
-        views.TimerListCreateAPIView.as_view(),
+        as_view(views.TimerListCreateAPIView),
         name='timer-list-create'
     ),
+    path(
+        'activity',
+        as_view(views.TimerActivityAPIView),
+        name='timer-activity'
+    ),
+    path(
+        'batch',
+        as_view(views.TimerBatchAPIView),
+        name='timer-batch'
+    ),
     path(
         '<int:pk>/media-upload',
-        views.TimerImageCreateAPIView.as_view(),
+        as_view(views.TimerImageCreateAPIView),
         name='timer-media-upload'
     ),
     path(
         '<int:pk>',
-        views.TimerDetailAPIView.as_view(),
+        as_view(views.TimerDetailAPIView),
         name='timer-detail'
     ),
+    path(
+        '<int:pk>/sessions',
+        as_view(views.TimerSessionCreateAPIView),
+        name='timer-session-create'
+    ),
+    path(
+        '<int:pk>/start',
+        as_view(views.TimerStartAPIView),
+        name='timer-start'
+    ),
+    path(
+        '<int:pk>/stop',
+        as_view(views.TimerStopAPIView),
+        name='timer-stop'
+    ),
+    path(
+        'changes',
+        as_view(views.TimerChangesAPIView),
+        name='timer-changes'
+    ),
+    path(
+        'events/ticket',
+        as_view(views.TimerEventTicketAPIView),
+        name='timer-event-ticket'
+    ),
+    path(
+        'export',
+        as_view(views.TimerExportAPIView),
+        name='timer-export'
+    ),
+    path(
+        'import',
+        as_view(views.TimerImportAPIView),
+        name='timer-import'
+    ),
+    path(
+        'stats',
+        as_view(views.TimerStatsAPIView),
+        name='timer-stats'
+    ),
     path(
         'types',
-        views.TypeListCreateAPIView.as_view(),
+        as_view(views.TypeListCreateAPIView),
         name='timer-type-list-create'
     ),
     path(
         'types/<int:pk>',
-        views.TypeDetailsAPIView.as_view(),
+        as_view(views.TypeDetailsAPIView),
         name='timer-type-update'
     )
 ]
@@ -1,19 +1,96 @@
+from datetime import timedelta
+
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     extend_schema, OpenApiResponse, OpenApiParameter
 )
+from django.conf import settings
+from django.db import (IntegrityError, transaction)
+from django.utils import timezone
+from django.utils.dateparse import (parse_date, parse_datetime)
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import (status, mixins)
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import (MultiPartParser, FormParser)
-from core.models import (Timer, TimerType)
-from timer import serializers
+from core import metrics
+from core.models import (Timer, TimerType, TimerSession)
+from timer import (
+    activity,
+    batch,
+    events,
+    export,
+    importer,
+    media,
+    representations,
+    search,
+    serializers,
+    stats,
+    streams,
+    sync,
+)
+from timer.cache import (
+    bump_version,
+    cached_response,
+    remember_write,
+    repeated_write,
+)
+from timer.pagination import TimerCursorPagination
+from timer.throttling import TokenBucketThrottle
+from user.authentication import CachedTokenAuthentication
+
+
+def save_timer_type(serializer, user, success_status=status.HTTP_200_OK):
+    """Save a validated type, reporting a duplicate name as a 400."""
+    renamed = serializer.instance
+    try:
+        with transaction.atomic():
+            seq = sync.next_seq(user.pk)
+            timer_type = serializer.save(user=user, change_seq=seq)
+            if renamed:
+                # Timers embed their types' names, so they changed too.
+                sync.touch(Timer.objects.filter(timer_type=timer_type), seq)
+            bump_version(user.pk)
+            serializers.publish_timer_type(
+                timer_type,
+                'type.updated' if renamed else 'type.created',
+            )
+    except IntegrityError:
+        return Response(
+            {'name': ['A timer type with this name already exists.']},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(serializer.data, status=success_status)
+
+
+def parse_query_datetime(value):
+    """Parse an ISO datetime query parameter, assuming UTC if naive."""
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+def parse_query_date(value):
+    """Parse an ISO date query parameter."""
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
 
 
 class TimerListCreateAPIView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'timer-write'
+    # Also tells the schema the list is a cursor page.
+    pagination_class = TimerCursorPagination
 
     @extend_schema(
         parameters=[
@@ -24,21 +101,53 @@ class TimerListCreateAPIView(APIView):
                 type=str,
                 location=OpenApiParameter.QUERY,
             ),
+            OpenApiParameter(
+                name='q',
+                description='Search titles and descriptions; supports '
+                            '"quoted phrases", or and -exclusions.',
+                required=False,
+                type=str,
+                location=OpenApiParameter.QUERY,
+            ),
         ],
         responses=serializers.TimerDetailSerializer(many=True)
     )
+    @cached_response
     def get(self, request):
-        timers = Timer.objects.filter(user=request.user).order_by('-id')
+        timers = Timer.objects.filter(user=request.user)
         type_names = request.query_params.getlist('timer_type_name')
 
         if len(type_names) == 1 and ',' in type_names[0]:
             type_names = [v for v in type_names[0].split(',') if v]
 
         if type_names:
-            timers = timers.filter(timer_type__name__in=type_names)
+            # A semi-join on the link table starting from the user's types
+            # stays on the (user, name) and (timertype, timer) indexes and
+            # needs no DISTINCT.
+            links = Timer.timer_type.through.objects.filter(
+                timertype__in=TimerType.objects.filter(
+                    user=request.user,
+                    name__in=type_names,
+                )
+            )
+            timers = timers.filter(id__in=links.values('timer_id'))
 
-        serializer = serializers.TimerDetailSerializer(timers, many=True)
-        return Response(serializer.data)
+        text = request.query_params.get('q', '').strip()
+        if text:
+            timers = search.search(timers, text)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(
+            representations.timer_rows(timers, detail=True),
+            request,
+            view=self,
+        )
+        with metrics.span('serialize'):
+            data = representations.timers(page, detail=True)
+        response = paginator.get_paginated_response(data)
+        # Running timers report a different time every second.
+        response.cacheable = not any(t['started_at'] for t in page)
+        return response
 
     @extend_schema(
         request=serializers.TimerSerializer,
@@ -56,12 +165,14 @@ class TimerListCreateAPIView(APIView):
 
 
 class TimerDetailAPIView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'timer-write'
 
     def get_object(self, pk, user):
         try:
-            return Timer.objects.get(pk=pk, user=user)
+            return Timer.objects.for_user(user).get(pk=pk)
         except Timer.DoesNotExist:
             return None
 
@@ -78,7 +189,10 @@ class TimerDetailAPIView(APIView):
                 {'detail': 'Not found.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        serializer = serializers.TimerSerializer(timer)
+        serializer = serializers.TimerSerializer(
+            timer,
+            context={'request': request}
+        )
         return Response(serializer.data)
 
     @extend_schema(
@@ -90,15 +204,31 @@ class TimerDetailAPIView(APIView):
         }
     )
     def put(self, request, pk):
+        user_id = request.user.pk
+        query = request.GET.urlencode()
+        data = repeated_write(user_id, pk, request.data, query)
+        if data is not None:
+            # A client resending its last update: nothing to write.
+            metrics.registry.inc('timer_noop_writes_total', reason='repeat')
+            return Response(data)
         timer = self.get_object(pk, request.user)
         if not timer:
             return Response(
                 {'detail': 'Not found.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        serializer = serializers.TimerSerializer(timer, data=request.data)
+        serializer = serializers.TimerSerializer(
+            timer,
+            data=request.data,
+            context={'request': request}
+        )
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            seq = timer.change_seq
+            with transaction.atomic():
+                timer = serializer.save(user=request.user)
+            if timer.change_seq != seq and timer.started_at is None:
+                remember_write(user_id, pk, request.data, query,
+                               serializer.data, timer.change_seq)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -115,25 +245,35 @@ class TimerDetailAPIView(APIView):
                 {'detail': 'Not found.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        timer.delete()
+        with transaction.atomic():
+            before = stats.snapshot(timer)
+            seq = sync.next_seq(request.user.pk)
+            sync.bury(request.user.pk, seq, timers=[timer.pk])
+            events.publish(request.user.pk, 'timer.deleted', seq,
+                           {'id': timer.pk})
+            timer.delete()
+            stats.record(request.user.pk, before)
+            bump_version(request.user.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class TypeListCreateAPIView(mixins.ListModelMixin, APIView):
     serializer_class = serializers.TimerTypeSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
         responses=serializers.TimerTypeSerializer(many=True)
     )
+    @cached_response
     def get(self, request):
         timer_type = (TimerType
                       .objects
                       .filter(user=request.user)
                       .order_by('-name'))
-        serializer = serializers.TimerTypeSerializer(timer_type, many=True)
-        return Response(serializer.data)
+        with metrics.span('serialize'):
+            data = representations.types(timer_type)
+        return Response(data)
 
     @extend_schema(
         request=serializers.TimerTypeSerializer,
@@ -144,14 +284,16 @@ class TypeListCreateAPIView(mixins.ListModelMixin, APIView):
             data=request.data,
         )
         if serializer.is_valid():
-            serializer.save(user=request.user)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return save_timer_type(serializer, request.user,
+                                   status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class TimerImageCreateAPIView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'timer-write'
     parser_classes = [MultiPartParser, FormParser]
 
     def get_object(self, pk, user):
@@ -162,22 +304,33 @@ class TimerImageCreateAPIView(APIView):
 
     @extend_schema(
         request=serializers.TimerImageSerializer,
-        responses=serializers.TimerImageSerializer
+        responses={
+            202: serializers.TimerImageSerializer,
+            400: OpenApiResponse(description="Validation error."),
+            404: OpenApiResponse(description="Not found.")
+        }
     )
     def post(self, request, pk):
         timer = self.get_object(pk, request.user)
+        if not timer:
+            return Response(
+                {'detail': 'Not found.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         serializer = serializers.TimerImageSerializer(
             instance=timer,
             data=request.data,
         )
         if serializer.is_valid():
-            serializer.save(timer=timer)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            with transaction.atomic():
+                timer = serializer.save()
+                media.enqueue(timer)
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class TypeDetailsAPIView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_object(self, pk, user):
@@ -206,8 +359,7 @@ class TypeDetailsAPIView(APIView):
             data=request.data
         )
         if serializer.is_valid():
-            serializer.save(user=request.user)
-            return Response(serializer.data)
+            return save_timer_type(serializer, request.user)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @extend_schema(
@@ -223,5 +375,550 @@ class TypeDetailsAPIView(APIView):
                 {'detail': 'Not found.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        timer_type.delete()
+        with transaction.atomic():
+            seq = sync.next_seq(request.user.pk)
+            sync.touch(Timer.objects.filter(timer_type=timer_type), seq)
+            sync.bury(request.user.pk, seq, timer_types=[timer_type.pk])
+            events.publish(request.user.pk, 'type.deleted', seq,
+                           {'id': timer_type.pk})
+            timer_type.delete()
+            bump_version(request.user.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TimerSessionCreateAPIView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'timer-write'
+
+    @extend_schema(
+        request=serializers.TimerSessionSerializer(many=True),
+        responses={
+            201: serializers.TimerSessionSerializer(many=True),
+            400: OpenApiResponse(description="Validation error."),
+            404: OpenApiResponse(description="Not found.")
+        }
+    )
+    def post(self, request, pk):
+        if not Timer.objects.filter(pk=pk, user=request.user).exists():
+            return Response(
+                {'detail': 'Not found.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        many = isinstance(request.data, list)
+        serializer = serializers.TimerSessionSerializer(
+            data=request.data,
+            many=many,
+        )
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        items = serializer.validated_data if many else [
+            serializer.validated_data
+        ]
+        if not items:
+            return Response(
+                {'detail': 'At least one session is required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        sessions = [
+            TimerSession(timer_id=pk, user=request.user, **item)
+            for item in items
+        ]
+        with transaction.atomic():
+            TimerSession.objects.bulk_create(sessions)
+            added = sum(s.duration for s in sessions)
+            seq = sync.next_seq(request.user.pk)
+            Timer.objects.filter(pk=pk).update(
+                current_time=F('current_time') + added,
+                last_session=sessions[-1].duration,
+                change_seq=seq,
+                updated_at=timezone.now(),
+            )
+            events.publish(
+                request.user.pk,
+                'timer.tick',
+                seq,
+                lambda: serializers.TimerSerializer(
+                    Timer.objects.for_user(request.user).get(pk=pk)
+                ).data,
+            )
+            stats.add_time(
+                request.user.pk,
+                Timer.timer_type.through.objects
+                .filter(timer_id=pk)
+                .values_list('timertype_id', flat=True),
+                added,
+            )
+            now = timezone.now()
+            activity.add(request.user.pk, {pk: [
+                (s.started_at, s.duration) if s.started_at
+                else activity.ending(s.duration, now)
+                for s in sessions
+            ]})
+            bump_version(request.user.pk)
+
+        data = serializers.TimerSessionSerializer(sessions, many=True).data
+        return Response(
+            data if many else data[0],
+            status=status.HTTP_201_CREATED
+        )
+
+
+class TimerClockAPIView(APIView):
+    """Start or stop a timer's clock, doing nothing if already so."""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'timer-write'
+    start = None
+
+    def get_object(self, pk, user, lock=False):
+        timers = Timer.objects.for_user(user)
+        if lock:
+            timers = timers.select_for_update(of=('self',))
+        return timers.filter(pk=pk).first()
+
+    @extend_schema(
+        request=None,
+        responses={
+            200: serializers.TimerSerializer,
+            404: OpenApiResponse(description="Not found.")
+        }
+    )
+    def post(self, request, pk):
+        timer = self.get_object(pk, request.user)
+        if timer and self.start != (timer.started_at is not None):
+            with transaction.atomic():
+                # Take the change counter before the row, in the same
+                # order as every other write.
+                seq = sync.next_seq(request.user.pk)
+                timer = self.get_object(pk, request.user, lock=True)
+                if timer and self.start != (timer.started_at is not None):
+                    self.switch(timer, seq)
+        if not timer:
+            return Response(
+                {'detail': 'Not found.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        serializer = serializers.TimerSerializer(
+            timer,
+            context={'request': request}
+        )
+        return Response(serializer.data)
+
+    def switch(self, timer, seq):
+        now = timezone.now()
+        fields = ['started_at', 'change_seq', 'updated_at']
+        if self.start:
+            timer.started_at = now
+        else:
+            added = timer.elapsed(now)
+            if added:
+                TimerSession.objects.create(
+                    timer=timer,
+                    user_id=timer.user_id,
+                    duration=added,
+                    started_at=timer.started_at,
+                )
+                stats.add_time(
+                    timer.user_id,
+                    [t.id for t in timer.timer_type.all()],
+                    added,
+                )
+                activity.add(
+                    timer.user_id,
+                    {timer.id: [(timer.started_at, added)]},
+                )
+                timer.current_time += added
+                timer.last_session = added
+                fields += ['current_time', 'last_session']
+            timer.started_at = None
+        timer.change_seq = seq
+        timer.save(update_fields=fields)
+        bump_version(timer.user_id)
+        serializers.publish_timer(
+            timer,
+            'timer.started' if self.start else 'timer.stopped',
+        )
+
+
+class TimerStartAPIView(TimerClockAPIView):
+    start = True
+
+
+class TimerStopAPIView(TimerClockAPIView):
+    start = False
+
+
+class TimerBatchAPIView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'timer-write'
+
+    @extend_schema(
+        request=serializers.TimerBatchSerializer,
+        responses={
+            200: serializers.TimerBatchResultSerializer(many=True),
+            400: OpenApiResponse(
+                description="Validation error; no operation was applied."
+            ),
+        }
+    )
+    def post(self, request):
+        serializer = serializers.TimerBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            results = batch.apply(
+                request.user,
+                serializer.validated_data['operations'],
+            )
+        except batch.BatchError as exc:
+            return Response(
+                {'operations': exc.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class TimerChangesAPIView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='since',
+                description='Token from the previous sync; omit it for a '
+                            'full sync.',
+                required=False,
+                type=str,
+                location=OpenApiParameter.QUERY,
+            ),
+        ],
+        responses={
+            200: serializers.TimerChangesSerializer,
+            400: OpenApiResponse(description="Invalid sync token.")
+        }
+    )
+    def get(self, request):
+        try:
+            since = request.query_params.get('since')
+            if since is not None:
+                since = sync.parse_token(since)
+            changes = sync.changes(
+                request.user,
+                since,
+                settings.TIMER_SYNC_PAGE_SIZE,
+            )
+        except sync.InvalidToken:
+            return Response(
+                {'since': ['Invalid sync token; run a full sync.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        with metrics.span('serialize'):
+            # Rendered as TimerChangesSerializer would.
+            data = {
+                'token': changes.token,
+                'has_more': changes.has_more,
+                'timers': representations.timers(
+                    representations.timer_rows(changes.timers),
+                ),
+                'timer_types': representations.types(changes.timer_types),
+                'deleted': changes.deleted,
+            }
+        return Response(data)
+
+
+class TimerEventTicketAPIView(APIView):
+    """Issue a ticket for opening an event stream from a browser."""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=None,
+        responses={201: serializers.EventTicketSerializer},
+    )
+    def post(self, request):
+        data = {
+            'ticket': streams.issue_ticket(request.user),
+            'expires_in': settings.TIMER_EVENTS_TICKET_TTL,
+        }
+        return Response(
+            serializers.EventTicketSerializer(data).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class TimerExportAPIView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = export.IgnoreClientContentNegotiation
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='format',
+                description='File format; defaults to csv.',
+                required=False,
+                type=str,
+                enum=list(export.FORMATS),
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name='kind',
+                description='What to export; defaults to timers.',
+                required=False,
+                type=str,
+                enum=list(export.FIELDS),
+                location=OpenApiParameter.QUERY,
+            ),
+        ],
+        responses={
+            (200, 'text/csv'): OpenApiTypes.STR,
+            (200, 'application/x-ndjson'): OpenApiTypes.STR,
+            400: OpenApiResponse(description="Invalid parameters.")
+        }
+    )
+    def get(self, request):
+        params = {'format': 'csv', 'kind': 'timers'}
+        for name, choices in (('format', export.FORMATS),
+                              ('kind', export.FIELDS)):
+            value = request.query_params.get(name, params[name])
+            if value not in choices:
+                return Response(
+                    {name: [f'Must be one of {", ".join(choices)}.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            params[name] = value
+        fmt, kind = params['format'], params['kind']
+        response = StreamingHttpResponse(
+            export.stream(request.user, kind, fmt),
+            content_type=export.FORMATS[fmt],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.{fmt}"'
+        )
+        return response
+
+
+class TimerImportAPIView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'timer-import'
+    content_negotiation_class = export.IgnoreClientContentNegotiation
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='format',
+                description='Body format; defaults to csv. The columns are '
+                            'those of the export.',
+                required=False,
+                type=str,
+                enum=list(importer.FORMATS),
+                location=OpenApiParameter.QUERY,
+            ),
+        ],
+        request={
+            'text/csv': OpenApiTypes.STR,
+            'application/x-ndjson': OpenApiTypes.STR,
+        },
+        responses={
+            201: serializers.TimerImportResultSerializer,
+            400: OpenApiResponse(
+                description="Invalid rows; nothing was imported."
+            ),
+        }
+    )
+    def post(self, request):
+        fmt = request.query_params.get('format', 'csv')
+        if fmt not in importer.FORMATS:
+            return Response(
+                {'format': [f'Must be one of {", ".join(importer.FORMATS)}.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Read the body as it arrives rather than parsing it in memory.
+        lines = request.stream or ()
+        try:
+            result = importer.run(
+                request.user,
+                lines,
+                fmt,
+                max_rows=settings.TIMER_IMPORT_MAX_ROWS,
+            )
+        except importer.InvalidImport as exc:
+            return Response(
+                {'rows': exc.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except UnicodeDecodeError:
+            return Response(
+                {'detail': 'The body must be UTF-8.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = serializers.TimerImportResultSerializer({
+            'imported': result.imported,
+            'seconds': result.seconds,
+            'rows_per_second': result.imported / result.seconds,
+        })
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class TimerStatsAPIView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='bucket',
+                description='Break logged session time down by '
+                            'day, week or month.',
+                required=False,
+                type=str,
+                enum=stats.BUCKETS,
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name='from',
+                description='ISO datetime the breakdown starts at.',
+                required=False,
+                type=str,
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name='to',
+                description='ISO datetime the breakdown ends before.',
+                required=False,
+                type=str,
+                location=OpenApiParameter.QUERY,
+            ),
+        ],
+        responses={
+            200: serializers.TimerStatsSerializer,
+            400: OpenApiResponse(description="Invalid parameters.")
+        }
+    )
+    @cached_response
+    def get(self, request):
+        user_stats, types = stats.summary(request.user.pk)
+        data = {
+            'timer_count': user_stats.timer_count,
+            'total_time': user_stats.total_time,
+            'total_goal': user_stats.total_goal,
+            'total_hours': user_stats.total_time / 3600,
+            'target_hours': settings.TIMER_TARGET_HOURS,
+            'types': types,
+        }
+
+        bucket = request.query_params.get('bucket')
+        if bucket:
+            if bucket not in stats.BUCKETS:
+                choices = ', '.join(stats.BUCKETS)
+                return Response(
+                    {'bucket': [f'Must be one of {choices}.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            bounds = {}
+            for param in ('from', 'to'):
+                value = request.query_params.get(param)
+                if value is None:
+                    continue
+                bounds[param] = parse_query_datetime(value)
+                if bounds[param] is None:
+                    return Response(
+                        {param: ['Enter a valid ISO datetime.']},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            data['buckets'] = stats.buckets(
+                request.user.pk,
+                bucket,
+                bounds.get('from'),
+                bounds.get('to'),
+            )
+
+        return Response(serializers.TimerStatsSerializer(data).data)
+
+
+def local_today(request):
+    """Return today's date, which the default activity range ends on."""
+    return timezone.localdate().isoformat()
+
+
+class TimerActivityAPIView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='from',
+                description='First ISO date to include. Defaults to a '
+                            'year before to.',
+                required=False,
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name='to',
+                description='Last ISO date to include. Defaults to today.',
+                required=False,
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+            ),
+        ],
+        responses={
+            200: serializers.TimerActivitySerializer,
+            400: OpenApiResponse(description="Invalid parameters.")
+        }
+    )
+    @cached_response(vary=local_today)
+    def get(self, request):
+        bounds = {}
+        for param in ('from', 'to'):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            bounds[param] = parse_query_date(value)
+            if bounds[param] is None:
+                return Response(
+                    {param: ['Enter a valid ISO date.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        end = bounds.get('to') or timezone.localdate()
+        start = bounds.get('from') or \
+            end - timedelta(days=activity.MAX_DAYS - 1)
+        if not 0 <= (end - start).days < activity.MAX_DAYS:
+            return Response(
+                {'from': [
+                    f'Must be on or before to, and at most '
+                    f'{activity.MAX_DAYS} days before it.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        days = activity.days(request.user.pk, start, end)
+        current, longest = activity.streaks([day for day, _ in days], end)
+        data = {
+            'start': start,
+            'end': end,
+            'total_time': sum(seconds for _, seconds in days),
+            'active_days': len(days),
+            'current_streak': current,
+            'longest_streak': longest,
+            'days': [
+                {'day': day, 'total_time': seconds} for day, seconds in days
+            ],
+        }
+        return Response(serializers.TimerActivitySerializer(data).data)
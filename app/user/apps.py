@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'user'
+
+    def ready(self):
+        from core.metrics import registry
+        from user import signals  # noqa: F401
+        from user.authentication import collect_token_cache_metrics
+
+        registry.register_collector(collect_token_cache_metrics)
@@ -0,0 +1,188 @@
+"""
+Token authentication backed by a bounded in-process token cache.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.models import AccessToken
+from user.tokens import ACCESS_PREFIX
+
+
+class TokenCache:
+    """Thread-safe LRU map of token key to user with a TTL per entry.
+
+    When ``TOKEN_AUTH_CACHE['CACHE_ALIAS']`` is set, misses fall back to
+    that Django cache before the database, so workers share lookups.
+    Invalidation is immediate in the process that deletes the token or
+    saves the user; other processes drop their copy within ``TTL``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _options(self):
+        return settings.TOKEN_AUTH_CACHE
+
+    def _shared(self):
+        alias = self._options.get('CACHE_ALIAS')
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _shared_key(key):
+        return f'auth:token:{key}'
+
+    def get(self, key):
+        """Return a copy of the cached user for key, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.copy(entry[0])
+            if entry is not None:
+                self._discard(key)
+
+        shared = self._shared()
+        user = shared.get(self._shared_key(key)) if shared else None
+        with self._lock:
+            if user is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._store(key, user)
+        return copy.copy(user)
+
+    def user_id(self, key):
+        """Return the id of the user cached locally for key, or None.
+
+        Unlike get, does not copy the user or count a hit or miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0].pk
+        return None
+
+    def set(self, key, user, expires_at=None):
+        """Cache user for key locally and in the shared cache.
+
+        Entries last ``TTL`` seconds, or until expires_at if sooner.
+        """
+        ttl = self._options['TTL']
+        if expires_at is not None:
+            ttl = min(ttl, (expires_at - timezone.now()).total_seconds())
+        self._store(key, user, ttl)
+        shared = self._shared()
+        if shared:
+            shared.set(self._shared_key(key), user, max(int(ttl), 1))
+
+    def _store(self, key, user, ttl=None):
+        if ttl is None:
+            ttl = self._options['TTL']
+        expires = time.monotonic() + ttl
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (user, expires)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self._options['MAX_SIZE']:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[0].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[0].pk]
+
+    def evict(self, *keys):
+        """Drop the given token keys from every cache layer."""
+        with self._lock:
+            for key in keys:
+                self._discard(key)
+        shared = self._shared()
+        if shared and keys:
+            shared.delete_many([self._shared_key(key) for key in keys])
+
+    def evict_user(self, user_id, keys=()):
+        """Drop every cached token of a user."""
+        with self._lock:
+            keys = set(keys) | self._keys_by_user.get(user_id, set())
+        self.evict(*keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and the current local size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in TokenAuthentication that skips the DB on cache hits.
+
+    Accepts the expiring access tokens from ``/api/user/token/`` as well
+    as legacy tokens, which never expire. ``request.auth`` is the key,
+    whether or not the lookup was cached.
+    """
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+        if user is not None:
+            return (user, key)
+
+        if not key.startswith(ACCESS_PREFIX):
+            user, _token = super().authenticate_credentials(key)
+            token_cache.set(key, user)
+            return (user, key)
+
+        access = (AccessToken.objects
+                  .select_related('user')
+                  .filter(key=key)
+                  .first())
+        if access is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if access.expires_at <= timezone.now():
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        if not access.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        token_cache.set(key, access.user, access.expires_at)
+        return (access.user, key)
+
+
+def collect_token_cache_metrics():
+    """Yield token cache counters for the metrics registry."""
+    stats = token_cache.stats()
+    yield ('token_auth_cache_hits_total', {}, stats['hits'])
+    yield ('token_auth_cache_misses_total', {}, stats['misses'])
+    yield ('token_auth_cache_size', {}, stats['size'])
@@ -2,20 +2,38 @@ from django.contrib.auth import (
     get_user_model,
     authenticate,
 )
+from django.conf import settings
 from django.utils.translation import gettext as _
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+
+from core.models import Timer
+from core.serializers import DynamicFieldsMixin
 from timer.serializers import TimerSerializer
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for the user object."""
-    timers = TimerSerializer(source='timer_set', many=True, read_only=True)
+    timers = serializers.SerializerMethodField()
+    expandable_fields = ('timers',)
 
     class Meta:
         model = get_user_model()
         fields = ['email', 'password', 'name', 'timers']
         extra_kwargs = {'password': {'write_only': True, 'min_length': 5}}
 
+    @extend_schema_field(TimerSerializer(many=True))
+    def get_timers(self, user):
+        """Return the newest timers, up to ?timers_limit= of them."""
+        limit = settings.USER_TIMERS_EXPAND_LIMIT
+        request = self.context.get('request')
+        try:
+            limit = min(int(request.query_params['timers_limit']), limit)
+        except (AttributeError, KeyError, ValueError):
+            pass
+        timers = Timer.objects.for_user(user).order_by('-id')[:max(limit, 0)]
+        return TimerSerializer(timers, many=True).data
+
     def create(self, validated_data):
         """Create and return a user with encrypted password."""
         return get_user_model().objects.create_user(**validated_data)
@@ -54,3 +72,21 @@ class AuthTokenSerializer(serializers.Serializer):
             raise serializers.ValidationError(msg, code='authorization')
         attrs['user'] = user
         return attrs
+
+
+class TokenPairSerializer(serializers.Serializer):
+    """Serializer for an access and refresh token pair."""
+    token = serializers.CharField(
+        help_text='Access token, sent as "Authorization: Token <token>".',
+    )
+    refresh = serializers.CharField(
+        help_text='Single-use token for /api/user/token/refresh/.',
+    )
+    expires_in = serializers.IntegerField(
+        help_text='Seconds until the access token expires.',
+    )
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer for a refresh token."""
+    refresh = serializers.CharField()
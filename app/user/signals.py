@@ -0,0 +1,27 @@
+"""
+Keep the token cache in step with token and user changes.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_save)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.models import AccessToken
+from user.authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+@receiver(post_delete, sender=AccessToken)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.evict(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def evict_saved_user(sender, instance, created, **kwargs):
+    if created:
+        return
+    keys = (Token.objects.filter(user=instance)
+            .values_list('key', flat=True)
+            .union(AccessToken.objects.filter(user=instance)
+                   .values_list('key', flat=True)))
+    token_cache.evict_user(instance.pk, keys)
@@ -0,0 +1,121 @@
+"""
+Tests for the cached token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.test import (TestCase, override_settings)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user import tokens
+from user.authentication import (CachedTokenAuthentication, token_cache)
+
+
+ME_URL = reverse('user:me')
+# A missing timer costs exactly one query once authenticated.
+MISSING_TIMER_URL = reverse('timer:timer-detail', args=[0])
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_request_skips_token_query(self):
+        """Test only the first request looks the token up."""
+        with self.assertNumQueries(2):
+            res = self.client.get(MISSING_TIMER_URL)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(MISSING_TIMER_URL)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+        self.assertEqual(token_cache.stats()['misses'], 1)
+
+    def test_auth_is_key_with_or_without_cache(self):
+        """Test request.auth does not depend on the cache state."""
+        access = tokens.issue(self.user).token
+        auth = CachedTokenAuthentication()
+
+        for key in (self.token.key, access):
+            for _ in range(2):
+                self.assertEqual(
+                    auth.authenticate_credentials(key),
+                    (self.user, key),
+                )
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token invalidates the cached entry."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user invalidates the cached entry."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_is_a_copy(self):
+        """Test a request cannot mutate the cached user object."""
+        self.client.patch(ME_URL, {'name': 'Updated'})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'Updated')
+
+    @override_settings(TOKEN_AUTH_CACHE={
+        'MAX_SIZE': 1,
+        'TTL': 60,
+        'CACHE_ALIAS': None,
+    })
+    def test_cache_is_bounded(self):
+        """Test the least recently used token is evicted."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        other_token = Token.objects.create(user=other)
+        self.client.get(ME_URL)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {other_token.key}')
+        self.client.get(ME_URL)
+
+        self.assertEqual(token_cache.stats()['size'], 1)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    @override_settings(TOKEN_AUTH_CACHE={
+        'MAX_SIZE': 100,
+        'TTL': 60,
+        'CACHE_ALIAS': 'default',
+    })
+    def test_shared_cache_serves_other_workers(self):
+        """Test a cleared local cache falls back to the shared cache."""
+        self.client.get(MISSING_TIMER_URL)
+        token_cache.clear()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(MISSING_TIMER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.token.delete()
+        self.assertIsNone(token_cache.get(self.token.key))
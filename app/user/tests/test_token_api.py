@@ -0,0 +1,152 @@
+"""
+Tests for the access and refresh token API.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import (TestCase, override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (AccessToken, RefreshToken)
+from user.authentication import token_cache
+
+
+TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:token-refresh')
+REVOKE_URL = reverse('user:token-revoke')
+ME_URL = reverse('user:me')
+
+
+class TokenApiTests(TestCase):
+    """Test logging in, refreshing and revoking tokens."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+
+    def login(self):
+        res = self.client.post(TOKEN_URL, {
+            'email': 'user@example.com',
+            'password': 'testpass123',
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def refresh(self, key):
+        return self.client.post(REFRESH_URL, {'refresh': key})
+
+    def get_me(self, token):
+        return self.client.get(ME_URL, HTTP_AUTHORIZATION=f'Token {token}')
+
+    @override_settings(ACCESS_TOKEN_TTL=600)
+    def test_login_returns_pair(self):
+        """Test a password login returns a working token pair."""
+        pair = self.login()
+
+        self.assertEqual(pair['expires_in'], 600)
+        self.assertEqual(self.get_me(pair['token']).status_code, 200)
+        self.assertFalse(RefreshToken.objects.filter(
+            digest=pair['refresh'],
+        ).exists())
+
+    def test_bad_password_rejected(self):
+        """Test a wrong password issues nothing."""
+        res = self.client.post(TOKEN_URL, {
+            'email': 'user@example.com',
+            'password': 'wrong',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(AccessToken.objects.exists())
+
+    def test_refresh_skips_password_check(self):
+        """Test refreshing issues a new pair without authenticate()."""
+        pair = self.login()
+
+        with patch('user.serializers.authenticate') as authenticate, \
+                self.assertNumQueries(8):
+            res = self.refresh(pair['refresh'])
+
+        authenticate.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['token'], pair['token'])
+        self.assertNotEqual(res.data['refresh'], pair['refresh'])
+        self.assertEqual(self.get_me(res.data['token']).status_code, 200)
+
+    def test_refresh_token_single_use(self):
+        """Test reusing a refresh token revokes its whole family."""
+        pair = self.login()
+        rotated = self.refresh(pair['refresh']).data
+        self.assertEqual(self.get_me(rotated['token']).status_code, 200)
+
+        res = self.refresh(pair['refresh'])
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh(rotated['refresh']).status_code, 401)
+        self.assertEqual(self.get_me(rotated['token']).status_code, 401)
+
+    def test_other_logins_unaffected(self):
+        """Test revoking one family leaves other logins working."""
+        first = self.login()
+        second = self.login()
+
+        self.client.post(REVOKE_URL, {'refresh': first['refresh']})
+
+        self.assertEqual(self.get_me(first['token']).status_code, 401)
+        self.assertEqual(self.get_me(second['token']).status_code, 200)
+        self.assertEqual(self.refresh(second['refresh']).status_code, 200)
+
+    def test_revoke_unknown_token(self):
+        """Test revoking an unknown token still succeeds."""
+        res = self.client.post(REVOKE_URL, {'refresh': 'unknown'})
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_expired_access_token_rejected(self):
+        """Test an access token stops working when it expires."""
+        pair = self.login()
+        AccessToken.objects.filter(key=pair['token']).update(
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        res = self.get_me(pair['token'])
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.data['detail'], 'Token has expired.')
+
+    def test_expired_refresh_token_rejected(self):
+        """Test a refresh token cannot be used after it expires."""
+        pair = self.login()
+        RefreshToken.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        self.assertEqual(self.refresh(pair['refresh']).status_code, 401)
+
+    def test_inactive_user_cannot_refresh(self):
+        """Test deactivated users cannot refresh."""
+        pair = self.login()
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.refresh(pair['refresh']).status_code, 401)
+        self.assertEqual(self.get_me(pair['token']).status_code, 401)
+
+    def test_cached_entry_ends_at_expiry(self):
+        """Test the token cache never serves a token past its expiry."""
+        token_cache.set(
+            'at_expired',
+            self.user,
+            timezone.now() - timedelta(seconds=1),
+        )
+
+        self.assertIsNone(token_cache.get('at_expired'))
@@ -0,0 +1,161 @@
+"""
+Tests for the user API.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Timer, TimerType)
+from user import tokens
+from user.authentication import token_cache
+
+
+CREATE_USER_URL = reverse('user:create')
+ME_URL = reverse('user:me')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class PublicUserApiTests(TestCase):
+    """Test the public features of the user API."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_create_user_success(self):
+        """Test creating a user is successful."""
+        payload = {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+            'name': 'Test Name',
+        }
+
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = get_user_model().objects.get(email=payload['email'])
+        self.assertTrue(user.check_password(payload['password']))
+        self.assertNotIn('password', res.data)
+        self.assertNotIn('timers', res.data)
+
+
+class PrivateUserApiTests(TestCase):
+    """Test API requests that require authentication."""
+
+    def setUp(self):
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        timer_type = TimerType.objects.create(user=self.user, name='music')
+        for i in range(5):
+            timer = Timer.objects.create(user=self.user, title=f'Timer {i}')
+            timer.timer_type.add(timer_type)
+
+    def test_retrieve_profile_without_timers(self):
+        """Test the profile leaves timers out by default."""
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'email': self.user.email,
+            'name': self.user.name,
+        })
+
+    def test_expand_timers_prefetched_and_limited(self):
+        """Test ?expand=timers returns the newest timers in two queries."""
+        with self.assertNumQueries(2):
+            res = self.client.get(
+                ME_URL,
+                {'expand': 'timers', 'timers_limit': 3},
+            )
+
+        self.assertEqual(
+            [t['title'] for t in res.data['timers']],
+            ['Timer 4', 'Timer 3', 'Timer 2'],
+        )
+        self.assertEqual(res.data['timers'][0]['timer_type'][0]['name'],
+                         'music')
+
+    def test_fields_limits_response(self):
+        """Test ?fields= returns only the requested fields."""
+        res = self.client.get(ME_URL, {'fields': 'name'})
+
+        self.assertEqual(res.data, {'name': 'Test Name'})
+
+    def test_update_profile_with_sparse_response(self):
+        """Test a PATCH still writes fields left out of the response."""
+        res = self.client.patch(
+            f'{ME_URL}?fields=name',
+            {'name': 'Updated', 'email': 'new@example.com'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'name': 'Updated'})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, 'new@example.com')
+
+    def test_timer_detail_fields(self):
+        """Test timer detail honours ?fields= too."""
+        timer = Timer.objects.filter(user=self.user).first()
+
+        res = self.client.get(
+            reverse('timer:timer-detail', args=[timer.id]),
+            {'fields': 'id,title'},
+        )
+
+        self.assertEqual(res.data, {'id': timer.id, 'title': timer.title})
+
+
+class CachedUserTests(TestCase):
+    """Test /me/ does not act on a user cached before a change."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.client = APIClient()
+        pair = tokens.issue(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {pair.token}')
+        # Caches the user as it is now.
+        self.client.get(ME_URL)
+
+    def change_elsewhere(self, **fields):
+        """Update the row without the signals, as another worker would."""
+        get_user_model().objects.filter(pk=self.user.pk).update(**fields)
+
+    def test_update_keeps_newer_row(self):
+        """Test a PATCH does not write back the cached password."""
+        self.change_elsewhere(password=make_password('newpass123'))
+
+        res = self.client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'New Name')
+        self.assertTrue(self.user.check_password('newpass123'))
+
+    def test_deactivated_user_rejected(self):
+        """Test a user deactivated since caching cannot edit themselves."""
+        self.change_elsewhere(is_active=False)
+
+        res = self.client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.name, 'Test Name')
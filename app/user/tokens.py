@@ -0,0 +1,120 @@
+"""
+Access and refresh token pairs.
+
+Logging in with a password issues a pair. The refresh token is later
+exchanged for a new pair with one keyed lookup and no password hashing.
+Each refresh token works once: presenting a used one again revokes its
+whole family, as someone else must hold a copy.
+"""
+import hashlib
+import secrets
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from core.models import (AccessToken, RefreshToken)
+
+
+# Tells access keys from legacy token keys, which are plain hex.
+ACCESS_PREFIX = 'at_'
+
+Pair = namedtuple('Pair', ['token', 'refresh', 'expires_in'])
+
+
+class InvalidRefreshToken(Exception):
+    """Raised for an unknown, expired, used or revoked refresh token."""
+
+
+def _digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue(user, family=None, now=None):
+    """Create and return a new token pair for user."""
+    now = now or timezone.now()
+    family = family or uuid.uuid4()
+    access = AccessToken.objects.create(
+        key=ACCESS_PREFIX + secrets.token_hex(20),
+        user=user,
+        family=family,
+        expires_at=now + timedelta(seconds=settings.ACCESS_TOKEN_TTL),
+    )
+    refresh = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        digest=_digest(refresh),
+        user=user,
+        family=family,
+        expires_at=now + timedelta(seconds=settings.REFRESH_TOKEN_TTL),
+    )
+    return Pair(access.key, refresh, settings.ACCESS_TOKEN_TTL)
+
+
+def revoke_family(family, now=None):
+    """Revoke every refresh and access token of a family."""
+    RefreshToken.objects.filter(
+        family=family,
+        revoked_at__isnull=True,
+    ).update(revoked_at=now or timezone.now())
+    AccessToken.objects.filter(family=family).delete()
+
+
+def rotate(key):
+    """Exchange refresh token key for a new pair in the same family.
+
+    Raises InvalidRefreshToken if key cannot be used.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        token = (RefreshToken.objects
+                 .select_for_update(of=('self',))
+                 .select_related('user')
+                 .filter(digest=_digest(key))
+                 .first())
+        valid = (
+            token is not None
+            and token.revoked_at is None
+            and token.expires_at > now
+            and token.user.is_active
+        )
+        if valid and token.used_at is None:
+            token.used_at = now
+            token.save(update_fields=['used_at'])
+            AccessToken.objects.filter(
+                family=token.family,
+                expires_at__lte=now,
+            ).delete()
+            RefreshToken.objects.filter(
+                family=token.family,
+                expires_at__lte=now,
+            ).delete()
+            return issue(token.user, token.family, now)
+    if valid:
+        # Revoked outside the transaction above, so the error that
+        # follows does not roll it back.
+        revoke_family(token.family, now)
+    raise InvalidRefreshToken()
+
+
+def revoke(key):
+    """Revoke the family of refresh token key, if there is one."""
+    family = (RefreshToken.objects
+              .filter(digest=_digest(key))
+              .values_list('family', flat=True)
+              .first())
+    if family is not None:
+        revoke_family(family)
+
+
+def prune(now=None):
+    """Delete expired tokens and return (access, refresh) counts.
+
+    An expired refresh token is rejected without revoking its family,
+    so dropping the row changes nothing for clients.
+    """
+    now = now or timezone.now()
+    access, _ = AccessToken.objects.filter(expires_at__lte=now).delete()
+    refresh, _ = RefreshToken.objects.filter(expires_at__lte=now).delete()
+    return access, refresh
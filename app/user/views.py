@@ -1,10 +1,19 @@
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext as _
+from drf_spectacular.utils import (extend_schema, OpenApiResponse)
+from rest_framework import exceptions, generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from user import tokens
+from user.authentication import CachedTokenAuthentication
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
+    RefreshTokenSerializer,
+    TokenPairSerializer,
 )
 
 
@@ -14,17 +23,84 @@ class CreateUserView(generics.CreateAPIView):
 
 
 class CreateTokenView(ObtainAuthToken):
-    """Create a new auth token for user."""
+    """Create a new access and refresh token pair for user."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    @extend_schema(
+        request=AuthTokenSerializer,
+        responses={200: TokenPairSerializer},
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pair = tokens.issue(serializer.validated_data['user'])
+        return Response(TokenPairSerializer(pair).data)
+
+
+class RefreshTokenView(APIView):
+    """Exchange a refresh token for a new token pair, without a password."""
+    authentication_classes = []
+    permission_classes = []
+
+    @extend_schema(
+        request=RefreshTokenSerializer,
+        responses={
+            200: TokenPairSerializer,
+            401: OpenApiResponse(
+                description='Unknown, expired, used or revoked token.'
+            ),
+        }
+    )
+    def post(self, request):
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            pair = tokens.rotate(serializer.validated_data['refresh'])
+        except tokens.InvalidRefreshToken:
+            return Response(
+                {'detail': 'Invalid or expired refresh token.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        return Response(TokenPairSerializer(pair).data)
+
+
+class RevokeTokenView(APIView):
+    """Revoke a refresh token with every token issued alongside it."""
+    authentication_classes = []
+    permission_classes = []
+
+    @extend_schema(
+        request=RefreshTokenSerializer,
+        responses={204: OpenApiResponse(description='Revoked.')},
+    )
+    def post(self, request):
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens.revoke(serializer.validated_data['refresh'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        """Retrieve and return the authenticated user."""
-        return self.request.user
+        """Retrieve and return the authenticated user.
+
+        request.user may come from another worker's token cache. Reads
+        use it as is, but updates reload the row, as saving the cached
+        copy would write back its old password and flags.
+        """
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        user = (get_user_model().objects
+                .filter(pk=self.request.user.pk, is_active=True)
+                .first())
+        if user is None:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return user
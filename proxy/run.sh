@@ -2,5 +2,13 @@
 
 set -e
 
-envsubst < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
-nginx -g "daemon off;"
\ No newline at end of file
+# The app speaks HTTP instead of the uwsgi protocol when SERVER=asgi.
+if [ "${SERVER:-uwsgi}" = "asgi" ]; then
+    template=/etc/nginx/default-asgi.conf.tpl
+else
+    template=/etc/nginx/default.conf.tpl
+fi
+
+envsubst '${LISTEN_PORT} ${SERVER_NAME} ${APP_HOST} ${APP_PORT}' \
+    < "$template" > /etc/nginx/conf.d/default.conf
+nginx -g "daemon off;"
@@ -2,8 +2,23 @@
 
 set -e
 
-python manage.py wait_for_db
+python manage.py wait_for_db --probe 3
 python manage.py collectstatic --noinput
 python manage.py migrate
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+# SERVER=uwsgi (default) speaks the uwsgi protocol to the proxy;
+# SERVER=asgi serves HTTP through uvicorn with the async timer views.
+case "${SERVER:-uwsgi}" in
+    uwsgi)
+        uwsgi --socket :9000 --workers 4 --master --enable-threads \
+            --module app.wsgi
+        ;;
+    asgi)
+        ASYNC_VIEWS=1 exec uvicorn app.asgi:application \
+            --host 0.0.0.0 --port 9000 --workers 4
+        ;;
+    *)
+        echo "Unknown SERVER '$SERVER'; use uwsgi or asgi." >&2
+        exit 1
+        ;;
+esac